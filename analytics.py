@@ -0,0 +1,225 @@
+"""
+Aggregates over scraped product output, computed in one streaming pass.
+
+The output file (CSV / JSONL / Parquet, or a partitioned dataset directory)
+is read in chunks of `chunksize` rows, so a multi-GB history never has to
+fit in memory. Each chunk is normalized (normalize.py) and folded into:
+
+    by subcategory      product count, mean price, mean rating
+    discount vs rating  running Pearson sums, mean rating per 10% discount bin
+    by month            mean discount per scrape month
+    price vs discount   fixed-edge 2D histogram
+    sample              a uniform random sample of rows, for scatter plots
+
+The task scripts plot and print from these:
+
+    agg = analyze("snapdeal_products.csv")
+    agg.subcategory_table()
+    python analytics.py snapdeal_products.csv --chunksize 200000
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from normalize import normalize
+from row_sink import sink_format
+
+
+# ================= CONFIG =================
+DATA_PATH = "snapdeal_products.csv"
+CHUNK_ROWS = 100_000
+SAMPLE_ROWS = 5_000
+DISCOUNT_BINS = list(range(0, 101, 10))
+PRICE_EDGES = np.logspace(1, 5, 41)         # Rs. 10 .. 1,00,000, log-spaced
+DISCOUNT_EDGES = np.linspace(0, 100, 41)
+# ==========================================
+
+READ_COLUMNS = [
+    "Scraped At", "Subcategory", "Price", "Original Price", "Discount",
+    "Rating (listing)", "Rating (detail)",
+]
+
+
+# ---------- chunked reading ----------
+def read_chunks(path, fmt=None, columns=READ_COLUMNS, chunksize=CHUNK_ROWS):
+    """Raw DataFrames of at most `chunksize` rows from any sink format."""
+    fmt = sink_format(path, fmt)
+    if fmt == "csv":
+        yield from pd.read_csv(path, encoding="utf-8-sig", dtype=str, keep_default_na=False,
+                               usecols=columns, chunksize=chunksize)
+    elif fmt == "jsonl":
+        with pd.read_json(path, lines=True, dtype=False, chunksize=chunksize) as reader:
+            for df in reader:
+                yield df if columns is None else df[[c for c in columns if c in df.columns]]
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif fmt == "dataset":
+        from product_dataset import open_dataset, SECTION
+        dataset = open_dataset(path)
+        # "Top Section" lives in the directory names as top_section
+        scan = None if columns is None else [
+            c for c in ("top_section" if c == SECTION else c for c in columns)
+            if c in dataset.schema.names]
+        for batch in dataset.to_batches(columns=scan, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas().rename(columns={"top_section": SECTION})
+    else:
+        raise ValueError(f"Unknown input format: {fmt!r}")
+
+
+# ---------- aggregates ----------
+class Aggregates:
+    def __init__(self, sample_rows=SAMPLE_ROWS, seed=0):
+        self.rows = 0
+        self.chunks = 0
+        self._subcat = None         # Subcategory -> n, price_sum, price_n, rating_sum, rating_n
+        self._month = None          # month -> discount_sum, discount_n
+        self._bins = None           # discount bin -> rating_sum, rating_n
+        self._pearson = np.zeros(6)     # n, sx, sy, sxx, syy, sxy
+        self._hist = np.zeros((len(PRICE_EDGES) - 1, len(DISCOUNT_EDGES) - 1), dtype=np.int64)
+        self._sample = None
+        self.sample_rows = sample_rows
+        self._rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def _add(total, part):
+        return part if total is None else total.add(part, fill_value=0)
+
+    def update(self, df):
+        """Fold one normalized chunk in."""
+        self.rows += len(df)
+        self.chunks += 1
+        price, rating, discount = df["Price"], df["Rating"], df["Discount"]
+
+        part = pd.DataFrame({
+            "n": 1,
+            "price_sum": price.fillna(0).astype("float64"),
+            "price_n": price.notna().astype("int64"),
+            "rating_sum": rating.fillna(0).astype("float64"),
+            "rating_n": rating.notna().astype("int64"),
+        }).groupby(df["Subcategory"].astype(str)).sum()
+        self._subcat = self._add(self._subcat, part)
+
+        months = df["Scraped At"].dt.to_period("M")
+        ok = discount.notna() & months.notna()
+        part = (discount[ok].astype("float64")
+                .groupby(months[ok]).agg(["sum", "count"]))
+        self._month = self._add(self._month, part)
+
+        both = discount.notna() & rating.notna()
+        x = discount[both].to_numpy("float64")
+        y = rating[both].to_numpy("float64")
+        self._pearson += [len(x), x.sum(), y.sum(), (x * x).sum(), (y * y).sum(), (x * y).sum()]
+        bins = pd.cut(discount[both], DISCOUNT_BINS, include_lowest=True)
+        part = rating[both].astype("float64").groupby(bins, observed=False).agg(["sum", "count"])
+        self._bins = self._add(self._bins, part)
+
+        pd_ok = price.notna() & discount.notna()
+        h, _, _ = np.histogram2d(price[pd_ok].to_numpy("float64"),
+                                 discount[pd_ok].to_numpy("float64"),
+                                 bins=[PRICE_EDGES, DISCOUNT_EDGES])
+        self._hist += h.astype(np.int64)
+
+        # bottom-k on random keys = uniform sample of everything seen so far
+        cand = df[["Subcategory", "Price", "Discount", "Rating"]].assign(
+            Subcategory=df["Subcategory"].astype(str), _key=self._rng.random(len(df)))
+        if self._sample is not None:
+            cand = pd.concat([self._sample, cand], ignore_index=True)
+        self._sample = cand.nsmallest(self.sample_rows, "_key")
+
+    # ---------- results ----------
+    def subcategory_table(self, min_count=1):
+        """subcategory, avg_price, avg_rating, count (the task3 table)."""
+        s = self._subcat if self._subcat is not None else pd.DataFrame(
+            columns=["n", "price_sum", "price_n", "rating_sum", "rating_n"])
+        out = pd.DataFrame({
+            "subcategory": s.index,
+            "avg_price": (s["price_sum"] / s["price_n"].where(s["price_n"] > 0)).to_numpy(),
+            "avg_rating": (s["rating_sum"] / s["rating_n"].where(s["rating_n"] > 0)).to_numpy(),
+            "count": s["n"].astype("int64").to_numpy(),
+        })
+        return out[out["count"] >= min_count].reset_index(drop=True)
+
+    def discount_correlation(self):
+        """(Pearson r, p-value, n) of discount vs rating; NaNs if undefined."""
+        n, sx, sy, sxx, syy, sxy = self._pearson
+        cov = sxy - sx * sy / n if n else 0.0
+        vx = sxx - sx * sx / n if n else 0.0
+        vy = syy - sy * sy / n if n else 0.0
+        if n < 3 or vx <= 0 or vy <= 0:
+            return float("nan"), float("nan"), int(n)
+        r = max(-1.0, min(1.0, cov / math.sqrt(vx * vy)))
+        stat = abs(r) * math.sqrt((n - 2) / max(1e-300, 1 - r * r))
+        try:
+            from scipy.stats import t
+            p = 2 * t.sf(stat, n - 2)
+        except ImportError:
+            p = math.erfc(stat / math.sqrt(2))     # normal approximation, fine for large n
+        return r, float(p), int(n)
+
+    def discount_bins(self):
+        """Discount_Bin, Rating (mean), count for each 10% discount bin."""
+        b = self._bins
+        labels = [f"{lo}–{hi}%" for lo, hi in zip(DISCOUNT_BINS, DISCOUNT_BINS[1:])]
+        if b is None:
+            return pd.DataFrame({"Discount_Bin": labels, "Rating": np.nan, "count": 0})
+        return pd.DataFrame({
+            "Discount_Bin": labels,
+            "Rating": (b["sum"] / b["count"].where(b["count"] > 0)).to_numpy(),
+            "count": b["count"].astype("int64").to_numpy(),
+        })
+
+    def monthly_discount(self):
+        """Mean discount per scrape month, in date order (index "YYYY-MM")."""
+        m = self._month
+        if m is None or m.empty:
+            return pd.Series(dtype="float64", name="discount")
+        m = m.sort_index()
+        out = m["sum"] / m["count"]
+        out.index = out.index.astype(str)
+        return out.rename("discount")
+
+    def price_discount_hist(self):
+        """(counts, price edges, discount edges) for pcolormesh / imshow."""
+        return self._hist, PRICE_EDGES, DISCOUNT_EDGES
+
+    def sample(self):
+        cols = ["Subcategory", "Price", "Discount", "Rating"]
+        if self._sample is None:
+            return pd.DataFrame(columns=cols)
+        return self._sample[cols].reset_index(drop=True)
+
+
+def analyze(path=DATA_PATH, fmt=None, chunksize=CHUNK_ROWS, sample_rows=SAMPLE_ROWS):
+    """One pass over `path`; returns the filled Aggregates."""
+    agg = Aggregates(sample_rows)
+    for chunk in read_chunks(path, fmt, chunksize=chunksize):
+        agg.update(normalize(chunk, copy=False))
+    return agg
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stream a products file into summary aggregates.")
+    ap.add_argument("input", nargs="?", default=DATA_PATH)
+    ap.add_argument("--format", help="input format (default: from the path)")
+    ap.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    agg = analyze(args.input, args.format, args.chunksize)
+    print(f"{agg.rows} rows in {agg.chunks} chunks, {time.perf_counter() - t0:.1f}s\n")
+    print(agg.subcategory_table().sort_values("count", ascending=False).head(20).to_string(index=False))
+    r, p, n = agg.discount_correlation()
+    print(f"\nDiscount vs rating: r={r:.3f} p={p:.3g} (n={n})")
+    print(agg.discount_bins().to_string(index=False))
+    print("\nMean discount by month:")
+    print(agg.monthly_discount().round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
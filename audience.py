@@ -0,0 +1,125 @@
+"""
+Target-audience classification for product rows, in batches.
+
+Each taxonomy label has a keyword list; all of them are compiled into one
+case-insensitive, word-bounded regex (so "men" no longer matches inside
+"women", nor "male" inside "female"). Plurals and possessives come for
+free: "girl" also matches "girls" and "girl's". When a text hits several
+labels, the one listed first in the taxonomy wins.
+
+    labels = CLASSIFIER.classify_many(texts)
+    df["Target Audience"] = CLASSIFIER.classify_frame(df)
+
+Reclassifying a whole output file (repeated texts are matched once):
+
+    python audience.py snapdeal_products.csv --output reclassified.parquet
+    python audience.py products/ --taxonomy my_taxonomy.json --output out.csv
+"""
+import argparse
+import json
+import re
+import time
+
+import numpy as np
+
+
+# ================= CONFIG =================
+# label -> keywords, highest priority first (no bare "man" / "woman": "Spider-Man",
+# "Iron Man", "Wonder Woman" are characters, not audiences)
+AUDIENCE_TAXONOMY = {
+    "Female": ["women", "womenswear", "girl", "ladies", "lady", "female"],
+    "Male": ["men", "menswear", "boy", "gents", "male"],
+    "Children": ["kid", "child", "children", "infant", "toddler"],
+}
+UNSPECIFIED = "Unspecified"
+TEXT_COLUMNS = ["Product Name", "Short Description"]
+# ==========================================
+
+
+class AudienceClassifier:
+    def __init__(self, taxonomy=None, default=UNSPECIFIED):
+        taxonomy = AUDIENCE_TAXONOMY if taxonomy is None else taxonomy
+        self.labels = list(taxonomy)
+        self.default = default
+        groups = []
+        for i, label in enumerate(self.labels):
+            words = sorted({w.lower() for w in taxonomy[label]}, key=len, reverse=True)
+            if words:
+                groups.append(f"(?P<g{i}>{'|'.join(map(re.escape, words))})")
+        self.pattern = re.compile(r"\b(?:" + "|".join(groups) + r")(?:'?s)?\b", re.IGNORECASE)
+
+    def rank(self, text):
+        """Index of the best label matching `text`, or len(labels) for none."""
+        best = len(self.labels)
+        for m in self.pattern.finditer(text):
+            i = int(m.lastgroup[1:])
+            if i < best:
+                best = i
+                if i == 0:
+                    break
+        return best
+
+    def classify(self, text):
+        i = self.rank(text or "")
+        return self.labels[i] if i < len(self.labels) else self.default
+
+    def classify_many(self, texts):
+        """Labels for an iterable of texts; each distinct text is matched once."""
+        names = self.labels + [self.default]
+        memo = {}
+        out = []
+        for t in texts:
+            i = memo.get(t)
+            if i is None:
+                i = memo[t] = self.rank(t or "")
+            out.append(names[i])
+        return out
+
+    def classify_frame(self, df, columns=TEXT_COLUMNS):
+        """Categorical Series of labels for a DataFrame, from its text columns joined."""
+        import pandas as pd
+        text = df[columns[0]].fillna("").astype(str)
+        for c in columns[1:]:
+            text = text + " " + df[c].fillna("").astype(str)
+        codes, uniques = pd.factorize(text)
+        ranks = np.fromiter((self.rank(t) for t in uniques), dtype=np.int16, count=len(uniques))
+        cats = pd.Categorical.from_codes(ranks[codes], categories=self.labels + [self.default])
+        return pd.Series(cats, index=df.index, name="Target Audience")
+
+
+CLASSIFIER = AudienceClassifier()
+
+
+def main(argv=None):
+    from normalize import read_products
+
+    ap = argparse.ArgumentParser(description="Recompute Target Audience for a products file.")
+    ap.add_argument("input")
+    ap.add_argument("--taxonomy", help='JSON file: {"Label": ["keyword", ...], ...} in priority order')
+    ap.add_argument("--output", help="write the reclassified rows here (.parquet or .csv)")
+    args = ap.parse_args(argv)
+
+    classifier = CLASSIFIER
+    if args.taxonomy:
+        with open(args.taxonomy, encoding="utf-8") as f:
+            classifier = AudienceClassifier(json.load(f))
+    df = read_products(args.input)
+    t0 = time.perf_counter()
+    labels = classifier.classify_frame(df)
+    elapsed = time.perf_counter() - t0
+    if "Target Audience" in df.columns:
+        changed = int((df["Target Audience"].astype(str) != labels.astype(str)).sum())
+        print(f"{changed} of {len(df)} rows change label")
+    df["Target Audience"] = labels
+    print(labels.value_counts().to_string())
+    print(f"\n{len(df)} rows classified in {elapsed:.2f}s")
+    if args.output:
+        if args.output.endswith(".parquet"):
+            df.to_parquet(args.output, index=False)
+        else:
+            df.to_csv(args.output, index=False, encoding="utf-8-sig")
+        print(f"→ {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare bytes transferred and page-load time with and without lean mode.
+
+Loads each URL in a normal and a lean headless Chrome and sums
+`Network.loadingFinished.encodedDataLength` from the performance log
+(counts cross-origin traffic too, unlike the Resource Timing API).
+
+    python bench_lean.py
+    python bench_lean.py https://www.snapdeal.com/search?keyword=shoes
+"""
+import json
+import statistics
+import sys
+
+from browser import make_driver
+
+
+# ================= CONFIG =================
+HEADLESS = True
+ROUNDS = 3
+URLS = [
+    "https://www.snapdeal.com/search?keyword=accessories&sort=rlvncy",
+    "https://www.snapdeal.com/search?keyword=footwear&sort=rlvncy",
+]
+# ==========================================
+
+
+def page_bytes(driver):
+    """Sum encoded bytes of finished requests since the log was last read."""
+    total, requests = 0, 0
+    for entry in driver.get_log("performance"):
+        msg = json.loads(entry["message"])["message"]
+        if msg.get("method") == "Network.loadingFinished":
+            total += msg["params"].get("encodedDataLength", 0)
+            requests += 1
+    return total, requests
+
+def load_time_ms(driver):
+    return driver.execute_script("""
+        const nav = performance.getEntriesByType('navigation')[0];
+        return nav ? nav.loadEventEnd - nav.startTime : 0;
+    """)
+
+def measure(driver, url):
+    page_bytes(driver)               # drain anything from earlier pages
+    driver.get(url)
+    nbytes, nreq = page_bytes(driver)
+    return {"bytes": nbytes, "requests": nreq, "load_ms": load_time_ms(driver)}
+
+def run(urls, lean):
+    drv = make_driver(HEADLESS, lean=lean, perf_log=True)
+    try:
+        samples = [measure(drv, u) for _ in range(ROUNDS) for u in urls]
+    finally:
+        drv.quit()
+    return {
+        "bytes": statistics.median(s["bytes"] for s in samples),
+        "requests": statistics.median(s["requests"] for s in samples),
+        "load_ms": statistics.median(s["load_ms"] for s in samples),
+    }
+
+
+def main(argv=None):
+    urls = (argv if argv is not None else sys.argv[1:]) or URLS
+    normal = run(urls, lean=False)
+    lean = run(urls, lean=True)
+
+    print(f"{'':10}{'KB/page':>12}{'requests':>12}{'load ms':>12}")
+    for name, r in (("normal", normal), ("lean", lean)):
+        print(f"{name:10}{r['bytes'] / 1024:12.1f}{r['requests']:12.0f}{r['load_ms']:12.0f}")
+    if normal["bytes"] and normal["load_ms"]:
+        print(f"\nlean saves {100 * (1 - lean['bytes'] / normal['bytes']):.0f}% bytes, "
+              f"{100 * (1 - lean['load_ms'] / normal['load_ms']):.0f}% load time (median)")
+
+
+if __name__ == "__main__":
+    main()
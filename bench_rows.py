@@ -0,0 +1,77 @@
+"""
+Memory of in-flight product rows: 22-key dicts vs ProductRow records.
+
+Builds the same N rows both ways from one shared pool of field values and
+measures only what the containers add (tracemalloc), so the difference is
+the per-row overhead, not the text itself. Also times CSV output of each.
+
+    python bench_rows.py
+    python bench_rows.py 500000
+"""
+import csv
+import io
+import random
+import sys
+import time
+import tracemalloc
+
+from row_sink import COLUMNS, FIELD_NAMES, INT_COLUMNS, ProductRow
+
+
+# ================= CONFIG =================
+N_ROWS = 200_000
+# ==========================================
+
+
+def sample_values(n, seed=7):
+    """Per-row field values shaped like real output (shared by both builds)."""
+    rnd = random.Random(seed)
+    sections = ["Accessories", "Footwear", "Kids Fashion", "Men Clothing", "Women Clothing"]
+    rows = []
+    for i in range(n):
+        rows.append([
+            rnd.randrange(0, 5000) if c in INT_COLUMNS else
+            rnd.choice(sections) if c == "Top Section" else
+            f"{c} value {i}" for c in COLUMNS
+        ])
+    return rows
+
+def measure(build):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    rows = build()
+    elapsed = time.perf_counter() - t0
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, size, elapsed
+
+def csv_seconds(rows):
+    """Same DictWriter setup as row_sink.CsvSink, into memory."""
+    w = csv.DictWriter(io.StringIO(), fieldnames=COLUMNS, restval="", extrasaction="ignore",
+                       lineterminator="\n")
+    t0 = time.perf_counter()
+    w.writerows(rows)
+    return time.perf_counter() - t0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else N_ROWS
+    values = sample_values(n)
+
+    dicts, dict_bytes, dict_t = measure(lambda: [dict(zip(COLUMNS, v)) for v in values])
+    recs, rec_bytes, rec_t = measure(
+        lambda: [ProductRow(**dict(zip(FIELD_NAMES, v))) for v in values])
+    assert dicts[0] == recs[0].to_dict()
+
+    print(f"{n:,} rows, container overhead only (field values shared)")
+    print(f"{'':12}{'MB':>10}{'bytes/row':>12}{'build s*':>10}{'csv s':>10}")
+    for name, b, t, rows in (("dict", dict_bytes, dict_t, dicts), ("ProductRow", rec_bytes, rec_t, recs)):
+        print(f"{name:12}{b / 2**20:10.1f}{b / n:12.0f}{t:10.2f}{csv_seconds(rows):10.2f}")
+    print("* build times include tracemalloc overhead")
+    print(f"\nProductRow saves {100 * (1 - rec_bytes / dict_bytes):.0f}% "
+          f"({(dict_bytes - rec_bytes) / n:.0f} bytes per row)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Offline end-to-end benchmark of the snapdeal.py pipeline.
+
+Starts fixture_server.FixtureServer, points snapdeal.BASE_SECTIONS at it
+and runs snapdeal.main() unchanged, then reports throughput and latency:
+
+    python benchmark.py
+    python benchmark.py --subcats 4 --pages 5 --workers 8 --delay-ms 50 --json bench.json
+
+pages/sec counts listing pages scraped, products/sec counts output rows,
+per-product latency is the time spent fetching one product's details
+(HTTP, pool worker or in-tab), and peak RSS covers this process plus the
+browsers it launched (psutil if installed, else this process only).
+"""
+import argparse
+import csv
+import functools
+import json
+import os
+import resource
+import statistics
+import tempfile
+import threading
+import time
+
+import browser
+import deep_pool
+import http_fetcher
+import snapdeal
+from fixture_server import FixtureServer
+from metrics import METRICS
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# ---------- measurement helpers ----------
+class LatencyRecorder:
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def wrap(self, fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(time.perf_counter() - t0)
+        return timed
+
+    def wrap_async(self, fn):
+        @functools.wraps(fn)
+        async def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.add(time.perf_counter() - t0)
+        return timed
+
+    def percentile(self, q):
+        if not self.samples:
+            return 0.0
+        if len(self.samples) == 1:
+            return self.samples[0]
+        return statistics.quantiles(self.samples, n=100, method="inclusive")[q - 1]
+
+
+class RssSampler(threading.Thread):
+    """Polls RSS of this process and its children (the browsers)."""
+
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def sample(self):
+        if psutil is None:
+            # ru_maxrss is KiB on Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        me = psutil.Process()
+        total = 0
+        for p in [me] + me.children(recursive=True):
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, self.sample())
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, self.sample())
+
+
+def instrument(recorder):
+    """Time every per-product detail fetch, whichever path serves it."""
+    deep_pool.fetch_detail = recorder.wrap(deep_pool.fetch_detail)
+    snapdeal.deep_scrape_product = recorder.wrap(snapdeal.deep_scrape_product)
+    http_fetcher.HttpDetailFetcher._fetch_one = recorder.wrap_async(
+        http_fetcher.HttpDetailFetcher._fetch_one)
+
+
+# ---------- run ----------
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark snapdeal.py against local fixtures.")
+    ap.add_argument("--sections", type=int, default=2)
+    ap.add_argument("--subcats", type=int, default=3)
+    ap.add_argument("--pages", type=int, default=3)
+    ap.add_argument("--cards", type=int, default=20)
+    ap.add_argument("--delay-ms", type=int, default=0, help="artificial server latency per response")
+    ap.add_argument("--workers", type=int, default=snapdeal.DEEP_WORKERS, help="DEEP_WORKERS")
+    ap.add_argument("--no-http", action="store_true", help="disable the HTTP-first detail fetcher")
+    ap.add_argument("--lean", action="store_true", help="enable lean browser mode")
+    ap.add_argument("--no-parallel-pages", action="store_true", help="click through pagination")
+    ap.add_argument("--adaptive-rate", action="store_true",
+                    help="keep AIMD pacing of browser page loads on (off by default: fixtures "
+                         "never push back, so pacing would only measure the ramp-up)")
+    ap.add_argument("--shallow", action="store_true", help="DEEP_SCRAPE = False")
+    ap.add_argument("--json", help="also write the report to this file")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = FixtureServer(sections=args.sections, subcats=args.subcats, pages=args.pages,
+                           cards=args.cards, delay_ms=args.delay_ms).start()
+    workdir = tempfile.mkdtemp(prefix="snapdeal-bench-")
+    output = os.path.join(workdir, "products.csv")
+
+    snapdeal.BASE_SECTIONS = server.section_urls()
+    snapdeal.MAX_PAGES_PER_SUBCAT = args.pages
+    snapdeal.DEEP_SCRAPE = not args.shallow
+    snapdeal.DEEP_WORKERS = args.workers
+    snapdeal.HTTP_FIRST = not args.no_http
+    snapdeal.LEAN_BROWSER = args.lean
+    snapdeal.PARALLEL_PAGES = not args.no_parallel_pages
+    snapdeal.ADAPTIVE_RATE = args.adaptive_rate
+    browser.LEAN_ALLOWED_HOSTS = ("localhost", "127.0.0.1")
+
+    recorder = LatencyRecorder()
+    instrument(recorder)
+    rss = RssSampler()
+    rss.start()
+    t0 = time.perf_counter()
+    try:
+        snapdeal.main(["--state", os.path.join(workdir, "state.sqlite"),
+                       "--output", output, "--no-cache"])
+    finally:
+        elapsed = time.perf_counter() - t0
+        rss.stop()
+        served = server.stats()
+        server.stop()
+
+    # descriptions span lines, so count CSV records rather than text lines
+    with open(output, newline="", encoding="utf-8-sig") as f:
+        rows = max(0, sum(1 for _ in csv.reader(f)) - 1)
+    report = {
+        "config": vars(args),
+        "elapsed_s": round(elapsed, 3),
+        "listing_pages": METRICS.counters["pages"],
+        "listing_requests": served["listing"],
+        "product_pages": served["product"],
+        "rows": rows,
+        "pages_per_s": round(METRICS.counters["pages"] / elapsed, 3),
+        "products_per_s": round(rows / elapsed, 3),
+        "product_latency_p50_ms": round(recorder.percentile(50) * 1000, 1),
+        "product_latency_p95_ms": round(recorder.percentile(95) * 1000, 1),
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+    }
+
+    print("\n===== benchmark =====")
+    for k, v in report.items():
+        if k != "config":
+            print(f"{k:>24}: {v}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
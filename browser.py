@@ -0,0 +1,118 @@
+"""
+Shared Chrome setup for the Selenium scripts.
+
+`make_driver()` builds a configured Chrome instance, or checks one out of
+the browser pool daemon (browser_pool.py) when SNAPDEAL_BROWSER_POOL is
+set. The chromedriver path is cached on disk for a day, so a run doesn't
+ask webdriver-manager (and the network) again.
+
+Lean mode skips what the scrapers never read: images, media and fonts are
+blocked through CDP `Network.setBlockedURLs`, and every host outside
+LEAN_ALLOWED_HOSTS (analytics, ad and tracker domains) fails DNS
+resolution. Stylesheets and scripts still load -- left-panel discovery
+relies on element positions and listings render via JS. The CDP block
+list is per tab; the host allowlist and image switch are browser-wide.
+It is off by default (LEAN_BROWSER in each script): turn it on once
+bench_lean.py has shown, against the live site, that listings still render
+and how many bytes it saves.
+"""
+import json
+import os
+import time
+from functools import lru_cache
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+
+# hosts (and their subdomains) a lean browser may talk to
+LEAN_ALLOWED_HOSTS = ("snapdeal.com", "sdlcdn.com")
+
+# pool daemon URL, e.g. http://127.0.0.1:9555 (unset = always launch Chrome here)
+POOL_ENV = "SNAPDEAL_BROWSER_POOL"
+
+DRIVER_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "snapdeal_products",
+                                 "chromedriver.json")
+DRIVER_CACHE_TTL = 24 * 3600
+
+# URL patterns blocked in lean mode (CDP wildcard syntax)
+LEAN_BLOCKED_URL_PATTERNS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg",
+]
+
+
+@lru_cache(maxsize=1)
+def driver_path():
+    """Download (or reuse) chromedriver once per process; the path is cached on disk too."""
+    try:
+        with open(DRIVER_CACHE_FILE, encoding="utf-8") as f:
+            cached = json.load(f)
+        if time.time() - cached["resolved_at"] < DRIVER_CACHE_TTL and os.path.exists(cached["path"]):
+            return cached["path"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    path = ChromeDriverManager().install()
+    try:
+        os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+        with open(DRIVER_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"path": path, "resolved_at": time.time()}, f)
+    except OSError:
+        pass
+    return path
+
+def host_resolver_rules(allowed_hosts):
+    """Chrome flag that makes every host outside `allowed_hosts` unresolvable."""
+    excludes = []
+    for host in allowed_hosts:
+        excludes += [f"EXCLUDE {host}", f"EXCLUDE *.{host}"]
+    return "--host-resolver-rules=MAP * ~NOTFOUND , " + " , ".join(excludes)
+
+def chrome_options(headless=True, lean=False, allowed_hosts=None,
+                   extra_args=(), perf_log=False):
+    if allowed_hosts is None:
+        allowed_hosts = LEAN_ALLOWED_HOSTS
+    opts = Options()
+    if headless:
+        # newer headless is more stable
+        opts.add_argument("--headless=new")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--window-size=1920,1080")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-dev-shm-usage")
+    for arg in extra_args:
+        opts.add_argument(arg)
+    if lean:
+        opts.add_argument("--blink-settings=imagesEnabled=false")
+        opts.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+        })
+        if allowed_hosts:
+            opts.add_argument(host_resolver_rules(allowed_hosts))
+    if perf_log:
+        # network events for byte accounting (see bench_lean.py)
+        opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return opts
+
+def enable_lean_mode(driver, patterns=LEAN_BLOCKED_URL_PATTERNS):
+    """Block heavy resource types in the driver's current tab via CDP."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+def make_driver(headless=True, lean=False, extra_args=(), perf_log=False, pool=None):
+    pool = os.environ.get(POOL_ENV) if pool is None else pool
+    if pool:
+        from browser_pool import checkout_driver, profile
+        drv = checkout_driver(pool, profile(headless, lean, extra_args, perf_log))
+        if drv is not None:
+            return drv
+    drv = webdriver.Chrome(
+        service=Service(driver_path()),
+        options=chrome_options(headless, lean=lean, extra_args=extra_args, perf_log=perf_log)
+    )
+    if lean:
+        enable_lean_mode(drv)
+    return drv
@@ -0,0 +1,428 @@
+"""
+Long-lived pool of warm Chrome sessions shared by the scraper scripts.
+
+Starting chromedriver + Chrome costs seconds; a cron schedule pays that on
+every run. The daemon keeps `--size` configured sessions open and hands
+them out over a small local HTTP API. A script attaches to a checked-out
+session over the WebDriver protocol (no new browser), and `quit()` hands it
+back. Returned sessions are reset (blank tab, no cookies, default timeouts)
+and recycled once they pass an age, use count or memory limit, or when
+their lease runs out because a client died holding them. A live client keeps
+its lease for as long as it likes: PooledChrome renews it in the background
+every third of the lease, so only a client whose process died loses its browser.
+
+    python browser_pool.py --size 4                     # daemon (headless)
+    SNAPDEAL_BROWSER_POOL=http://127.0.0.1:9555 python snapdeal.py
+
+With the variable set, browser.make_driver() checks out a session whose
+profile (headless / lean / extra args) matches and falls back to launching
+Chrome itself when the pool is unreachable, busy or configured differently.
+
+    GET  /status
+    POST /checkout   {"profile": {...}, "wait": 0, "lease": 1800}
+    POST /renew      {"id": 3}                          -> {"lease_until": ...}
+    POST /checkin    {"id": 3, "discard": false}
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+
+from browser import make_driver, enable_lean_mode
+
+
+# ================= CONFIG =================
+POOL_HOST = "127.0.0.1"
+POOL_PORT = 9555
+POOL_SIZE = 4
+MAX_AGE_SECS = 30 * 60      # recycle a browser this old...
+MAX_USES = 200              # ...or after this many checkouts...
+MAX_RSS_MB = 1500           # ...or when Chrome's processes use more than this (needs psutil)
+LEASE_SECS = 120            # a checkout not renewed or returned by then is reclaimed
+MAINTAIN_EVERY = 5
+CLIENT_TIMEOUT = 2          # seconds a script waits on the daemon before launching Chrome itself
+# ==========================================
+
+
+def profile(headless=True, lean=False, extra_args=(), perf_log=False):
+    """What a session must have been launched with to be handed to a caller."""
+    return {"headless": bool(headless), "lean": bool(lean),
+            "extra_args": sorted(extra_args), "perf_log": bool(perf_log)}
+
+
+# ---------- daemon side ----------
+class Slot:
+    def __init__(self, id, driver):
+        self.id = id
+        self.driver = driver
+        self.created = time.time()
+        self.uses = 0
+        self.lease_until = None     # set while checked out
+        self.lease_secs = None      # lease length the caller asked for
+
+    @property
+    def executor(self):
+        return self.driver.service.service_url
+
+    def rss_mb(self):
+        try:
+            import psutil
+        except ImportError:
+            return 0.0
+        try:
+            root = psutil.Process(self.driver.service.process.pid)
+            procs = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs) / 2**20
+        except psutil.Error:
+            return 0.0
+
+
+class BrowserPool:
+    def __init__(self, size=POOL_SIZE, headless=True, lean=False, extra_args=(),
+                 max_age=MAX_AGE_SECS, max_uses=MAX_USES, max_rss_mb=MAX_RSS_MB,
+                 lease=LEASE_SECS, warm_url=None, driver_factory=None):
+        self.size = max(1, int(size))
+        self.profile = profile(headless, lean, extra_args)
+        self.lean = lean
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.lease = lease
+        self.warm_url = warm_url
+        # pool="": always launch Chrome here, even if SNAPDEAL_BROWSER_POOL is exported
+        # in the daemon's shell (it would otherwise check sessions out of itself)
+        self.driver_factory = driver_factory or (
+            lambda: make_driver(headless, lean=lean, extra_args=extra_args, pool=""))
+        self._cond = threading.Condition()
+        self._idle = []             # ready slots, most recently returned last
+        self._busy = {}             # id -> checked-out slot
+        self._starting = 0
+        self._next_id = 0
+        self.launched = 0
+        self.recycled = 0
+        self.checkouts = 0
+        self._done = threading.Event()
+
+    # ---------- slot lifecycle ----------
+    def _launch(self):
+        try:
+            drv = self.driver_factory()
+            if self.warm_url:
+                drv.get(self.warm_url)
+        except Exception as e:
+            print(f"[pool] launch failed: {e!r}")
+            with self._cond:
+                self._starting -= 1
+            return
+        with self._cond:
+            self._next_id += 1
+            self._idle.append(Slot(self._next_id, drv))
+            self._starting -= 1
+            self.launched += 1
+            self._cond.notify()
+
+    def _top_up(self):
+        """Start browsers in the background until the pool is back at `size`."""
+        with self._cond:
+            missing = self.size - len(self._idle) - len(self._busy) - self._starting
+            self._starting += max(0, missing)
+        for _ in range(max(0, missing)):
+            threading.Thread(target=self._launch, name="pool-launch", daemon=True).start()
+
+    def _retire(self, slot, why):
+        self.recycled += 1
+        print(f"[pool] recycling session {slot.id} ({why})")
+        try:
+            slot.driver.quit()
+        except Exception:
+            pass
+
+    def _worn_out(self, slot):
+        if time.time() - slot.created > self.max_age:
+            return "age"
+        if slot.uses >= self.max_uses:
+            return "uses"
+        if self.max_rss_mb and slot.rss_mb() > self.max_rss_mb:
+            return "memory"
+        return None
+
+    def _reset(self, slot):
+        """Clean a returned session for the next caller; False if it's broken."""
+        drv = slot.driver
+        try:
+            handles = drv.window_handles
+            for h in handles[1:]:
+                drv.switch_to.window(h)
+                drv.close()
+            drv.switch_to.window(handles[0])
+            drv.get(self.warm_url or "about:blank")
+            drv.delete_all_cookies()
+            drv.set_page_load_timeout(300)
+            drv.implicitly_wait(0)
+            if self.lean:
+                enable_lean_mode(drv)
+            return True
+        except Exception:
+            return False
+
+    def _return(self, slot, discard=False):
+        why = "discarded" if discard else self._worn_out(slot)
+        if why is None and not self._reset(slot):
+            why = "reset failed"
+        if why:
+            self._retire(slot, why)
+            self._top_up()
+            return
+        with self._cond:
+            self._idle.append(slot)
+            self._cond.notify()
+
+    # ---------- API ----------
+    def checkout(self, wanted=None, wait=0.0, lease=None):
+        """An idle Slot, now leased to the caller, or None if none frees up within `wait` seconds."""
+        if wanted is not None and wanted != self.profile:
+            raise ValueError("profile mismatch")
+        deadline = time.time() + max(0.0, wait)
+        with self._cond:
+            while not self._idle:
+                left = deadline - time.time()
+                if left <= 0:
+                    return None
+                self._cond.wait(left)
+            slot = self._idle.pop()
+            slot.uses += 1
+            slot.lease_secs = float(lease or self.lease)
+            slot.lease_until = time.time() + slot.lease_secs
+            self._busy[slot.id] = slot
+            self.checkouts += 1
+        return slot
+
+    def renew(self, slot_id, lease=None):
+        """Extend a live checkout's lease; None if it was already reclaimed."""
+        with self._cond:
+            slot = self._busy.get(slot_id)
+            if slot is None:
+                return None
+            slot.lease_until = time.time() + float(lease or slot.lease_secs)
+            return slot.lease_until
+
+    def checkin(self, slot_id, discard=False):
+        with self._cond:
+            slot = self._busy.pop(slot_id, None)
+        if slot is None:
+            return False
+        slot.lease_until = None
+        # reset off the request thread so the caller isn't kept waiting
+        threading.Thread(target=self._return, args=(slot, discard), daemon=True).start()
+        return True
+
+    def maintain(self):
+        """Reclaim expired leases and retire worn-out idle browsers."""
+        now = time.time()
+        with self._cond:
+            expired = [s for s in self._busy.values() if s.lease_until and s.lease_until < now]
+            for s in expired:
+                del self._busy[s.id]
+            worn = [(s, why) for s in self._idle if (why := self._worn_out(s))]
+            self._idle = [s for s in self._idle if s not in {w for w, _ in worn}]
+        for s in expired:
+            self._retire(s, "lease expired")
+        for s, why in worn:
+            self._retire(s, why)
+        self._top_up()
+
+    def status(self):
+        now = time.time()
+        with self._cond:
+            slots = [(s, "idle") for s in self._idle] + [(s, "busy") for s in self._busy.values()]
+            starting = self._starting
+        return {
+            "profile": self.profile, "size": self.size, "starting": starting,
+            "launched": self.launched, "recycled": self.recycled, "checkouts": self.checkouts,
+            "sessions": [{"id": s.id, "state": st, "age": round(now - s.created), "uses": s.uses}
+                         for s, st in sorted(slots, key=lambda x: x[0].id)],
+        }
+
+    def start(self):
+        self._top_up()
+        threading.Thread(target=self._maintain_loop, name="pool-maintain", daemon=True).start()
+        return self
+
+    def _maintain_loop(self):
+        while not self._done.wait(MAINTAIN_EVERY):
+            self.maintain()
+
+    def close(self):
+        self._done.set()
+        with self._cond:
+            slots = self._idle + list(self._busy.values())
+            self._idle, self._busy = [], {}
+        for s in slots:
+            try:
+                s.driver.quit()
+            except Exception:
+                pass
+
+
+class PoolHandler(BaseHTTPRequestHandler):
+    pool = None     # set by serve()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/status":
+            return self._send(200, self.pool.status())
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "bad json"})
+        if self.path == "/checkout":
+            try:
+                slot = self.pool.checkout(req.get("profile"), wait=float(req.get("wait") or 0),
+                                          lease=req.get("lease"))
+            except ValueError as e:
+                return self._send(409, {"error": str(e), "profile": self.pool.profile})
+            if slot is None:
+                return self._send(503, {"error": "no idle session"})
+            return self._send(200, {"id": slot.id, "executor": slot.executor,
+                                    "session_id": slot.driver.session_id,
+                                    "lease_until": slot.lease_until,
+                                    "lease": slot.lease_secs})
+        if self.path == "/renew":
+            until = self.pool.renew(req.get("id"), lease=req.get("lease"))
+            if until is None:
+                return self._send(404, {"error": "lease expired"})
+            return self._send(200, {"lease_until": until})
+        if self.path == "/checkin":
+            ok = self.pool.checkin(req.get("id"), discard=bool(req.get("discard")))
+            return self._send(200 if ok else 404, {"ok": ok})
+        self._send(404, {"error": "not found"})
+
+
+def serve(pool, host=POOL_HOST, port=POOL_PORT):
+    handler = type("Handler", (PoolHandler,), {"pool": pool})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+# ---------- client side ----------
+def _call(pool_url, path, payload=None, timeout=CLIENT_TIMEOUT):
+    data = None if payload is None else json.dumps(payload).encode()
+    req = urllib.request.Request(pool_url.rstrip("/") + path, data=data,
+                                 headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        return e.code, {}
+    except (urllib.error.URLError, OSError, ValueError):
+        return None, {}
+
+
+class PooledChrome(webdriver.Remote):
+    """
+    A Remote driver attached to a pool session; quit() hands it back instead
+    of closing it. A background thread renews the lease while it's held.
+    """
+
+    def __init__(self, pool_url, lease):
+        self.pool_url = pool_url
+        self.lease_id = lease["id"]
+        self._attach_to = lease["session_id"]
+        # Chrome's connection knows the goog/cdp endpoints a plain RemoteConnection lacks
+        super().__init__(command_executor=ChromeRemoteConnection(lease["executor"]),
+                         options=Options())
+        self._released = threading.Event()
+        every = max(1.0, float(lease.get("lease") or LEASE_SECS) / 3)
+        threading.Thread(target=self._heartbeat, args=(every,), name="pool-lease",
+                         daemon=True).start()
+
+    def _heartbeat(self, every):
+        while not self._released.wait(every):
+            lease_id = self.lease_id
+            if lease_id is None:
+                return
+            status, _ = _call(self.pool_url, "/renew", {"id": lease_id})
+            if status == 404:
+                print(f"[pool] lease {lease_id} was reclaimed by the daemon")
+                return
+
+    def start_session(self, capabilities):
+        # attach instead of creating a new session
+        self.session_id = self._attach_to
+        self.caps = {}
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+    def quit(self, discard=False):
+        self._released.set()
+        if self.lease_id is not None:
+            _call(self.pool_url, "/checkin", {"id": self.lease_id, "discard": discard})
+            self.lease_id = None
+
+def checkout_driver(pool_url, wanted, wait=0, lease=None):
+    """A PooledChrome for a session matching `wanted`, or None (caller launches its own)."""
+    status, body = _call(pool_url, "/checkout", {"profile": wanted, "wait": wait, "lease": lease},
+                         timeout=CLIENT_TIMEOUT + wait)
+    if status != 200:
+        return None
+    try:
+        return PooledChrome(pool_url, body)
+    except Exception:
+        _call(pool_url, "/checkin", {"id": body["id"], "discard": True})
+        return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Keep warm Chrome sessions for the scrapers.")
+    ap.add_argument("--size", type=int, default=POOL_SIZE)
+    ap.add_argument("--host", default=POOL_HOST)
+    ap.add_argument("--port", type=int, default=POOL_PORT)
+    ap.add_argument("--headed", action="store_true")
+    ap.add_argument("--lean", action="store_true",
+                    help="block heavy resources (match LEAN_BROWSER in the scripts)")
+    ap.add_argument("--extra-arg", action="append", default=[], metavar="FLAG",
+                    help="extra Chrome flag (repeatable), e.g. --disable-blink-features=...")
+    ap.add_argument("--max-age", type=float, default=MAX_AGE_SECS)
+    ap.add_argument("--max-uses", type=int, default=MAX_USES)
+    ap.add_argument("--max-rss-mb", type=float, default=MAX_RSS_MB)
+    ap.add_argument("--lease", type=float, default=LEASE_SECS)
+    ap.add_argument("--warm-url", help="park idle sessions on this page (DNS/TLS already warm)")
+    args = ap.parse_args(argv)
+
+    pool = BrowserPool(args.size, headless=not args.headed, lean=args.lean,
+                       extra_args=args.extra_arg, max_age=args.max_age, max_uses=args.max_uses,
+                       max_rss_mb=args.max_rss_mb, lease=args.lease, warm_url=args.warm_url)
+    server = serve(pool.start(), args.host, args.port)
+    print(f"Browser pool on http://{args.host}:{args.port}  ({args.size} sessions, "
+          f"profile {pool.profile})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Persistent crawl frontier + checkpoints in SQLite.
+
+Records sections, subcategories, pages and products with their status,
+and commits each page's rows together with its "done" mark, so a crash
+loses at most the page in flight. Products are keyed by
+`urls.product_key`; every listing a product appeared in is kept in
+`memberships`, while its row is stored once. `CrawlState(path, resume=True)` picks up
+where the last run stopped; `resume=False` starts from a clean slate.
+"""
+import json
+import os
+import sqlite3
+
+from row_sink import as_dict
+from urls import product_key
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    name   TEXT PRIMARY KEY,
+    url    TEXT NOT NULL,
+    ord    INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending'      -- pending | discovered | done
+);
+CREATE TABLE IF NOT EXISTS subcats (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    section   TEXT NOT NULL,
+    name      TEXT NOT NULL,
+    url       TEXT NOT NULL,
+    status    TEXT NOT NULL DEFAULT 'pending',  -- pending | running | done
+    next_page INTEGER NOT NULL DEFAULT 1,
+    next_url  TEXT,                             -- where page `next_page` lives
+    UNIQUE (section, name, url)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    subcat_id INTEGER NOT NULL,
+    page      INTEGER NOT NULL,
+    url       TEXT,
+    status    TEXT NOT NULL,                    -- done | empty
+    n_rows    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (subcat_id, page)
+);
+CREATE TABLE IF NOT EXISTS products (
+    key       TEXT PRIMARY KEY,                 -- urls.product_key
+    url       TEXT NOT NULL,
+    status    TEXT NOT NULL                     -- pending | done
+);
+CREATE TABLE IF NOT EXISTS memberships (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    key       TEXT NOT NULL,
+    subcat_id INTEGER NOT NULL,
+    page      INTEGER NOT NULL,
+    data      TEXT NOT NULL                     -- membership dict as JSON
+);
+CREATE TABLE IF NOT EXISTS rows (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    subcat_id INTEGER NOT NULL,
+    page      INTEGER NOT NULL,
+    data      TEXT NOT NULL                     -- row dict as JSON
+);
+"""
+
+
+class CrawlState:
+    def __init__(self, path, resume=False):
+        if not resume and os.path.exists(path):
+            os.remove(path)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # ---------- sections ----------
+    def add_sections(self, sections):
+        """Register {name: url} in crawl order; already-known sections are kept."""
+        with self.conn:
+            for ord_, (name, url) in enumerate(sections.items()):
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO sections (name, url, ord) VALUES (?, ?, ?)",
+                    (name, url, ord_),
+                )
+
+    def section_status(self, name):
+        row = self.conn.execute("SELECT status FROM sections WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else "pending"
+
+    def set_section_status(self, name, status):
+        with self.conn:
+            self.conn.execute("UPDATE sections SET status = ? WHERE name = ?", (status, name))
+
+    # ---------- subcategories ----------
+    def add_subcats(self, section, subcats):
+        """Store the discovered subcategory list for a section (once)."""
+        with self.conn:
+            for sc in subcats:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO subcats (section, name, url, next_url) VALUES (?, ?, ?, ?)",
+                    (section, sc["Subcategory"], sc["URL"], sc["URL"]),
+                )
+            self.conn.execute("UPDATE sections SET status = 'discovered' WHERE name = ?", (section,))
+
+    def subcats(self, section):
+        """All subcategories of a section in discovery order, as dicts."""
+        cur = self.conn.execute(
+            "SELECT id, name, url, status, next_page, next_url FROM subcats "
+            "WHERE section = ? ORDER BY id", (section,)
+        )
+        keys = ["id", "Subcategory", "URL", "status", "next_page", "next_url"]
+        return [dict(zip(keys, r)) for r in cur]
+
+    def finish_subcat(self, subcat_id):
+        with self.conn:
+            self.conn.execute("UPDATE subcats SET status = 'done' WHERE id = ?", (subcat_id,))
+
+    # ---------- products / rows ----------
+    def add_products(self, urls):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO products (key, url, status) VALUES (?, ?, 'pending')",
+                [(product_key(u), u) for u in urls if u],
+            )
+
+    def done_product_keys(self):
+        """Keys of products whose row is already committed (the run-wide seen set)."""
+        return {k for (k,) in self.conn.execute("SELECT key FROM products WHERE status = 'done'")}
+
+    def commit_page(self, subcat_id, page, url, rows, next_url=None, memberships=()):
+        """
+        Store a finished page's rows and memberships, mark it (and its
+        products) done and move the subcategory checkpoint to `next_url` --
+        or close the subcategory when there is no next page -- all in one
+        transaction.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO rows (subcat_id, page, data) VALUES (?, ?, ?)",
+                [(subcat_id, page, json.dumps(as_dict(r), ensure_ascii=False)) for r in rows],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO products (key, url, status) VALUES (?, ?, 'done')",
+                [(product_key(r["Product URL"]), r["Product URL"])
+                 for r in rows if r.get("Product URL")],
+            )
+            self.conn.executemany(
+                "INSERT INTO memberships (key, subcat_id, page, data) VALUES (?, ?, ?, ?)",
+                [(m["Product Key"], subcat_id, page, json.dumps(m, ensure_ascii=False))
+                 for m in memberships],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (subcat_id, page, url, status, n_rows) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (subcat_id, page, url, "done" if rows else "empty", len(rows)),
+            )
+            if next_url:
+                self.conn.execute(
+                    "UPDATE subcats SET status = 'running', next_page = ?, next_url = ? "
+                    "WHERE id = ?", (page + 1, next_url, subcat_id),
+                )
+            else:
+                self.conn.execute("UPDATE subcats SET status = 'done' WHERE id = ?", (subcat_id,))
+
+    def iter_rows(self):
+        """Every committed row, in the order it was produced."""
+        for (data,) in self.conn.execute("SELECT data FROM rows ORDER BY id"):
+            yield json.loads(data)
+
+    def iter_memberships(self):
+        for (data,) in self.conn.execute("SELECT data FROM memberships ORDER BY id"):
+            yield json.loads(data)
+
+    def row_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
@@ -0,0 +1,214 @@
+"""
+Parallel deep scraping across several headless Chrome instances.
+
+`scrape_listing_cards` feeds product URLs into a bounded queue; each worker
+thread owns one browser, loads the product page and parses it with
+`listing_parser.parse_product_detail`. `map()` hands results back in the
+same order the URLs went in, so output stays deterministic. Each worker
+paces its page loads per host (rate_control.Pacer) and backs off when it
+starts seeing block pages or timeouts. A product that times out or whose
+browser dies comes back as None -- a failure the caller must retry, not an
+empty detail to commit.
+"""
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import TimeoutException
+
+from browser import make_driver
+from listing_parser import empty_detail, parse_product_detail
+from metrics import timer, incr
+from rate_control import CONTROLLER, Pacer, classify
+
+
+def fetch_detail(drv, url, pacer=None, on_load=None):
+    """Load one product page in `drv` and parse its detail fields; `on_load()` fires once paced."""
+    if pacer is not None:
+        pacer.wait()
+    if on_load is not None:
+        on_load()
+    timed_out = False
+    try:
+        with timer("pool_page_load"):
+            drv.get(url)
+    except TimeoutException:
+        # page load timed out: stop it and parse whatever has rendered
+        timed_out = True
+        try:
+            drv.execute_script("window.stop();")
+        except Exception:
+            pass
+    html = drv.page_source
+    if pacer is not None:
+        pacer.record(classify(html=html, timed_out=timed_out))
+    with timer("parse_detail"):
+        return parse_product_detail(html, base_url=drv.current_url)
+
+
+class DeepScrapePool:
+    """
+    N browser workers pulling product URLs from one bounded queue.
+
+        with DeepScrapePool(4) as pool:
+            details = pool.map(urls)
+    """
+
+    def __init__(self, n_workers=4, page_timeout=10, headless=True, lean=False,
+                 driver_factory=None, queue_size=None):
+        self.n_workers = max(1, int(n_workers))
+        self.page_timeout = page_timeout
+        # a page load that hasn't produced a result after this long is treated as failed
+        # (the clock starts when the load does: queueing and host cooldowns don't count)
+        self.result_timeout = page_timeout * 3
+        self.driver_factory = driver_factory or (lambda: make_driver(headless, lean=lean))
+        # bounded: at most a couple of jobs waiting per worker
+        self._jobs = queue.Queue(maxsize=queue_size or self.n_workers * 2)
+        self._lock = threading.Lock()
+        self._threads = []      # live workers (a stuck one leaves once it's replaced)
+        self._spawned = 0
+        self.abandoned = 0      # jobs given up on while their worker was still busy
+
+    # ---------- lifecycle ----------
+    def start(self):
+        """Launch every worker's browser now, so no result timeout ever covers a Chrome start."""
+        if self._threads:
+            return self
+        launched = [self._spawn() for _ in range(self.n_workers)]
+        for ready in launched:
+            ready.wait()
+        return self
+
+    def _spawn(self):
+        ready = threading.Event()
+        with self._lock:
+            name = f"deep-{self._spawned}"
+            self._spawned += 1
+            t = threading.Thread(target=self._worker, args=(ready,), name=name, daemon=True)
+            self._threads.append(t)
+        t.start()
+        return ready
+
+    def _launch(self):
+        drv = self.driver_factory()
+        drv.set_page_load_timeout(self.page_timeout)
+        return drv
+
+    def close(self):
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(None)
+        for t in threads:
+            t.join(timeout=self.result_timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- jobs ----------
+    def submit(self, url):
+        """Queue one product URL; returns a Future resolving to its detail dict (None = failed)."""
+        fut = Future()
+        fut.loading = threading.Event()     # set once a worker starts loading the page
+        if not url:
+            fut.loading.set()
+            fut.set_result(empty_detail())
+            return fut
+        self.start()
+        self._jobs.put((fut, url))
+        return fut
+
+    def result(self, fut):
+        """A job's detail dict, or None if its page load failed or didn't finish in time."""
+        while not fut.loading.wait(1.0):
+            if fut.done() or not any(t.is_alive() for t in self._threads):
+                break
+        try:
+            return fut.result(timeout=self.result_timeout)
+        except FutureTimeout:
+            incr("details_timed_out")
+            if fut.cancel():
+                return None
+            if fut.done():
+                return fut.result()     # finished just now
+            # the worker is stuck in this job (cancel() can't stop it): replace it so
+            # the pool keeps its size; it quits its browser and exits if it ever returns
+            fut.abandoned = True
+            with self._lock:
+                self.abandoned += 1
+            incr("deep_jobs_abandoned")
+            self._spawn()
+            return None
+
+    def map(self, urls):
+        """
+        Deep-scrape `urls` concurrently; results line up with the input.
+        Submission runs in a feeder thread so the bounded queue never
+        blocks collection of finished results.
+        """
+        futures = [None] * len(urls)
+        ready = [threading.Event() for _ in urls]
+
+        def feed():
+            for i, url in enumerate(urls):
+                futures[i] = self.submit(url)
+                ready[i].set()
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        out = []
+        for i in range(len(urls)):
+            ready[i].wait()
+            out.append(self.result(futures[i]))
+        feeder.join()
+        return out
+
+    def _worker(self, ready):
+        drv = None
+        try:
+            drv = self._launch()
+        except Exception as e:
+            print(f"     ⚠ deep-scrape browser failed to start ({e!r}); retrying on first job")
+        finally:
+            ready.set()
+        pacers = {}     # host -> this worker's Pacer
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            fut, url = job
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                if drv is None:
+                    drv = self._launch()
+                host = urlsplit(url).hostname or ""
+                pacer = pacers.get(host)
+                if pacer is None:
+                    pacer = pacers[host] = Pacer(CONTROLLER, host, threading.current_thread().name)
+                fut.set_result(fetch_detail(drv, url, pacer, on_load=fut.loading.set))
+            except Exception:
+                # browser died or hung: drop it, next job gets a fresh one
+                if drv is not None:
+                    try:
+                        drv.quit()
+                    except Exception:
+                        pass
+                drv = None
+                fut.loading.set()
+                fut.set_result(None)
+            if getattr(fut, "abandoned", False):
+                # a replacement took over this worker's slot
+                with self._lock:
+                    if threading.current_thread() in self._threads:
+                        self._threads.remove(threading.current_thread())
+                break
+        if drv is not None:
+            try:
+                drv.quit()
+            except Exception:
+                pass
@@ -0,0 +1,178 @@
+"""
+On-disk cache of deep-scraped product details.
+
+Keyed by `urls.product_key`, each entry stores the extracted
+detail dict, when it was fetched, and optionally a hash of the listing
+card it came from. An entry is a miss when it is older than `ttl`, or when
+the caller's listing hash differs from the stored one. Least recently used
+entries are evicted once the cache grows past `max_entries` / `max_bytes`.
+
+With `ttl=None` and DELTA_FINGERPRINT_FIELDS it doubles as the snapshot
+store for incremental recrawls: a product is re-scraped only when it is
+new or its listing card changed since the last run.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+
+from urls import product_key
+
+
+# seconds a connection waits on another's write lock (sharded crawls share one cache file)
+BUSY_TIMEOUT = 60
+# between evictions, size is tracked from our own inserts; a full recount runs when that
+# crosses a cap, or every EVICT_EVERY puts to catch what other processes added
+EVICT_EVERY = 50
+
+# listing-card fields whose change should force a fresh deep scrape
+FINGERPRINT_FIELDS = ("Price", "Original Price", "Discount")
+# delta recrawls also watch the listing rating and review count
+DELTA_FINGERPRINT_FIELDS = FINGERPRINT_FIELDS + ("Rating (listing)", "Reviews Count (listing)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS details (
+    key          TEXT PRIMARY KEY,
+    fetched_at   REAL NOT NULL,
+    last_used    REAL NOT NULL,
+    content_hash TEXT,
+    size         INTEGER NOT NULL,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS details_last_used ON details (last_used);
+"""
+
+
+def content_hash(card, fields=FINGERPRINT_FIELDS):
+    """Short stable hash of a listing card's fields."""
+    raw = "\x1f".join(str(card.get(f, "")) for f in fields)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+def worth_caching(detail):
+    """A failed scrape comes back None or all-empty (bar the Availability default); don't keep it."""
+    return bool(detail) and any(v for k, v in detail.items() if k != "Availability")
+
+
+class DetailCache:
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=200_000, max_bytes=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # why the misses missed
+        self.new = 0
+        self.expired = 0
+        self.changed = 0
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self._count = self._bytes = None    # as of the last eviction, plus our inserts since
+        self._puts = 0
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, url, content_hash=None):
+        """Cached detail dict for `url`, or None on a miss (absent, expired or changed)."""
+        return self.get_many([url], [content_hash])[0]
+
+    def get_many(self, urls, hashes=None):
+        """get() for a batch: one lookup query, and one transaction marking the hits used."""
+        hashes = hashes or [None] * len(urls)
+        keys = [product_key(u) if u else None for u in urls]
+        wanted = sorted({k for k in keys if k})
+        rows = {}
+        for i in range(0, len(wanted), 500):        # stay under SQLite's variable limit
+            chunk = wanted[i:i + 500]
+            rows.update((r[0], r[1:]) for r in self.conn.execute(
+                "SELECT key, fetched_at, content_hash, data FROM details "
+                f"WHERE key IN ({', '.join('?' * len(chunk))})", chunk))
+        now = time.time()
+        out, used = [], set()
+        for key, h in zip(keys, hashes):
+            if key is None:
+                out.append(None)
+                continue
+            row = rows.get(key)
+            if row is None:
+                self.new += 1
+            elif self.ttl is not None and now - row[0] > self.ttl:
+                self.expired += 1
+            elif h is not None and row[1] is not None and row[1] != h:
+                self.changed += 1
+            else:
+                self.hits += 1
+                used.add(key)
+                out.append(json.loads(row[2]))
+                continue
+            self.misses += 1
+            out.append(None)
+        if used:
+            with self.conn:
+                self.conn.executemany("UPDATE details SET last_used = ? WHERE key = ?",
+                                      [(now, k) for k in used])
+        return out
+
+    def put_many(self, urls, details, hashes=None):
+        """Store fetched details (skipping empty ones), evicting when over budget."""
+        hashes = hashes or [None] * len(urls)
+        now = time.time()
+        rows = []
+        for url, detail, h in zip(urls, details, hashes):
+            if not url or not worth_caching(detail):
+                continue
+            data = json.dumps(detail, ensure_ascii=False)
+            rows.append((product_key(url), now, now, h, len(data), data))
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO details (key, fetched_at, last_used, content_hash, size, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows,
+            )
+        self._puts += 1
+        if self._count is not None:
+            # an upper bound: a replaced entry is counted again
+            self._count += len(rows)
+            self._bytes += sum(r[4] for r in rows)
+        if self.max_entries is None and self.max_bytes is None:
+            return
+        if self._count is None or self._puts >= EVICT_EVERY or self._over_budget():
+            self.evict()
+
+    def _over_budget(self):
+        return ((self.max_entries is not None and self._count > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes))
+
+    def evict(self):
+        """Drop least recently used entries until within max_entries / max_bytes."""
+        self._puts = 0
+        count, total = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM details"
+        ).fetchone()
+        excess = 0
+        if self.max_entries is not None and count > self.max_entries:
+            excess = count - self.max_entries
+        with self.conn:
+            if excess:
+                self.conn.execute(
+                    "DELETE FROM details WHERE key IN "
+                    "(SELECT key FROM details ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                count = self.max_entries
+                total = self.conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM details").fetchone()[0]
+            if self.max_bytes is not None and total > self.max_bytes:
+                # walk from the oldest, deleting until the budget fits
+                drop, freed = [], 0
+                for key, size in self.conn.execute(
+                        "SELECT key, size FROM details ORDER BY last_used"):
+                    if total - freed <= self.max_bytes:
+                        break
+                    drop.append((key,))
+                    freed += size
+                self.conn.executemany("DELETE FROM details WHERE key = ?", drop)
+                count, total = count - len(drop), total - freed
+        self._count, self._bytes = count, total
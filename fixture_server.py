@@ -0,0 +1,243 @@
+"""
+Local Snapdeal look-alike for offline benchmarks.
+
+Serves the templates in fixtures/ (trimmed recordings of real listing,
+pagination and product pages) with deterministic, generated products:
+
+    /search?keyword=K                 section page with left-panel subcategory links
+    /search?keyword=K&sub=S&page=N    subcategory listing page N (rel=next to N+1)
+    /product/<slug>/<id>              product detail page
+    /img/<id>.jpg                     tiny placeholder image
+
+Listing links use the `snapdeal.localhost` host, so the scraper's
+"snapdeal in netloc" filter accepts them and Chrome resolves them to
+loopback; product links use 127.0.0.1 so plain HTTP clients resolve them
+too. Subcategories overlap in products, as they do on the live site.
+
+    server = FixtureServer(sections=2, subcats=3, pages=3).start()
+    ... server.section_urls(), server.stats() ...
+    server.stop()
+"""
+import hashlib
+import multiprocessing
+import os
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from urllib.parse import urlsplit, parse_qs, quote
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+KEYWORDS = ["accessories", "footwear", "kids fashion", "men clothing", "women clothing"]
+SUBCAT_NAMES = ["Casual Shoes", "Sports Shoes", "Sandals", "Handbags", "Watches",
+                "Kurtis", "Tshirts", "Jeans", "Sarees", "Wallets"]
+BRANDS = ["Puma", "Bata", "Fastrack", "Campus", "Sparx", "Lavie", "Titan", "Levis"]
+AUDIENCE = ["Women", "Men", "Boys", "Girls", "Unisex"]
+# 1x1 transparent GIF
+PIXEL = (b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00"
+         b"\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;")
+
+
+def load_templates(fixtures_dir=FIXTURES_DIR):
+    out = {}
+    for name in ("listing", "card", "product"):
+        with open(os.path.join(fixtures_dir, f"{name}.html"), encoding="utf-8") as f:
+            out[name] = Template(f.read())
+    return out
+
+def product_id(keyword, index):
+    digest = hashlib.md5(f"{keyword}:{index}".encode()).hexdigest()
+    return str(600000000000 + int(digest[:8], 16) % 100000000000)
+
+def product_fields(keyword, index):
+    """Deterministic fake product for catalog slot `index` of a section."""
+    rnd = random.Random(f"{keyword}:{index}")
+    pid = product_id(keyword, index)
+    brand = rnd.choice(BRANDS)
+    name = f"{brand} {rnd.choice(AUDIENCE)} {keyword.title()} Item {index}"
+    mrp = rnd.randrange(400, 4000, 50)
+    discount = rnd.randrange(5, 80)
+    rating = round(rnd.uniform(2.5, 5.0), 1)
+    return {
+        "pid": pid,
+        "name": name,
+        "slug": name.lower().replace(" ", "-"),
+        "brand": brand,
+        "mrp": mrp,
+        "discount": discount,
+        "price": int(mrp * (100 - discount) / 100),
+        "rating": rating,
+        "rating_pct": round(rating * 20),
+        "reviews": rnd.randrange(0, 5000),
+        "seller": f"{rnd.choice(['Shree', 'Om', 'Royal', 'Star'])} Retail {rnd.randrange(1, 99)}",
+        "description": "\n".join(
+            f"        <p>{name}: feature {k} - {rnd.choice(['cotton', 'leather', 'rubber', 'alloy'])}</p>"
+            for k in range(rnd.randrange(3, 12))
+        ),
+    }
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # filled in per server by _serve()
+    cfg = None
+    templates = None
+    counters = None
+    catalog = None      # product id -> (keyword, catalog slot)
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, ctype="text/html; charset=utf-8", status=200):
+        if self.cfg["delay"]:
+            time.sleep(self.cfg["delay"])
+        data = body if isinstance(body, bytes) else body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _count(self, key):
+        with self.counters[key].get_lock():
+            self.counters[key].value += 1
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        qs = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        if parts.path == "/search":
+            self._count("listing")
+            return self._send(self.listing_page(qs))
+        if parts.path.startswith("/product/"):
+            self._count("product")
+            return self._send(self.product_page(parts.path))
+        if parts.path.startswith("/img/"):
+            self._count("image")
+            return self._send(PIXEL, ctype="image/gif")
+        return self._send("not found", status=404)
+
+    # ---------- pages ----------
+    def listing_page(self, qs):
+        cfg = self.cfg
+        keyword = qs.get("keyword", KEYWORDS[0])
+        sub = qs.get("sub")
+        page = int(qs.get("page", 1))
+        host = cfg["listing_host"]
+        base = f"http://{host}/search?keyword={quote(keyword)}"
+
+        left = "\n".join(
+            f'        <a class="sub-cat-name" href="{base}&amp;sub={s}">{SUBCAT_NAMES[s % len(SUBCAT_NAMES)]}</a>'
+            for s in range(cfg["subcats"])
+        )
+        # subcategory s, page p starts at this catalog slot; the stride is less
+        # than a full subcategory so neighbouring subcategories share products
+        s = int(sub) if sub is not None else 0
+        start = s * cfg["overlap_stride"] + (page - 1) * cfg["cards"]
+        cards = "\n".join(
+            self.templates["card"].substitute(self.card_fields(keyword, start + pos, pos))
+            for pos in range(cfg["cards"])
+        )
+        next_link = ""
+        if sub is not None and page < cfg["pages"]:
+            next_link = (f'        <a rel="next" class="pagination-number next" '
+                         f'href="{base}&amp;sub={sub}&amp;page={page + 1}">Next</a>')
+        self_url = f"{base}&amp;sub={sub}" if sub is not None else base
+        return self.templates["listing"].substitute(
+            title=keyword, left_links=left, cards=cards, next_link=next_link, self_url=self_url,
+        )
+
+    def card_fields(self, keyword, index, pos):
+        p = product_fields(keyword, index % self.cfg["catalog"])
+        host = self.cfg["product_host"]
+        return dict(
+            p, pos=pos,
+            product_url=f"http://{host}/product/{p['slug']}/{p['pid']}",
+            image_url=f"http://{host}/img/{p['pid']}.jpg",
+        )
+
+    def product_page(self, path):
+        pid = path.rstrip("/").rsplit("/", 1)[-1]
+        if pid not in self.catalog:
+            return "<html><body>Product not found</body></html>"
+        keyword, index = self.catalog[pid]
+        p = product_fields(keyword, index)
+        host = self.cfg["product_host"]
+        return self.templates["product"].substitute(
+            p, section=keyword.title(), subcat=p["brand"],
+            image_url=f"http://{host}/img/{pid}.jpg",
+            image_url_2=f"http://{host}/img/{pid}-2.jpg",
+        )
+
+
+def _serve(cfg, counters, port_box, ready, fixtures_dir):
+    catalog = {product_id(kw, i): (kw, i) for kw in cfg["keywords"] for i in range(cfg["catalog"])}
+    handler = type("Handler", (FixtureHandler,), {
+        "cfg": cfg, "templates": load_templates(fixtures_dir),
+        "counters": counters, "catalog": catalog,
+    })
+    srv = ThreadingHTTPServer(("127.0.0.1", port_box.value), handler)
+    srv.daemon_threads = True
+    port_box.value = srv.server_address[1]
+    cfg["listing_host"] = f"snapdeal.localhost:{port_box.value}"
+    cfg["product_host"] = f"127.0.0.1:{port_box.value}"
+    ready.set()
+    srv.serve_forever()
+
+
+class FixtureServer:
+    """Runs the fixture site in a child process so it doesn't share our GIL."""
+
+    def __init__(self, sections=2, subcats=3, pages=3, cards=20, delay_ms=0,
+                 port=0, fixtures_dir=FIXTURES_DIR):
+        self.cfg = {
+            "keywords": KEYWORDS[:sections],
+            "subcats": subcats,
+            "pages": pages,
+            "cards": cards,
+            "catalog": subcats * pages * cards,
+            "overlap_stride": max(1, pages * cards // 2),
+            "delay": delay_ms / 1000.0,
+        }
+        self.fixtures_dir = fixtures_dir
+        self.counters = {k: multiprocessing.Value("i", 0) for k in ("listing", "product", "image")}
+        self._port = multiprocessing.Value("i", port)
+        self._ready = multiprocessing.Event()
+        self._proc = None
+
+    @property
+    def port(self):
+        return self._port.value
+
+    def start(self, timeout=10):
+        self._proc = multiprocessing.Process(
+            target=_serve, daemon=True,
+            args=(self.cfg, self.counters, self._port, self._ready, self.fixtures_dir),
+        )
+        self._proc.start()
+        if not self._ready.wait(timeout):
+            self.stop()
+            raise RuntimeError("fixture server failed to start")
+        return self
+
+    def stop(self):
+        if self._proc is not None:
+            self._proc.terminate()
+            self._proc.join()
+            self._proc = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def section_urls(self):
+        """{section name: listing URL} shaped like snapdeal.BASE_SECTIONS."""
+        return {
+            kw.title(): f"http://snapdeal.localhost:{self.port}/search?keyword={quote(kw)}"
+            for kw in self.cfg["keywords"]
+        }
+
+    def stats(self):
+        return {k: v.value for k, v in self.counters.items()}
@@ -1,21 +1,21 @@
-import time
 import re
 from datetime import datetime
 import pandas as pd
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
+from browser import make_driver
+from listing_parser import parse_listing_cards
+from readiness import wait_until_settled
+from rate_control import CONTROLLER, Pacer, classify, BLOCKED
 
 
 # ================= CONFIG =================
 OUTPUT_CSV = "snapdeal_products.csv"
 HEADLESS = False
+LEAN_BROWSER = False    # skip images/media/fonts and third-party hosts (opt-in: bench_lean.py)
 WAIT_TIME = 25
 MAX_PRODUCTS = 10
 
@@ -29,26 +29,13 @@ BASE_SECTIONS = {
 
 
 # ---------- CHROME SETUP ----------
-options = Options()
-if HEADLESS:
-    options.add_argument("--headless=new")
-
-options.add_argument("--window-size=1920,1080")
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--disable-blink-features=AutomationControlled")
-
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=options)
+driver = make_driver(HEADLESS, lean=LEAN_BROWSER,
+                     extra_args=["--disable-blink-features=AutomationControlled"])
 wait = WebDriverWait(driver, WAIT_TIME)
+pacer = Pacer(CONTROLLER, "www.snapdeal.com")
 
 
 # ---------- HELPERS ----------
-def sleep(sec=2):
-    time.sleep(sec)
-
-
 def rating_from_style(style):
     try:
         m = re.search(r"(\d+)\s*%", style)
@@ -81,56 +68,26 @@ def scrape_products(section):
 
     card_selector = wait_for_cards()
     if not card_selector:
-        print("⚠ No products found / blocked")
+        outcome = classify(html=driver.page_source, cards=0)
+        pacer.record(outcome)
+        print("⚠ Blocked (captcha / access denied), backing off" if outcome == BLOCKED
+              else "⚠ No products found")
         return data
 
-    cards = driver.find_elements(By.CSS_SELECTOR, card_selector)
-
-    for card in cards[:MAX_PRODUCTS]:
-        try:
-            name = card.find_element(By.CSS_SELECTOR, "p.product-title").text.strip()
-        except:
-            name = ""
-
-        try:
-            price = card.find_element(By.CSS_SELECTOR, "span.product-price").text.strip()
-        except:
-            price = ""
-
-        # rating
-        rating = ""
-        try:
-            style = card.find_element(By.CSS_SELECTOR, ".filled-stars").get_attribute("style")
-            rating = rating_from_style(style)
-        except:
-            rating = ""
-
-        # image (lazy load safe)
-        img = ""
-        try:
-            img_el = card.find_element(By.TAG_NAME, "img")
-            img = img_el.get_attribute("src") or img_el.get_attribute("data-src") or ""
-        except:
-            img = ""
-
-        # product URL
-        url = ""
-        try:
-            url = card.find_element(By.CSS_SELECTOR, "a.dp-widget-link").get_attribute("href")
-        except:
-            try:
-                url = card.find_element(By.TAG_NAME, "a").get_attribute("href")
-            except:
-                url = ""
+    # single page_source parse instead of per-card WebDriver calls
+    cards = parse_listing_cards(driver.page_source, base_url=driver.current_url,
+                                max_take=MAX_PRODUCTS)
+    pacer.record(classify(cards=len(cards)))
 
+    for card in cards:
         data.append({
             "Scraped At": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "Section": section,
-            "Product Name": name,
-            "Price": price,
-            "Rating": rating,
-            "Image URL": img,
-            "Product URL": url
+            "Product Name": card["Product Name"],
+            "Price": card["Price"],
+            "Rating": rating_from_style(card["Rating Style"]),
+            "Image URL": card["Image URL (listing)"],
+            "Product URL": card["Product URL"]
         })
 
     return data
@@ -141,8 +98,11 @@ all_data = []
 
 for section, url in BASE_SECTIONS.items():
     print(f"\n🔍 Scraping: {section}")
+    pacer.wait()    # spacing adapts to how the site responds; longer after a block
     driver.get(url)
-    sleep(4)
+    # returns once the page has gone quiet, instead of a flat 4s;
+    # wait_for_cards() below still waits for the cards themselves
+    wait_until_settled(driver, timeout=WAIT_TIME, min_cards=0)
 
     products = scrape_products(section)
     print(f"✅ Collected: {len(products)} products")
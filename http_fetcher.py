@@ -0,0 +1,160 @@
+"""
+HTTP-first product detail fetching.
+
+Product pages are server-rendered enough that brand, rating, reviews,
+seller, description and breadcrumb can be read without a browser. This
+fetcher keeps one pooled aiohttp session (keep-alive) on a background
+event loop and parses pages with the same selectors as the Selenium path.
+Requests in flight per host start at `concurrency` and adapt up to
+`max_concurrency` (rate_control.py): healthy responses open it up, blocks
+and timeouts close it down. A page that fails, looks like a block page or
+lacks REQUIRED_FIELDS comes back as None so the caller can retry it in a
+browser.
+
+    fetcher = HttpDetailFetcher(concurrency=16, max_concurrency=64)
+    details = fetcher.fetch(urls)    # dict, or None where a browser is needed
+    pages = fetcher.fetch_pages(listing_urls)   # (final_url, html) or None
+    fetcher.close()
+"""
+import asyncio
+import socket
+import threading
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp.resolver import ThreadedResolver
+
+from listing_parser import empty_detail, parse_product_detail
+from metrics import timer, incr
+from rate_control import (CONTROLLER, AsyncHostLimiter, classify, OK, EMPTY, TIMEOUT,
+                          BLOCKED, BLOCK_STATUSES)
+
+
+# fields that must come back non-empty for a static parse to be trusted
+REQUIRED_FIELDS = ("Brand", "Full Description", "Breadcrumb")
+
+HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+}
+
+
+def has_required_fields(detail, required=REQUIRED_FIELDS):
+    return all(detail.get(f) for f in required)
+
+
+class LoopbackResolver(ThreadedResolver):
+    """Resolve *.localhost to loopback the way Chrome does (RFC 6761), so local fixtures work."""
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        if host == "localhost" or host.endswith(".localhost"):
+            host = "127.0.0.1"
+        return await super().resolve(host, port, family)
+
+
+class HttpDetailFetcher:
+    def __init__(self, concurrency=16, timeout=10, required=REQUIRED_FIELDS, headers=None,
+                 max_concurrency=None, controller=CONTROLLER):
+        self.concurrency = max(1, int(concurrency))
+        self.max_concurrency = max(self.concurrency, int(max_concurrency or self.concurrency))
+        self.limiter = AsyncHostLimiter(controller, self.concurrency, self.max_concurrency)
+        self.timeout = timeout
+        self.required = tuple(required)
+        self.headers = headers or HEADERS
+        self.fallbacks = 0      # pages handed back to the browser path
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="http-fetcher", daemon=True)
+        self._thread.start()
+        self._session = None
+
+    # ---------- lifecycle ----------
+    async def _open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             limit_per_host=self.max_concurrency,
+                                             keepalive_timeout=30,
+                                             resolver=LoopbackResolver())
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+    async def _close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- fetching ----------
+    async def _get(self, url):
+        """(final_url, body bytes) for a 200 response that isn't a block page, else None."""
+        host = urlsplit(url).hostname or ""
+        await self.limiter.acquire(host)
+        outcome, got = TIMEOUT, None
+        try:
+            with timer("http_get"):
+                async with self._session.get(url) as resp:
+                    if resp.status == 200:
+                        body = await resp.read()
+                        outcome = classify(html=body)
+                        if outcome == OK:
+                            got = str(resp.url), body
+                    else:
+                        outcome = BLOCKED if resp.status in BLOCK_STATUSES else EMPTY
+        except asyncio.TimeoutError:
+            pass
+        except aiohttp.ClientError:
+            outcome = EMPTY
+        finally:
+            await self.limiter.release(host, outcome)
+        return got
+
+    async def _fetch_one(self, url):
+        if not url:
+            return empty_detail()
+        got = await self._get(url)
+        if got is None:
+            return None
+        final_url, body = got
+        with timer("parse_detail"):
+            detail = parse_product_detail(body, base_url=final_url)
+        return detail if has_required_fields(detail, self.required) else None
+
+    async def fetch_async(self, urls):
+        await self._open()
+        return await asyncio.gather(*(self._fetch_one(u) for u in urls))
+
+    async def _fetch_pages(self, urls):
+        await self._open()
+        return await asyncio.gather(*(self._get(u) for u in urls))
+
+    def fetch_pages(self, urls):
+        """Raw (final_url, body) for each URL concurrently, None where the request failed."""
+        fut = asyncio.run_coroutine_threadsafe(self._fetch_pages(list(urls)), self._loop)
+        return fut.result()
+
+    def fetch(self, urls):
+        """
+        Fetch and parse `urls` concurrently; results line up with the input.
+        None marks a page the caller should scrape with a browser instead.
+        """
+        fut = asyncio.run_coroutine_threadsafe(self.fetch_async(list(urls)), self._loop)
+        out = fut.result()
+        missed = sum(1 for d in out if d is None)
+        self.fallbacks += missed
+        incr("http_fallbacks", missed)
+        return out
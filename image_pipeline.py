@@ -0,0 +1,293 @@
+"""
+Product image download, stored content-addressed, with thumbnails.
+
+Consumes scraper rows as they stream out (same write / write_many / close
+interface as the row sinks). Every listing and detail image URL is fetched
+once per store -- URLs are deduplicated across products and across runs --
+over one pooled aiohttp session with bounded concurrency. Files are named
+by the SHA-256 of their bytes, so the same picture behind different URLs is
+kept once, and each new file gets a JPEG thumbnail built in a process pool:
+
+    images/objects/3f/3fa4...9c.jpg       original bytes
+    images/thumbs/3f/3fa4...9c.jpg        max THUMB_SIZE, RGB JPEG
+    images/manifest.jsonl                 {"url", "sha256", "ext", "bytes"} per URL
+
+    with ImagePipeline("images") as images:
+        images.write_many(rows)
+
+    python snapdeal.py --images images/
+    python image_pipeline.py snapdeal_products.csv --out images/
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from http_fetcher import HEADERS, LoopbackResolver
+from metrics import timer, incr
+
+
+# ================= CONFIG =================
+IMAGE_CONCURRENCY = 16
+THUMB_SIZE = (256, 256)
+THUMB_PROCS = 2
+MAX_PENDING = 1000          # write() blocks while this many URLs are in flight
+DETAIL_IMAGES_LIMIT = 2000  # snapdeal.py truncates "Image URLs (detail)" to this length
+# ==========================================
+
+IMAGE_COLUMNS = ["Image URL (listing)", "Image URLs (detail)"]
+EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp",
+              "image/gif": ".gif", "image/avif": ".avif"}
+
+
+def image_urls(row):
+    """Listing + detail image URLs of a row, in order, without duplicates."""
+    urls = [row.get("Image URL (listing)") or ""]
+    detail = row.get("Image URLs (detail)") or ""
+    parts = detail.split(", ")
+    if len(detail) >= DETAIL_IMAGES_LIMIT:
+        parts = parts[:-1]      # the last one was cut mid-URL
+    urls.extend(parts)
+    return [u for u in dict.fromkeys(u.strip() for u in urls)
+            if u.startswith(("http://", "https://"))]
+
+def guess_ext(content_type, url):
+    ext = EXTENSIONS.get((content_type or "").split(";")[0].strip().lower())
+    if ext:
+        return ext
+    ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    return ext if ext in EXTENSIONS.values() or ext == ".jpeg" else ".bin"
+
+def make_thumbnail(src, dst, size=THUMB_SIZE):
+    """Runs in a worker process. False if Pillow can't read the image."""
+    from PIL import Image
+    try:
+        with Image.open(src) as im:
+            im.thumbnail(size)
+            tmp = dst + ".tmp"
+            im.convert("RGB").save(tmp, "JPEG", quality=85, optimize=True)
+    except OSError:
+        return False
+    os.replace(tmp, dst)
+    return True
+
+
+class ImagePipeline:
+    def __init__(self, root, concurrency=IMAGE_CONCURRENCY, thumb_size=THUMB_SIZE,
+                 thumb_procs=THUMB_PROCS, timeout=20, max_pending=MAX_PENDING, headers=None):
+        self.root = root
+        self.concurrency = max(1, int(concurrency))
+        self.thumb_size = tuple(thumb_size) if thumb_size else None
+        self.timeout = timeout
+        self.headers = headers or HEADERS
+        self.downloaded = 0     # new files stored
+        self.duplicates = 0     # fetched, but the content was already stored
+        self.failed = 0
+        self.skipped = 0        # URL already in the manifest / this run
+
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "thumbs"), exist_ok=True)
+        self._manifest_path = os.path.join(root, "manifest.jsonl")
+        self.seen = set()       # URLs done or in flight
+        self.hashes = {}        # stored content: sha256 -> file extension
+        self._load_manifest()
+        self._manifest = open(self._manifest_path, "a", encoding="utf-8", buffering=1)
+
+        self._pending = threading.BoundedSemaphore(max(1, max_pending))
+        self._tasks = set()
+        self._thumbs = {}       # sha256 -> thumbnail build in flight
+        # spawn: this process runs an event loop thread (and maybe Chrome)
+        self._pool = (ProcessPoolExecutor(max(1, thumb_procs),
+                                          mp_context=multiprocessing.get_context("spawn"))
+                      if self.thumb_size else None)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="image-pipeline", daemon=True)
+        self._thread.start()
+        self._session = None
+        self._sem = None
+
+    def _load_manifest(self):
+        if not os.path.exists(self._manifest_path):
+            return
+        with open(self._manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue        # torn last line from a crash
+                self.seen.add(entry["url"])
+                self.hashes[entry["sha256"]] = entry["ext"]
+
+    def object_path(self, sha, ext):
+        return os.path.join(self.root, "objects", sha[:2], sha + ext)
+
+    def thumb_path(self, sha):
+        return os.path.join(self.root, "thumbs", sha[:2], sha + ".jpg")
+
+    # ---------- event loop side ----------
+    async def _open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency,
+                                             limit_per_host=self.concurrency,
+                                             keepalive_timeout=30,
+                                             resolver=LoopbackResolver())
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers={**self.headers, "Accept": "image/*,*/*;q=0.8"},
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._sem = asyncio.Semaphore(self.concurrency)
+
+    async def _download(self, url):
+        await self._open()
+        async with self._sem:
+            try:
+                with timer("image_get"):
+                    async with self._session.get(url) as resp:
+                        ctype = resp.headers.get("Content-Type", "")
+                        if resp.status != 200:
+                            return None
+                        if not ctype.strip().lower().startswith("image/"):
+                            # an error or login page served with 200
+                            incr("image_not_image")
+                            return None
+                        return ctype, await resp.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return None
+
+    async def _thumbnail(self, sha, path):
+        """
+        Build the thumbnail unless it exists; copies of one content share one
+        build. False if Pillow can't read the file.
+        """
+        thumb = self.thumb_path(sha)
+        if self._pool is None or os.path.exists(thumb):
+            return True
+        task = self._thumbs.get(sha)
+        if task is None:
+            os.makedirs(os.path.dirname(thumb), exist_ok=True)
+            task = self._thumbs[sha] = self._loop.run_in_executor(
+                self._pool, make_thumbnail, path, thumb, self.thumb_size)
+            task.add_done_callback(lambda _: self._thumbs.pop(sha, None))
+        with timer("thumbnail"):
+            return await asyncio.shield(task)
+
+    async def _process(self, url):
+        try:
+            got = await self._download(url)
+            if got is None:
+                self.failed += 1
+                incr("image_failures")
+                return
+            ctype, body = got
+            sha = hashlib.sha256(body).hexdigest()
+            ext = self.hashes.get(sha)
+            new = ext is None or not os.path.exists(self.object_path(sha, ext))
+            ext = ext or guess_ext(ctype, url)
+            path = self.object_path(sha, ext)
+            if new:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + ".tmp", "wb") as f:
+                    f.write(body)
+                os.replace(path + ".tmp", path)
+                self.hashes[sha] = ext      # copies arriving meanwhile count as duplicates
+            # also rebuilds a thumbnail an earlier run failed to make
+            if not await self._thumbnail(sha, path):
+                # not a readable image: drop it and leave the URL out of the manifest
+                if new:
+                    os.remove(path)
+                    self.hashes.pop(sha, None)
+                self.failed += 1
+                incr("image_failures")
+                return
+            if new:
+                self.downloaded += 1
+                incr("images_downloaded")
+            else:
+                self.duplicates += 1
+                incr("images_deduped")
+            self._manifest.write(json.dumps(
+                {"url": url, "sha256": sha, "ext": ext, "bytes": len(body)}) + "\n")
+        except Exception as e:
+            # disk errors, a broken thumbnail pool, Pillow errors...: no manifest
+            # entry, so the URL is fetched again next run
+            self.failed += 1
+            incr("image_failures")
+            print(f"     ⚠ image {url}: {e!r}")
+        finally:
+            self._pending.release()
+
+    def _start(self, url):
+        task = self._loop.create_task(self._process(url))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _drain(self):
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ---------- sink interface (caller's thread) ----------
+    def write(self, row):
+        for url in image_urls(row):
+            if url in self.seen:
+                self.skipped += 1
+                continue
+            self.seen.add(url)
+            self._pending.acquire()     # backpressure: wait for a free slot
+            self._loop.call_soon_threadsafe(self._start, url)
+
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def close(self):
+        """Wait for every queued image (and thumbnail), then shut down."""
+        asyncio.run_coroutine_threadsafe(self._drain(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        if self._pool is not None:
+            self._pool.shutdown()
+        self._manifest.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def summary(self):
+        return (f"{self.downloaded} stored, {self.duplicates} duplicate content, "
+                f"{self.skipped} repeat URLs skipped, {self.failed} failed")
+
+
+def main(argv=None):
+    from analytics import read_chunks
+
+    ap = argparse.ArgumentParser(description="Download product images from a products file.")
+    ap.add_argument("input")
+    ap.add_argument("--out", default="images", help="image store directory (default: images)")
+    ap.add_argument("--concurrency", type=int, default=IMAGE_CONCURRENCY)
+    ap.add_argument("--thumb-procs", type=int, default=THUMB_PROCS)
+    ap.add_argument("--no-thumbs", action="store_true")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    with ImagePipeline(args.out, concurrency=args.concurrency, thumb_procs=args.thumb_procs,
+                       thumb_size=None if args.no_thumbs else THUMB_SIZE) as images:
+        for chunk in read_chunks(args.input, columns=IMAGE_COLUMNS):
+            images.write_many(chunk.to_dict("records"))
+    print(f"{images.summary()} in {time.perf_counter() - t0:.1f}s  →  {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Single-pass HTML parsing for Snapdeal listing and product pages.
+
+Instead of one WebDriver round-trip per field per card, grab
+`driver.page_source` once and pull every field of every card with lxml.
+The same functions work on saved .html files:
+
+    with open("listing.html", encoding="utf-8") as f:
+        cards = parse_listing_cards(f.read(), base_url="https://www.snapdeal.com/")
+"""
+import re
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+
+from selector_resolver import RESOLVER
+from urls import layout_key
+
+
+# card containers, in order of preference (newer layout first)
+CARD_SELECTORS = ["div.product-tuple-listing", "div.product-tuple"]
+
+# field -> (selector list, attribute or None for text)
+LISTING_FIELDS = {
+    "Product Name":      (["p.product-title"], None),
+    "Price":             (["span.product-price"], None),
+    "Original Price":    (["span.product-desc-price.strike",
+                           "span.lfloat.product-desc-price.strike"], None),
+    "Discount":          (["div.product-discount", "span.product-discount"], None),
+    "Rating (listing)":  (["p.prod-rating", ".rating"], None),
+    "Rating Style":      ([".filled-stars"], "style"),
+    "Reviews Text":      (["p.product-rating-count", ".rating-count"], None),
+    "Image URL (listing)": (["img.product-image", "img"], "src"),
+    "Product URL":       (["a.dp-widget-link", "a"], "href"),
+    "Short Description": (["p.product-desc-rating"], None),
+}
+
+# attributes that hold URLs and must be resolved against the page URL
+URL_ATTRS = {"src", "data-src", "href"}
+
+
+# ---------- small helpers (shared with the Selenium scripts) ----------
+def clean_int(text: str) -> int:
+    """Extract first integer from text, else 0."""
+    if not text:
+        return 0
+    nums = re.findall(r"\d+", text)
+    return int(nums[0]) if nums else 0
+
+def parse_rating_from_style(style: str) -> str:
+    """
+    Some ratings are shown as stars with style='width: 86%'.
+    Convert % to 0-5 scale: rating ≈ round(percent/20, 1)
+    """
+    if not style:
+        return ""
+    m = re.search(r"(\d+(?:\.\d+)?)\s*%", style)
+    if not m:
+        return ""
+    pct = float(m.group(1))
+    return f"{round(pct/20, 1)}"
+
+
+# ---------- lxml primitives ----------
+def parse_html(page_source):
+    """Parse a page (str or bytes) into an lxml root element."""
+    return lxml_html.fromstring(page_source)
+
+def node_text(el, multiline=False):
+    """Visible-ish text of a node with whitespace collapsed like WebDriver's .text."""
+    raw = el.text_content()
+    if multiline:
+        lines = (" ".join(line.split()) for line in raw.splitlines())
+        return "\n".join(line for line in lines if line)
+    return " ".join(raw.split())
+
+def node_attr(el, attr, base_url=""):
+    val = (el.get(attr) or "").strip()
+    if val and attr in URL_ATTRS and base_url:
+        val = urljoin(base_url, val)
+    return val
+
+@lru_cache(maxsize=None)
+def compiled(sel):
+    """CSS -> XPath translation is the slow part of .cssselect(); do it once."""
+    return CSSSelector(sel)
+
+def _prober(ctx, attr, base_url, multiline):
+    def probe(sel):
+        found = compiled(sel)(ctx)
+        if not found:
+            return None
+        if attr:
+            return node_attr(found[0], attr, base_url)
+        return node_text(found[0], multiline=multiline)
+    return probe
+
+def first_match(selector_list, ctx, attr=None, base_url="", multiline=False,
+                field=None, layout=""):
+    """
+    lxml twin of snapdeal.find_first: the first selector that matches any
+    element decides the result (text, or the given attribute). With `field`
+    set the lookup goes through the selector resolver, so the selector that
+    won last time on this `layout` is tried first and the hit is recorded.
+    """
+    probe = _prober(ctx, attr, base_url, multiline)
+    if field:
+        return RESOLVER.resolve(field, selector_list, probe, layout=layout) or ""
+    for sel in selector_list:
+        val = probe(sel)
+        if val is not None:
+            return val
+    return ""
+
+def find_cards(root, layout=""):
+    found = RESOLVER.resolve("Card", CARD_SELECTORS, lambda sel: compiled(sel)(root) or None,
+                             layout=layout)
+    return found or []
+
+
+# ---------- listing cards ----------
+def parse_card(card, base_url="", layout=""):
+    """Pull all listing-level fields out of one product card element."""
+    out = {}
+    for field, (selectors, attr) in LISTING_FIELDS.items():
+        out[field] = first_match(selectors, card, attr=attr, base_url=base_url,
+                                 field=field, layout=layout)
+
+    # lazy-loaded images keep the real URL in data-src
+    if not out["Image URL (listing)"]:
+        out["Image URL (listing)"] = first_match(["img"], card, attr="data-src", base_url=base_url)
+
+    # the raw star-width style stays in the card for scripts that derive the rating from it
+    rating_style = out["Rating Style"]
+    if not out["Rating (listing)"] and rating_style:
+        out["Rating (listing)"] = parse_rating_from_style(rating_style)
+
+    out["Reviews Count (listing)"] = clean_int(out.pop("Reviews Text"))
+    return out
+
+def parse_listing_cards(page_source, base_url="", max_take=None):
+    """
+    Parse every product card on a listing page in one pass.
+    Returns a list of dicts keyed by the output column names
+    ("Product Name", "Price", ..., "Product URL", "Short Description"),
+    plus the ".filled-stars" width style as "Rating Style".
+    """
+    if not page_source:
+        return []
+    root = parse_html(page_source)
+    layout = layout_key(base_url)
+    cards = find_cards(root, layout=layout)
+    if max_take:
+        cards = cards[:max_take]
+    return [parse_card(card, base_url=base_url, layout=layout) for card in cards]
+
+def count_listing_cards(page_source):
+    """
+    Number of product cards on a listing page, fields not parsed. Bypasses
+    the selector resolver, so a look at a page that isn't scraped leaves
+    the hit metrics and remembered winners alone.
+    """
+    if not page_source:
+        return 0
+    root = parse_html(page_source)
+    for sel in CARD_SELECTORS:
+        found = compiled(sel)(root)
+        if found:
+            return len(found)
+    return 0
+
+
+# ---------- product detail pages ----------
+DETAIL_FIELDS = {
+    "Brand": "",
+    "Full Description": "",
+    "Seller": "",
+    "Availability": "",
+    "Rating": "",
+    "Reviews Count": 0,
+    "Breadcrumb": "",
+    "Image URLs (detail)": ""
+}
+
+BRAND_SELECTORS = [
+    "span[itemprop='brand']",
+    "a#brand",
+    ".pdp-e-i-brand a",
+    ".pdp-e-i-brand",  # sometimes plain text
+]
+RATING_SELECTORS = [
+    "span[itemprop='ratingValue']",
+    ".pdp-e-i-rating",        # sometimes plain text
+]
+REVIEW_COUNT_SELECTORS = [
+    "span[itemprop='reviewCount']",
+    ".pdp-review-count",
+    ".product-review-count",
+    ".rating-count"
+]
+AVAILABILITY_SELECTORS = [
+    ".sold-out-err",
+    "#isCODMsg",
+    ".availability-msg"
+]
+SELLER_SELECTORS = [
+    "#sellerName",
+    ".pdp-seller-info a",
+    ".pdp-seller-info"
+]
+DESCRIPTION_SELECTORS = [
+    "#description",
+    "#productDesc",
+    ".product-desc",
+    ".tab-content .spec-body",
+    ".spec-body",
+    ".details-info",
+]
+
+def empty_detail():
+    """Fresh detail dict with every field empty (what a failed deep scrape returns)."""
+    return dict(DETAIL_FIELDS)
+
+def parse_product_detail(page_source, base_url=""):
+    """
+    Static twin of snapdeal.deep_scrape_product: same selectors and
+    fallbacks, applied to one product page snapshot.
+    """
+    data = empty_detail()
+    if not page_source:
+        return data
+    root = parse_html(page_source)
+
+    layout = layout_key(base_url)
+
+    data["Brand"] = first_match(BRAND_SELECTORS, root, field="Brand", layout=layout)
+
+    # rating (try numeric or from star width)
+    rating_val = first_match(RATING_SELECTORS, root, field="Rating", layout=layout)
+    if not rating_val:
+        rating_val = parse_rating_from_style(
+            first_match([".filled-stars"], root, attr="style", field="Rating Style", layout=layout))
+    data["Rating"] = rating_val
+
+    data["Reviews Count"] = clean_int(
+        first_match(REVIEW_COUNT_SELECTORS, root, field="Reviews Count", layout=layout))
+    data["Availability"] = first_match(AVAILABILITY_SELECTORS, root, field="Availability",
+                                       layout=layout) or "In Stock"
+    data["Seller"] = first_match(SELLER_SELECTORS, root, field="Seller", layout=layout)
+
+    # full description / specs (pick the biggest chunk)
+    data["Full Description"] = RESOLVER.resolve_longest(
+        "Full Description", DESCRIPTION_SELECTORS,
+        _prober(root, None, base_url, multiline=True), layout=layout)
+
+    crumbs = [node_text(li) for li in root.cssselect("ul.breadcrumb li")]
+    data["Breadcrumb"] = " > ".join(c for c in crumbs if c)
+
+    # detail images
+    detail_imgs = []
+    for img in root.cssselect(".cloudzoom"):
+        src = node_attr(img, "src", base_url) or node_attr(img, "data-src", base_url)
+        if src:
+            detail_imgs.append(src)
+    if not detail_imgs:
+        for img in root.cssselect("img"):
+            s = node_attr(img, "src", base_url)
+            if s and "snapdeal" in s and ("images" in s or "img" in s):
+                detail_imgs.append(s)
+    data["Image URLs (detail)"] = ", ".join(dict.fromkeys(detail_imgs))[:2000]  # Dedup & bound
+    return data
@@ -0,0 +1,204 @@
+"""
+Lightweight timing and counter instrumentation for the crawl.
+
+One process-wide registry (`METRICS`) with module-level shortcuts:
+
+    with timer("driver_get"):
+        driver.get(url)
+    incr("rows")
+    selector_hit("Price", "span.product-price", rank=0)   # rank > 0 = fallback
+
+`start_reporter()` prints a summary every few seconds and, optionally,
+rewrites a Prometheus text file (node_exporter textfile format) and
+streams every timed span to a Chrome trace-event JSON file (open it in
+chrome://tracing or ui.perfetto.dev).
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class StageStats:
+    __slots__ = ("calls", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.stages = defaultdict(StageStats)
+        self.counters = defaultdict(int)
+        # (field, selector) -> [rank, hits]; misses keyed by field
+        self.selector_hits = {}
+        self.selector_misses = defaultdict(int)
+        self._trace = None
+        self._t0 = time.perf_counter()
+
+    # ---------- recording ----------
+    def observe(self, stage, seconds, start=None):
+        with self._lock:
+            self.stages[stage].add(seconds)
+            if self._trace is not None and start is not None:
+                event = {
+                    "name": stage, "ph": "X", "pid": 1,
+                    "tid": threading.get_ident() % 100000,
+                    "ts": round((start - self._t0) * 1e6), "dur": round(seconds * 1e6),
+                }
+                self._trace.write(json.dumps(event) + ",\n")
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, start)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def selector_hit(self, field, selector, rank):
+        with self._lock:
+            entry = self.selector_hits.get((field, selector))
+            if entry is None:
+                self.selector_hits[(field, selector)] = [rank, 1]
+            else:
+                entry[1] += 1
+
+    def selector_miss(self, field):
+        with self._lock:
+            self.selector_misses[field] += 1
+
+    # ---------- output ----------
+    def open_trace(self, path):
+        """Stream spans to `path` (JSON array format; the closing ']' is optional)."""
+        self._trace = open(path, "w", encoding="utf-8", buffering=1 << 16)
+        self._trace.write("[\n")
+
+    def close_trace(self):
+        if self._trace is not None:
+            with self._lock:
+                self._trace.close()
+                self._trace = None
+
+    def selector_hit_count(self, field, selector):
+        entry = self.selector_hits.get((field, selector))
+        return entry[1] if entry else 0
+
+    def selector_miss_count(self, field):
+        return self.selector_misses.get(field, 0)
+
+    def fallback_rate(self, field):
+        hits = [(rank, n) for (f, _), (rank, n) in self.selector_hits.items() if f == field]
+        total = sum(n for _, n in hits)
+        return sum(n for rank, n in hits if rank > 0) / total if total else 0.0
+
+    def summary(self):
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda kv: -kv[1].total)
+            counters = sorted(self.counters.items())
+            fields = sorted({f for f, _ in self.selector_hits} | set(self.selector_misses))
+        lines = [f"--- metrics @ {time.time() - self.started:,.0f}s ---"]
+        for name, st in stages:
+            lines.append(f"  {name:<22}{st.calls:>8} calls {st.total:>9.2f}s "
+                         f"avg {1000 * st.total / st.calls:>8.1f}ms  max {1000 * st.max:>8.1f}ms")
+        if counters:
+            lines.append("  " + "  ".join(f"{k}={v}" for k, v in counters))
+        for f in fields:
+            misses = self.selector_misses.get(f, 0)
+            lines.append(f"  selector {f!r}: fallback {100 * self.fallback_rate(f):.0f}%, misses {misses}")
+        return "\n".join(lines)
+
+    def prometheus(self, prefix="snapdeal"):
+        with self._lock:
+            out = [
+                f"# TYPE {prefix}_stage_seconds_total counter",
+                f"# TYPE {prefix}_stage_calls_total counter",
+                f"# TYPE {prefix}_stage_seconds_max gauge",
+            ]
+            for name, st in sorted(self.stages.items()):
+                out.append(f'{prefix}_stage_seconds_total{{stage="{name}"}} {st.total:.6f}')
+                out.append(f'{prefix}_stage_calls_total{{stage="{name}"}} {st.calls}')
+                out.append(f'{prefix}_stage_seconds_max{{stage="{name}"}} {st.max:.6f}')
+            out.append(f"# TYPE {prefix}_events_total counter")
+            for name, n in sorted(self.counters.items()):
+                out.append(f'{prefix}_events_total{{event="{name}"}} {n}')
+            out.append(f"# TYPE {prefix}_selector_hits_total counter")
+            for (field, sel), (rank, n) in sorted(self.selector_hits.items()):
+                sel = sel.replace("\\", "\\\\").replace('"', '\\"')
+                out.append(f'{prefix}_selector_hits_total{{field="{field}",selector="{sel}",'
+                           f'rank="{rank}"}} {n}')
+            out.append(f"# TYPE {prefix}_selector_misses_total counter")
+            for field, n in sorted(self.selector_misses.items()):
+                out.append(f'{prefix}_selector_misses_total{{field="{field}"}} {n}')
+        return "\n".join(out) + "\n"
+
+    def write_prometheus(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        # atomic swap so a scraper never reads half a file
+        os.replace(tmp, path)
+
+
+class Reporter(threading.Thread):
+    def __init__(self, metrics, interval, prom_path=None, printer=print):
+        super().__init__(name="metrics-reporter", daemon=True)
+        self.metrics = metrics
+        self.interval = interval
+        self.prom_path = prom_path
+        self.printer = printer
+        self._done = threading.Event()
+
+    def report(self):
+        self.printer(self.metrics.summary())
+        if self.prom_path:
+            self.metrics.write_prometheus(self.prom_path)
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.report()
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.report()
+        self.metrics.close_trace()
+
+
+METRICS = Metrics()
+
+def timer(stage):
+    return METRICS.timer(stage)
+
+def incr(name, n=1):
+    METRICS.incr(name, n)
+
+def selector_hit(field, selector, rank):
+    METRICS.selector_hit(field, selector, rank)
+
+def selector_miss(field):
+    METRICS.selector_miss(field)
+
+def start_reporter(interval=60, prom_path=None, trace_path=None):
+    """Periodic summary (+ Prometheus file / trace) for METRICS; call .stop() at the end."""
+    if trace_path:
+        METRICS.open_trace(trace_path)
+    rep = Reporter(METRICS, interval, prom_path=prom_path)
+    rep.start()
+    return rep
@@ -0,0 +1,145 @@
+"""
+Typed, vectorized normalization of scraped product rows.
+
+The scraper writes what the page shows ("Rs. 1,299", "45% Off", "4.2",
+"(1388)"). `normalize()` converts a whole DataFrame at once with pandas
+string and NumPy ops -- no per-row Python -- into analysis-ready columns:
+
+    Price / Original Price    float32 rupees
+    Discount                  float32 percent (derived from the prices when missing)
+    Rating                    float32 0-5: detail rating, else listing rating
+    Reviews Count             int32: detail count, else listing count
+    Top Section, Subcategory, Target Audience, Availability    category
+
+The raw rating/review columns are kept (typed) so the reconciled value can
+be traced back. `load_products()` reads any sink format and normalizes:
+
+    df = load_products("snapdeal_products.csv")
+    df = load_products("products/")                 # partitioned dataset
+    python normalize.py snapdeal_products.csv --output products.parquet
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from row_sink import sink_format
+
+
+MONEY_COLUMNS = ["Price", "Original Price"]
+CATEGORY_COLUMNS = ["Top Section", "Subcategory", "Target Audience", "Availability"]
+RATING_COLUMNS = ["Rating (listing)", "Rating (detail)"]
+COUNT_COLUMNS = ["Reviews Count (listing)", "Reviews Count (detail)"]
+
+# "Rs. 1,299.50" -> 1299.5 ; the first number wins
+MONEY_RE = r"(\d[\d,]*(?:\.\d+)?)"
+# "45% Off" -> 45
+PERCENT_RE = r"(\d+(?:\.\d+)?)\s*%"
+# a bare 0-5 rating at the start; "(1388)" review-count text doesn't match
+RATING_RE = r"^\s*([0-5](?:\.\d+)?)(?!\d)"
+
+
+# ---------- column parsers (Series in, Series out) ----------
+def parse_money(s):
+    num = s.astype("string").str.extract(MONEY_RE, expand=False).str.replace(",", "", regex=False)
+    return pd.to_numeric(num, errors="coerce").astype("float32")
+
+def parse_percent(s):
+    num = s.astype("string").str.extract(PERCENT_RE, expand=False)
+    return pd.to_numeric(num, errors="coerce").astype("float32")
+
+def parse_rating(s):
+    num = s.astype("string").str.extract(RATING_RE, expand=False)
+    vals = pd.to_numeric(num, errors="coerce").astype("float32")
+    return vals.where(vals > 0)     # 0 means "no rating shown"
+
+def parse_count(s):
+    if pd.api.types.is_numeric_dtype(s):
+        vals = s
+    else:
+        vals = pd.to_numeric(s.astype("string").str.replace(r"[^\d]", "", regex=True),
+                             errors="coerce")
+    return vals.fillna(0).astype("int32")
+
+
+def normalize(df, copy=True):
+    """Typed copy of a raw product DataFrame (missing columns are skipped)."""
+    if copy:
+        df = df.copy()
+    cols = set(df.columns)
+
+    for c in MONEY_COLUMNS:
+        if c in cols:
+            df[c] = parse_money(df[c])
+    if "Discount" in cols:
+        df["Discount"] = parse_percent(df["Discount"])
+        if {"Price", "Original Price"} <= cols:
+            derived = (100 * (1 - df["Price"] / df["Original Price"])).round()
+            derived = derived.where(df["Original Price"] > 0)
+            df["Discount"] = df["Discount"].fillna(derived).astype("float32")
+
+    for c in RATING_COLUMNS:
+        if c in cols:
+            df[c] = parse_rating(df[c])
+    if set(RATING_COLUMNS) <= cols:
+        df["Rating"] = df["Rating (detail)"].fillna(df["Rating (listing)"])
+
+    for c in COUNT_COLUMNS:
+        if c in cols:
+            df[c] = parse_count(df[c])
+    if set(COUNT_COLUMNS) <= cols:
+        detail, listing = df["Reviews Count (detail)"], df["Reviews Count (listing)"]
+        df["Reviews Count"] = np.where(detail > 0, detail, listing).astype("int32")
+
+    for c in CATEGORY_COLUMNS:
+        if c in cols:
+            df[c] = df[c].astype("category")
+    if "Page" in cols:
+        df["Page"] = pd.to_numeric(df["Page"], errors="coerce").fillna(0).astype("int16")
+    if "Scraped At" in cols:
+        df["Scraped At"] = pd.to_datetime(df["Scraped At"], errors="coerce")
+    return df
+
+
+def read_products(path, fmt=None, columns=None):
+    """Raw rows from a CSV / JSONL / Parquet output file or dataset directory."""
+    fmt = sink_format(path, fmt)
+    if fmt == "csv":
+        return pd.read_csv(path, encoding="utf-8-sig", dtype=str, keep_default_na=False,
+                           usecols=columns)
+    if fmt == "jsonl":
+        df = pd.read_json(path, lines=True, dtype=False)
+        return df[columns] if columns else df
+    if fmt == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    if fmt == "dataset":
+        from product_dataset import read_dataset
+        return read_dataset(path, columns=columns)
+    raise ValueError(f"Unknown input format: {fmt!r}")
+
+def load_products(path, fmt=None, columns=None):
+    return normalize(read_products(path, fmt, columns), copy=False)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Normalize a scraped products file into typed columns.")
+    ap.add_argument("input")
+    ap.add_argument("--output", help="write the typed table here (.parquet keeps the dtypes)")
+    args = ap.parse_args(argv)
+
+    raw = read_products(args.input)
+    before = raw.memory_usage(deep=True).sum()
+    df = normalize(raw)
+    after = df.memory_usage(deep=True).sum()
+    print(df.dtypes.to_string())
+    print(f"\n{len(df)} rows, memory {before / 2**20:.2f} MB -> {after / 2**20:.2f} MB")
+    if args.output:
+        if args.output.endswith(".parquet"):
+            df.to_parquet(args.output, index=False)
+        else:
+            df.to_csv(args.output, index=False, encoding="utf-8-sig")
+        print(f"→ {args.output}")
+
+
+if __name__ == "__main__":
+    main()
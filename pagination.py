@@ -0,0 +1,122 @@
+"""
+Pagination planning: listing page URLs worked out up front.
+
+Clicking "Next" serializes a subcategory page by page. Instead, read the
+next-page link off page 1, compare it with page 1's own URL and find the
+one number that changed -- a page index (`page=2`), an offset
+(`start=20`) or a numeric path segment. Every later page URL follows from
+that, so the pages can be fetched concurrently:
+
+    pattern = infer_pattern(page1_url, next_page_href(page1_html, page1_url))
+    urls = pattern.urls(2, 5) if pattern else None    # None -> click through
+
+Anything ambiguous (no next link, several numbers changed, other query
+parameters changed too) gives None and the caller keeps clicking.
+"""
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+from listing_parser import parse_html, compiled, node_attr
+
+
+# same candidates as snapdeal.click_next_page, plus the <head> hint
+NEXT_SELECTORS = [
+    "link[rel='next']",
+    "a[rel='next']",
+    "a.pagination-number.next",
+    "a.next",
+]
+
+
+def next_page_href(page_source, base_url=""):
+    """Absolute URL of the next-page link in a listing page, or ""."""
+    if not page_source:
+        return ""
+    root = parse_html(page_source) if isinstance(page_source, (str, bytes)) else page_source
+    for sel in NEXT_SELECTORS:
+        for el in compiled(sel)(root):
+            href = node_attr(el, "href")
+            if href and not href.startswith(("#", "javascript:")):
+                return urljoin(base_url, href)
+    return ""
+
+
+class PagePattern:
+    """URL of page n = page 1's URL with one number set to first + (n - 1) * step."""
+
+    def __init__(self, parts, query, where, key, first, step):
+        self.parts = parts          # urlsplit() of page 1
+        self.query = query          # page 1's query as (key, value) pairs
+        self.where = where          # "query" or "path"
+        self.key = key              # query parameter name, or path segment index
+        self.first = first          # value for page 1 (None = parameter absent on page 1)
+        self.step = step
+
+    def value(self, n):
+        base = self.first if self.first is not None else 0 if self.step > 1 else 1
+        return base + (n - 1) * self.step
+
+    def url(self, n):
+        if n == 1 and self.first is None:
+            return urlunsplit(self.parts)
+        val = str(self.value(n))
+        if self.where == "query":
+            if self.first is None:
+                pairs = self.query + [(self.key, val)]
+            else:
+                pairs = [(k, val if k == self.key else v) for k, v in self.query]
+            return urlunsplit(self.parts._replace(query=urlencode(pairs)))
+        segs = self.parts.path.split("/")
+        segs[self.key] = val
+        return urlunsplit(self.parts._replace(path="/".join(segs)))
+
+    def urls(self, start, stop):
+        """URLs for pages start..stop inclusive."""
+        return [self.url(n) for n in range(start, stop + 1)]
+
+
+def _as_int(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+def _pattern(first, second, make):
+    """Page 1 value (or None if absent) and page 2 value -> PagePattern, or None."""
+    v2 = _as_int(second)
+    if v2 is None:
+        return None
+    if first is None:
+        # absent on page 1: page=2 is an index, start=20 is an offset from 0
+        return make(None, 1 if v2 == 2 else v2)
+    v1 = _as_int(first)
+    if v1 is None or v2 <= v1:
+        return None
+    return make(v1, v2 - v1)
+
+def infer_pattern(page1_url, page2_url):
+    """PagePattern relating two consecutive listing URLs, or None if unclear."""
+    if not page1_url or not page2_url:
+        return None
+    a, b = urlsplit(page1_url), urlsplit(page2_url)
+    if (a.scheme, a.netloc) != (b.scheme, b.netloc):
+        return None
+    qa, qb = parse_qsl(a.query, keep_blank_values=True), parse_qsl(b.query, keep_blank_values=True)
+    da, db = dict(qa), dict(qb)
+    changed = [k for k in db if da.get(k) != db[k]]
+    dropped = [k for k in da if k not in db]
+
+    if a.path == b.path and len(changed) == 1 and not dropped:
+        key = changed[0]
+        return _pattern(da.get(key), db[key],
+                        lambda first, step: PagePattern(a, qa, "query", key, first, step))
+
+    if da == db:
+        sa, sb = a.path.split("/"), b.path.split("/")
+        if len(sa) != len(sb):
+            return None
+        diff = [i for i, (x, y) in enumerate(zip(sa, sb)) if x != y]
+        if len(diff) == 1:
+            i = diff[0]
+            return _pattern(sa[i], sb[i],
+                            lambda first, step: PagePattern(a, qa, "path", i, first, step))
+    return None
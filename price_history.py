@@ -0,0 +1,415 @@
+"""
+Append-only price history across crawls, in one SQLite file.
+
+Each run's output only holds that run. This store keeps every sighting of
+every product without storing it in full:
+
+    products   one row per product (dictionary: key -> small int id), with
+               its current values, first_seen / last_seen and subcategory id
+    changes    (product id, timestamp) -> values, written only when one of
+               price / MRP / discount / rating / reviews changed -- an
+               unchanged sighting just moves last_seen forward
+    daily      per subcategory and day: sums and counts of each product's
+               last values that day, kept up to date while ingesting
+
+Money is stored as integer paise and ratings as hundredths, so a row is a
+handful of varints. Series are step functions: a value holds from its
+change until the next change or the product's last sighting. Sightings
+older than a product's last_seen (out-of-order backfill, or replaying the
+same rows) are skipped, so ingesting is idempotent.
+
+    with PriceHistory("snapdeal_history.sqlite") as h:
+        h.write_many(rows)                      # also: snapdeal.py --history PATH
+    h.latest(since="2025-06-01")                # current values per product
+    h.series(product_url)                       # one product's price series
+    h.daily(subcategory="Sports Shoes")         # per-day averages
+
+    python price_history.py ingest old_run_1.csv old_run_2.csv
+    python price_history.py stats
+    python task5.py snapdeal_history.sqlite     # discount trend across every run
+"""
+import argparse
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+from normalize import MONEY_RE, PERCENT_RE, RATING_RE
+from urls import product_key
+
+
+# ================= CONFIG =================
+HISTORY_DB = "snapdeal_history.sqlite"
+BATCH_ROWS = 5_000
+# ==========================================
+
+VALUE_FIELDS = ("price", "mrp", "discount", "rating", "reviews")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subcats (
+    id          INTEGER PRIMARY KEY,
+    top_section TEXT NOT NULL,
+    subcategory TEXT NOT NULL,
+    UNIQUE (top_section, subcategory)
+);
+CREATE TABLE IF NOT EXISTS products (
+    id         INTEGER PRIMARY KEY,
+    key        TEXT NOT NULL UNIQUE,            -- urls.product_key
+    subcat_id  INTEGER NOT NULL,                -- where it was first seen
+    name       TEXT,
+    url        TEXT,
+    first_seen INTEGER NOT NULL,                -- unix seconds
+    last_seen  INTEGER NOT NULL,
+    price      INTEGER,                         -- paise
+    mrp        INTEGER,                         -- paise
+    discount   INTEGER,                         -- percent
+    rating     INTEGER,                         -- hundredths of a star
+    reviews    INTEGER
+);
+CREATE INDEX IF NOT EXISTS products_last_seen ON products (last_seen);
+CREATE INDEX IF NOT EXISTS products_subcat ON products (subcat_id);
+CREATE TABLE IF NOT EXISTS changes (
+    product_id INTEGER NOT NULL,
+    ts         INTEGER NOT NULL,
+    price      INTEGER,
+    mrp        INTEGER,
+    discount   INTEGER,
+    rating     INTEGER,
+    reviews    INTEGER,
+    PRIMARY KEY (product_id, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily (
+    subcat_id    INTEGER NOT NULL,
+    day          TEXT NOT NULL,                 -- YYYY-MM-DD
+    n            INTEGER NOT NULL,
+    price_sum    INTEGER NOT NULL, price_n    INTEGER NOT NULL,
+    discount_sum INTEGER NOT NULL, discount_n INTEGER NOT NULL,
+    rating_sum   INTEGER NOT NULL, rating_n   INTEGER NOT NULL,
+    PRIMARY KEY (subcat_id, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_MONEY = re.compile(MONEY_RE)
+_PERCENT = re.compile(PERCENT_RE)
+_RATING = re.compile(RATING_RE)
+_NON_DIGITS = re.compile(r"\D")
+
+
+# ---------- row -> stored values ----------
+def _money(text):
+    m = _MONEY.search(str(text or ""))
+    return round(float(m.group(1).replace(",", "")) * 100) if m else None
+
+def _count(text):
+    digits = _NON_DIGITS.sub("", str(text if text is not None else ""))
+    return int(digits) if digits else 0
+
+def _rating(text):
+    m = _RATING.search(str(text or ""))
+    val = round(float(m.group(1)) * 100) if m else 0
+    return val or None      # 0 means "no rating shown"
+
+def observed_values(row):
+    """(price, mrp, discount, rating, reviews) as stored, same rules as normalize.normalize()."""
+    price, mrp = _money(row.get("Price")), _money(row.get("Original Price"))
+    m = _PERCENT.search(str(row.get("Discount") or ""))
+    discount = round(float(m.group(1))) if m else None
+    if discount is None and price is not None and mrp:
+        discount = round(100 * (1 - price / mrp))
+    rating = _rating(row.get("Rating (detail)")) or _rating(row.get("Rating (listing)"))
+    reviews = _count(row.get("Reviews Count (detail)")) or _count(row.get("Reviews Count (listing)"))
+    return price, mrp, discount, rating, reviews
+
+
+def _day(ts):
+    return time.strftime("%Y-%m-%d", time.localtime(ts))
+
+def _daily_delta(vals, sign):
+    price, _, discount, rating, _ = vals
+    return [sign,
+            sign * (price or 0), sign * (price is not None),
+            sign * (discount or 0), sign * (discount is not None),
+            sign * (rating or 0), sign * (rating is not None)]
+
+
+class PriceHistory:
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self._subcats = dict(((s, c), i) for i, s, c in
+                             self.conn.execute("SELECT id, top_section, subcategory FROM subcats"))
+        self._ts_cache = {}
+        self._buffer = []
+        # this session's counts
+        self.observed = 0
+        self.changed = 0
+        self.new = 0
+        self.stale = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- ingest (sink interface) ----------
+    def write(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= BATCH_ROWS:
+            self.flush()
+
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+        self.flush()
+
+    def flush(self):
+        if self._buffer:
+            rows, self._buffer = self._buffer, []
+            self.ingest(rows)
+
+    def _ts(self, scraped_at):
+        """(unix seconds, local "YYYY-MM-DD") of a Scraped At value; a run shares a few."""
+        got = self._ts_cache.get(scraped_at)
+        if got is None:
+            try:
+                ts = int(datetime.strptime(str(scraped_at)[:19], "%Y-%m-%d %H:%M:%S").timestamp())
+            except ValueError:
+                ts = int(time.time())
+            got = self._ts_cache[scraped_at] = (ts, _day(ts))
+        return got
+
+    def _subcat_id(self, section, subcat):
+        key = (section or "", subcat or "")
+        sid = self._subcats.get(key)
+        if sid is None:
+            self.conn.execute("INSERT OR IGNORE INTO subcats (top_section, subcategory) VALUES (?, ?)",
+                              key)
+            sid = self.conn.execute("SELECT id FROM subcats WHERE top_section = ? AND subcategory = ?",
+                                    key).fetchone()[0]
+            self._subcats[key] = sid
+        return sid
+
+    def _load(self, keys):
+        """key -> [id, subcat_id, last_seen, values] for known products."""
+        known = {}
+        keys = list(keys)
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            q = ("SELECT key, id, subcat_id, last_seen, price, mrp, discount, rating, reviews "
+                 f"FROM products WHERE key IN ({','.join('?' * len(part))})")
+            for key, pid, sid, last, *vals in self.conn.execute(q, part):
+                known[key] = [pid, sid, last, tuple(vals)]
+        return known
+
+    def ingest(self, rows):
+        """Record a batch of scraped rows (dicts or ProductRow) in one transaction."""
+        obs = []
+        for row in rows:
+            url = row.get("Product URL") or ""
+            key = product_key(url)
+            if key:
+                obs.append((key, url, row))
+        if not obs:
+            return
+        with self.conn:
+            known = self._load({k for k, _, _ in obs})
+            new_products, changes, daily = [], [], {}
+            touched = {}
+            stale = self.stale
+            for key, url, row in obs:
+                ts, day = self._ts(row.get("Scraped At"))
+                vals = observed_values(row)
+                rec = known.get(key)
+                self.observed += 1
+                if rec is None:
+                    sid = self._subcat_id(row.get("Top Section"), row.get("Subcategory"))
+                    cur = self.conn.execute(
+                        "INSERT INTO products (key, subcat_id, name, url, first_seen, last_seen, "
+                        "price, mrp, discount, rating, reviews) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, sid, row.get("Product Name"), url, ts, ts, *vals))
+                    rec = known[key] = [cur.lastrowid, sid, ts, vals]
+                    changes.append((rec[0], ts, *vals))
+                    self.new += 1
+                else:
+                    pid, sid, last, old = rec
+                    if ts <= last:
+                        self.stale += 1
+                        continue
+                    if day == _day(last):
+                        # already counted today: its last value of the day replaces the earlier one
+                        d = daily.setdefault((sid, day), [0] * 7)
+                        d[:] = [a + b for a, b in zip(d, _daily_delta(old, -1))]
+                    if vals != old:
+                        changes.append((pid, ts, *vals))
+                        self.changed += 1
+                    rec[2], rec[3] = ts, vals
+                d = daily.setdefault((rec[1], day), [0] * 7)
+                d[:] = [a + b for a, b in zip(d, _daily_delta(vals, 1))]
+                touched[key] = rec
+
+            self.conn.executemany(
+                "UPDATE products SET last_seen = ?, price = ?, mrp = ?, discount = ?, rating = ?, "
+                "reviews = ? WHERE id = ?",
+                [(last, *vals, pid) for pid, _, last, vals in touched.values()])
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO changes (product_id, ts, price, mrp, discount, rating, reviews) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", changes)
+            self.conn.executemany(
+                "INSERT INTO daily (subcat_id, day, n, price_sum, price_n, discount_sum, discount_n, "
+                "rating_sum, rating_n) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (subcat_id, day) DO UPDATE SET n = n + excluded.n, "
+                "price_sum = price_sum + excluded.price_sum, price_n = price_n + excluded.price_n, "
+                "discount_sum = discount_sum + excluded.discount_sum, "
+                "discount_n = discount_n + excluded.discount_n, "
+                "rating_sum = rating_sum + excluded.rating_sum, rating_n = rating_n + excluded.rating_n",
+                [(sid, day, *d) for (sid, day), d in daily.items()])
+            self.conn.execute(
+                "INSERT INTO meta (name, value) VALUES ('observations', ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                (len(obs) - (self.stale - stale),))
+
+    def summary(self):
+        return (f"{self.observed} sightings: {self.new} new products, {self.changed} changed, "
+                f"{self.observed - self.new - self.changed - self.stale} unchanged, "
+                f"{self.stale} already recorded")
+
+    # ---------- queries ----------
+    @staticmethod
+    def _frame(rows, columns):
+        import pandas as pd
+        df = pd.DataFrame(rows, columns=columns)
+        for c in ("price", "mrp"):
+            if c in df:
+                df[c] = df[c] / 100
+        if "rating" in df:
+            df["rating"] = df["rating"] / 100
+        for c in ("ts", "first_seen", "last_seen"):
+            if c in df:
+                df[c] = pd.to_datetime(df[c], unit="s")
+        return df
+
+    @staticmethod
+    def _epoch(when):
+        if when is None or isinstance(when, (int, float)):
+            return when
+        return int(datetime.fromisoformat(str(when)).timestamp())
+
+    def latest(self, since=None, subcategory=None):
+        """Current values per product (optionally only those seen since `since`)."""
+        where, args = [], []
+        if since is not None:
+            where.append("p.last_seen >= ?")
+            args.append(self._epoch(since))
+        if subcategory is not None:
+            where.append("s.subcategory = ?")
+            args.append(subcategory)
+        q = ("SELECT p.key, p.name, p.url, s.top_section, s.subcategory, p.first_seen, p.last_seen, "
+             "p.price, p.mrp, p.discount, p.rating, p.reviews "
+             "FROM products p JOIN subcats s ON s.id = p.subcat_id"
+             + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY p.id")
+        return self._frame(self.conn.execute(q, args).fetchall(),
+                           ["key", "name", "url", "top_section", "subcategory", "first_seen",
+                            "last_seen", *VALUE_FIELDS])
+
+    def series(self, product):
+        """One product's values at each change, plus its last sighting; `product` is a URL or key."""
+        key = product if product.startswith("pid:") else product_key(product)
+        row = self.conn.execute("SELECT id, last_seen FROM products WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return self._frame([], ["ts", *VALUE_FIELDS])
+        pid, last_seen = row
+        points = self.conn.execute(
+            "SELECT ts, price, mrp, discount, rating, reviews FROM changes "
+            "WHERE product_id = ? ORDER BY ts", (pid,)).fetchall()
+        if points and points[-1][0] < last_seen:
+            points.append((last_seen, *points[-1][1:]))
+        return self._frame(points, ["ts", *VALUE_FIELDS])
+
+    def daily(self, subcategory=None, top_section=None, since=None, until=None):
+        """Per subcategory and day: products seen and their mean price / discount / rating."""
+        where, args = [], []
+        for col, val in (("s.subcategory", subcategory), ("s.top_section", top_section)):
+            if val is not None:
+                where.append(f"{col} = ?")
+                args.append(val)
+        if since is not None:
+            where.append("d.day >= ?")
+            args.append(str(since)[:10])
+        if until is not None:
+            where.append("d.day <= ?")
+            args.append(str(until)[:10])
+        q = ("SELECT d.day, s.top_section, s.subcategory, d.n, "
+             "d.price_sum / 100.0 / NULLIF(d.price_n, 0), "
+             "d.discount_sum * 1.0 / NULLIF(d.discount_n, 0), "
+             "d.rating_sum / 100.0 / NULLIF(d.rating_n, 0) "
+             "FROM daily d JOIN subcats s ON s.id = d.subcat_id"
+             + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY d.day, s.id")
+        import pandas as pd
+        df = pd.DataFrame(self.conn.execute(q, args).fetchall(),
+                          columns=["day", "top_section", "subcategory", "products",
+                                   "avg_price", "avg_discount", "avg_rating"])
+        df["day"] = pd.to_datetime(df["day"])
+        return df
+
+    def monthly_discount(self):
+        """Mean discount per "YYYY-MM" over product-days (same shape as Aggregates.monthly_discount)."""
+        import pandas as pd
+        rows = self.conn.execute(
+            "SELECT substr(day, 1, 7), SUM(discount_sum) * 1.0 / SUM(discount_n) FROM daily "
+            "GROUP BY 1 HAVING SUM(discount_n) > 0 ORDER BY 1").fetchall()
+        return pd.Series(dict(rows), dtype="float64", name="discount")
+
+    def stats(self):
+        one = lambda q: self.conn.execute(q).fetchone()[0] or 0
+        return {
+            "products": one("SELECT COUNT(*) FROM products"),
+            "observations": one("SELECT value FROM meta WHERE name = 'observations'"),
+            "change_rows": one("SELECT COUNT(*) FROM changes"),
+            "subcategory_days": one("SELECT COUNT(*) FROM daily"),
+        }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Price history across crawls.")
+    ap.add_argument("--db", default=HISTORY_DB)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ing = sub.add_parser("ingest", help="add output files (oldest first) to the history")
+    ing.add_argument("inputs", nargs="+")
+    sub.add_parser("stats")
+    ser = sub.add_parser("series", help="print one product's price series")
+    ser.add_argument("product", help="product URL or key")
+    args = ap.parse_args(argv)
+
+    with PriceHistory(args.db) as h:
+        if args.cmd == "ingest":
+            from analytics import read_chunks
+            t0 = time.perf_counter()
+            for path in args.inputs:
+                for chunk in read_chunks(path, columns=None):
+                    h.write_many(chunk.to_dict("records"))
+            print(f"{h.summary()} in {time.perf_counter() - t0:.1f}s")
+        elif args.cmd == "series":
+            print(h.series(args.product).to_string(index=False))
+        if args.cmd in ("ingest", "stats"):
+            s = h.stats()
+            ratio = s["observations"] / s["change_rows"] if s["change_rows"] else 0
+            print(f"{s['products']} products, {s['observations']} sightings stored as "
+                  f"{s['change_rows']} change rows ({ratio:.1f}x), "
+                  f"{s['subcategory_days']} subcategory-days  →  {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Reading back the partitioned Parquet output (`--output products/`).
+
+The dataset is laid out by scrape date and top section,
+
+    products/scrape_date=2024-05-01/top_section=Footwear/part-*.parquet
+
+so a filter on either only opens the matching directories, and a column
+list only decodes those column chunks:
+
+    df = read_dataset("products/", columns=["Product Name", "Price"],
+                      sections=["Footwear"], since="2024-05-01")
+    df = read_dataset("products/", typed=True)      # normalize.normalize() applied
+    partitions("products/")    # [("2024-05-01", "Footwear", 2), ...]
+"""
+import os
+from urllib.parse import unquote
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from row_sink import COLUMNS, PartitionedParquetSink
+
+
+SECTION = PartitionedParquetSink.PARTITION_COLUMN
+# both keys stay strings (hive inference would turn the date into date32)
+PARTITIONING = ds.partitioning(
+    pa.schema([("scrape_date", pa.string()), ("top_section", pa.string())]), flavor="hive")
+
+
+def open_dataset(path):
+    return ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+
+def _filter(sections=None, dates=None, since=None, until=None):
+    """Partition filter expression (dates are "YYYY-MM-DD" strings), or None."""
+    parts = []
+    if sections:
+        parts.append(ds.field("top_section").isin(list(sections)))
+    if dates:
+        parts.append(ds.field("scrape_date").isin([str(d) for d in dates]))
+    if since:
+        parts.append(ds.field("scrape_date") >= str(since))
+    if until:
+        parts.append(ds.field("scrape_date") <= str(until))
+    expr = None
+    for p in parts:
+        expr = p if expr is None else expr & p
+    return expr
+
+def read_dataset(path, columns=None, sections=None, dates=None, since=None, until=None,
+                 typed=False):
+    """
+    Selected columns of the selected partitions as a DataFrame. "Top Section"
+    comes back as a regular column; `typed` runs normalize.normalize().
+    """
+    dataset = open_dataset(path)
+    names = [c for c in (columns or dataset.schema.names) if c not in ("top_section", "scrape_date")]
+    scan = [c for c in names if c != SECTION]
+    want_section = columns is None or SECTION in columns
+    if want_section:
+        scan.append("top_section")
+    table = dataset.to_table(columns=scan, filter=_filter(sections, dates, since, until))
+    if want_section:
+        table = table.rename_columns([SECTION if c == "top_section" else c
+                                      for c in table.column_names])
+    df = table.to_pandas()
+    if columns is None:
+        # back in output column order (the partition column was appended last)
+        df = df[[c for c in COLUMNS if c in df.columns] + [c for c in df.columns if c not in COLUMNS]]
+    else:
+        df = df[list(columns)]
+    if typed:
+        from normalize import normalize
+        df = normalize(df, copy=False)
+    return df
+
+def partitions(path):
+    """(scrape date, section, files) for every partition directory, sorted."""
+    out = []
+    for date_dir in sorted(os.listdir(path)):
+        if not date_dir.startswith("scrape_date="):
+            continue
+        for sec_dir in sorted(os.listdir(os.path.join(path, date_dir))):
+            if not sec_dir.startswith("top_section="):
+                continue
+            files = [f for f in os.listdir(os.path.join(path, date_dir, sec_dir))
+                     if f.endswith(".parquet")]
+            out.append((date_dir.split("=", 1)[1], unquote(sec_dir.split("=", 1)[1]), len(files)))
+    return out
@@ -0,0 +1,213 @@
+"""
+Adaptive request rate: AIMD per host and per worker, with block detection.
+
+Every page load ends in one of four outcomes (`classify`):
+
+    ok        cards / content came back
+    empty     a normal-looking page with nothing on it (end of a listing)
+    timeout   the page or request didn't finish in time
+    blocked   403/429/503, or a captcha / "access denied" interstitial
+
+Healthy responses raise the allowance additively, trouble cuts it
+multiplicatively (a block harder than a timeout), and a block also puts the
+whole host on a cooldown that doubles with each further block. Two shapes
+share one controller:
+
+    HTTP (async)     AsyncHostLimiter caps requests in flight per host
+    browser workers  Pacer spaces one worker's page loads at its own rate
+
+    pacer = Pacer(CONTROLLER, "www.snapdeal.com", "main")
+    pacer.wait(); driver.get(url); pacer.record(classify(html=driver.page_source, cards=n))
+
+This replaces hand-tuned sleeps: the crawl settles near the fastest rate the
+site tolerates and slows down by itself when it starts pushing back.
+"""
+import asyncio
+import re
+import threading
+import time
+
+from metrics import incr
+
+
+# ================= CONFIG =================
+START_RATE = 2.0            # browser page loads per second, per worker
+MIN_RATE = 0.1
+MAX_RATE = 10.0
+RATE_STEP = 0.1             # added per healthy page
+BLOCK_BACKOFF = 0.5         # allowance multiplied by this on a block...
+TIMEOUT_BACKOFF = 0.75      # ...and by this on a timeout
+BLOCK_COOLDOWN = 10.0       # seconds a host is left alone after a block (doubles per repeat)
+MAX_COOLDOWN = 300.0
+CONCURRENCY_STEP = 0.25     # HTTP: +1 request in flight per 4 healthy responses
+# ==========================================
+
+OK, EMPTY, TIMEOUT, BLOCKED = "ok", "empty", "timeout", "blocked"
+
+BLOCK_STATUSES = {403, 429, 503}
+BLOCK_MARKERS = re.compile(
+    r"captcha|access denied|are you a robot|unusual traffic|request blocked|"
+    r"verify you are (?:a )?human|pardon our interruption|too many requests",
+    re.IGNORECASE)
+TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+# interstitials are small; only a short page is scanned in full
+SMALL_PAGE_CHARS = 20_000
+
+
+def looks_blocked(html):
+    if not html:
+        return False
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", "replace")
+    title = TITLE_RE.search(html[:5000])
+    if title and BLOCK_MARKERS.search(title.group(1)):
+        return True
+    return len(html) < SMALL_PAGE_CHARS and bool(BLOCK_MARKERS.search(html))
+
+def classify(status=None, html=None, cards=None, timed_out=False):
+    """Outcome of one page load; `cards` = how many items were parsed (None = not a listing)."""
+    if timed_out:
+        return TIMEOUT
+    if status in BLOCK_STATUSES:
+        return BLOCKED
+    if cards:
+        return OK
+    if looks_blocked(html):
+        return BLOCKED
+    return EMPTY if cards == 0 else OK
+
+
+class AIMD:
+    """A value in [lo, hi]: +step on success, *backoff on trouble."""
+    __slots__ = ("value", "lo", "hi", "step")
+
+    def __init__(self, start, lo, hi, step):
+        self.value = start
+        self.lo = lo
+        self.hi = hi
+        self.step = step
+
+    def record(self, outcome):
+        if outcome == OK:
+            self.value = min(self.hi, self.value + self.step)
+        elif outcome == BLOCKED:
+            self.value = max(self.lo, self.value * BLOCK_BACKOFF)
+        elif outcome == TIMEOUT:
+            self.value = max(self.lo, self.value * TIMEOUT_BACKOFF)
+        return self.value
+
+
+class RateController:
+    """Thread-safe AIMD allowances by key, plus per-host block cooldowns."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._allowances = {}       # key -> AIMD
+        self._cooldown_until = {}   # host -> monotonic deadline
+        self._strikes = {}          # host -> consecutive blocks
+        self.outcomes = {OK: 0, EMPTY: 0, TIMEOUT: 0, BLOCKED: 0}
+
+    def allowance(self, key, start, lo, hi, step):
+        with self._lock:
+            a = self._allowances.get(key)
+            if a is None:
+                a = self._allowances[key] = AIMD(start, lo, hi, step)
+            return a
+
+    def record(self, host, allowance, outcome):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if outcome == BLOCKED and time.monotonic() < self._cooldown_until.get(host, 0.0):
+                # requests already in flight when we backed off: one cut per burst
+                return allowance.value
+            value = allowance.record(outcome)
+            if outcome == BLOCKED:
+                strikes = self._strikes.get(host, 0) + 1
+                self._strikes[host] = strikes
+                pause = min(MAX_COOLDOWN, BLOCK_COOLDOWN * 2 ** (strikes - 1))
+                self._cooldown_until[host] = time.monotonic() + pause
+            elif outcome == OK:
+                self._strikes.pop(host, None)
+        if outcome != OK:
+            incr(f"pages_{outcome}")
+        if outcome == BLOCKED:
+            print(f"     ⚠ {host}: block/captcha detected, pausing {pause:.0f}s "
+                  f"(allowance now {value:.2f})")
+        return value
+
+    def cooldown_left(self, host):
+        with self._lock:
+            until = self._cooldown_until.get(host, 0.0)
+        return max(0.0, until - time.monotonic())
+
+    def report(self):
+        with self._lock:
+            items = sorted(self._allowances.items())
+            counts = dict(self.outcomes)
+        lines = ["Rate control: " + ", ".join(f"{k} {v}" for k, v in counts.items())]
+        for key, a in items:
+            lines.append(f"  {key:<40} {a.value:6.2f}")
+        return "\n".join(lines)
+
+
+class Pacer:
+    """One browser worker's page-load spacing for one host (pages per second)."""
+
+    def __init__(self, controller, host, worker="main", start=START_RATE):
+        self.controller = controller
+        self.host = host
+        self.rate = controller.allowance(f"{host} [{worker}] pages/s", start, MIN_RATE,
+                                         MAX_RATE, RATE_STEP)
+        self._last = 0.0
+
+    def wait(self):
+        """Sleep out any host cooldown and this worker's spacing, then mark a start."""
+        pause = max(self.controller.cooldown_left(self.host),
+                    self._last + 1.0 / self.rate.value - time.monotonic())
+        if pause > 0:
+            time.sleep(pause)
+        self._last = time.monotonic()
+
+    def record(self, outcome):
+        return self.controller.record(self.host, self.rate, outcome)
+
+
+class AsyncHostLimiter:
+    """Requests in flight per host for an asyncio client, sized by AIMD."""
+
+    def __init__(self, controller, start, hi, lo=1):
+        self.controller = controller
+        self.start, self.hi, self.lo = start, hi, lo
+        self._in_flight = {}
+        self._cond = None
+
+    def _allowance(self, host):
+        return self.controller.allowance(f"{host} [http] in flight", self.start, self.lo,
+                                         self.hi, CONCURRENCY_STEP)
+
+    async def acquire(self, host):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        allowance = self._allowance(host)
+        async with self._cond:
+            while True:
+                pause = self.controller.cooldown_left(host)
+                if pause > 0:
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), pause)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self._in_flight.get(host, 0) < int(allowance.value):
+                    break
+                await self._cond.wait()
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+
+    async def release(self, host, outcome):
+        self.controller.record(host, self._allowance(host), outcome)
+        async with self._cond:
+            self._in_flight[host] -= 1
+            self._cond.notify_all()
+
+
+CONTROLLER = RateController()
@@ -0,0 +1,109 @@
+"""
+Page readiness checks that return as soon as a page has settled.
+
+A small in-page probe (installed once per document) records the time of
+the last DOM mutation and the number of XHR/fetch requests in flight.
+Python polls it on a tight interval instead of sleeping for fixed delays:
+
+    wait_until_settled(driver, CARD_SELECTOR)     # after driver.get()
+    scroll_until_stable(driver, CARD_SELECTOR)    # infinite-scroll listings
+    wait_for_url_change(driver, old_url)          # after clicking "next"
+"""
+import time
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+
+CARD_SELECTOR = "div.product-tuple-listing, div.product-tuple"
+POLL = 0.05     # seconds between probes
+
+# installs the observer on first call, then reports page state
+PROBE_JS = """
+const sel = arguments[0];
+let st = window.__sdReady;
+if (!st) {
+    st = window.__sdReady = {last: performance.now(), inflight: 0};
+    const touch = () => { st.last = performance.now(); };
+    new MutationObserver(touch).observe(document.documentElement,
+                                        {childList: true, subtree: true});
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        st.inflight++;
+        this.addEventListener('loadend', () => { st.inflight--; touch(); });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        const origFetch = window.fetch;
+        window.fetch = function () {
+            st.inflight++;
+            return origFetch.apply(this, arguments)
+                .finally(() => { st.inflight--; touch(); });
+        };
+    }
+}
+return {
+    quiet: (performance.now() - st.last) / 1000,
+    inflight: st.inflight,
+    cards: document.querySelectorAll(sel).length,
+    height: document.body ? document.body.scrollHeight : 0,
+    ready: document.readyState
+};
+"""
+
+
+def probe(driver, card_selector=CARD_SELECTOR):
+    """One round-trip snapshot: quiet seconds, requests in flight, card count, height."""
+    return driver.execute_script(PROBE_JS, card_selector)
+
+def is_idle(state, quiet):
+    return state["ready"] == "complete" and state["inflight"] == 0 and state["quiet"] >= quiet
+
+def wait_until_settled(driver, card_selector=CARD_SELECTOR, timeout=10, quiet=0.25, min_cards=1):
+    """
+    Block until the document is loaded, at least `min_cards` cards exist and
+    neither the DOM nor the network has been busy for `quiet` seconds.
+    Returns the card count (may be below `min_cards` if `timeout` ran out).
+    """
+    deadline = time.monotonic() + timeout
+    state = probe(driver, card_selector)
+    while time.monotonic() < deadline:
+        if state["cards"] >= min_cards and is_idle(state, quiet):
+            break
+        time.sleep(POLL)
+        state = probe(driver, card_selector)
+    return state["cards"]
+
+def scroll_until_stable(driver, card_selector=CARD_SELECTOR, max_wait=0.8, quiet=0.25, max_rounds=100):
+    """
+    Scroll to the bottom until the page stops growing. After each scroll we
+    move on the moment new cards/height show up, and stop once the page has
+    been idle for `quiet` seconds (never waiting longer than `max_wait`).
+    Returns the final card count.
+    """
+    state = probe(driver, card_selector)
+    for _ in range(max_rounds):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        scrolled_at = time.monotonic()
+        grew = False
+        while time.monotonic() - scrolled_at < max_wait:
+            time.sleep(POLL)
+            now = probe(driver, card_selector)
+            if now["height"] != state["height"] or now["cards"] != state["cards"]:
+                state, grew = now, True
+                break
+            # give lazy loaders `quiet` seconds to start; idle after that means no more content
+            if time.monotonic() - scrolled_at >= quiet and is_idle(now, quiet):
+                break
+        if not grew:
+            break
+    return state["cards"]
+
+def wait_for_url_change(driver, old_url, timeout=6):
+    """True as soon as the URL differs from `old_url`, False after `timeout`."""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL).until(EC.url_changes(old_url))
+        return True
+    except TimeoutException:
+        return False
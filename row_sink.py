@@ -0,0 +1,287 @@
+"""
+Streaming output for scraped rows.
+
+Rows are buffered up to `batch_size` (or `flush_every` seconds) and then
+written out, so a crawl never holds its whole result set in memory.
+CSV keeps the original column order and `utf-8-sig` encoding; JSONL and
+Parquet are picked by file extension, and a directory path (or
+fmt="dataset") gets a Parquet dataset partitioned by scrape date and
+section (see product_dataset.py for reading it back):
+
+    with open_sink("snapdeal_products.csv") as sink:
+        sink.write_many(rows)
+
+Rows are plain dicts or `ProductRow` records; sinks only call
+`row.get(column)`, so both work everywhere.
+"""
+import csv
+import json
+import os
+import re
+import time
+import uuid
+from urllib.parse import quote
+
+
+COLUMNS = [
+    "Scraped At", "Top Section", "Subcategory",
+    "Product Name", "Brand (heuristic/listing)",
+    "Price", "Original Price", "Discount",
+    "Rating (listing)", "Rating (detail)",
+    "Reviews Count (listing)", "Reviews Count (detail)",
+    "Target Audience", "Availability", "Seller",
+    "Product URL", "Image URL (listing)", "Image URLs (detail)",
+    "Short Description", "Full Description", "Breadcrumb",
+    "Page"
+]
+
+# one row per (product, listing it appeared in); the product's own row is written once
+MEMBERSHIP_COLUMNS = ["Product Key", "Product URL", "Top Section", "Subcategory", "Page"]
+
+# non-string columns (everything else is text)
+INT_COLUMNS = {"Reviews Count (listing)", "Reviews Count (detail)", "Page"}
+
+
+# ---------- compact row record ----------
+def field_name(column):
+    """"Brand (heuristic/listing)" -> "brand_heuristic_listing"."""
+    return re.sub(r"[^0-9a-z]+", "_", column.lower()).strip("_")
+
+FIELD_NAMES = tuple(field_name(c) for c in COLUMNS)
+_FIELD_OF = dict(zip(COLUMNS, FIELD_NAMES))
+
+
+class ProductRow:
+    """
+    One output row as a __slots__ record (no per-row dict of 22 keys).
+    Attributes are the snake_case column names; sinks and the crawl state
+    read it like a dict keyed by COLUMNS.
+    """
+    __slots__ = FIELD_NAMES
+
+    def __init__(self, **fields):
+        for col, name in _FIELD_OF.items():
+            setattr(self, name, fields.pop(name, 0 if col in INT_COLUMNS else ""))
+        if fields:
+            raise TypeError(f"unknown ProductRow fields: {', '.join(fields)}")
+
+    @classmethod
+    def from_dict(cls, row):
+        return cls(**{_FIELD_OF[c]: v for c, v in row.items() if c in _FIELD_OF})
+
+    # dict-style access by column name
+    def get(self, column, default=None):
+        name = _FIELD_OF.get(column)
+        return getattr(self, name) if name else default
+
+    def __getitem__(self, column):
+        return getattr(self, _FIELD_OF[column])
+
+    def keys(self):
+        return COLUMNS
+
+    def to_dict(self):
+        return {c: getattr(self, n) for c, n in _FIELD_OF.items()}
+
+    def __eq__(self, other):
+        if isinstance(other, ProductRow):
+            return all(getattr(self, n) == getattr(other, n) for n in FIELD_NAMES)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ProductRow({self.product_name!r}, {self.product_url!r})"
+
+
+def as_dict(row):
+    return row if isinstance(row, dict) else row.to_dict()
+
+
+class RowSink:
+    """Buffered row writer; subclasses implement _open() and _write_batch()."""
+
+    def __init__(self, path, columns=COLUMNS, batch_size=500, flush_every=30.0, append=False):
+        self.path = path
+        self.columns = list(columns)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_every = flush_every
+        self.append = append
+        self.rows_written = 0
+        self._buf = []
+        self._last_flush = time.monotonic()
+        self._open()
+
+    def write(self, row):
+        self._buf.append(row)
+        if (len(self._buf) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_every):
+            self.flush()
+
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        if self._buf:
+            self._write_batch(self._buf)
+            self.rows_written += len(self._buf)
+            self._buf = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write_batch(self, rows):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class CsvSink(RowSink):
+    def _open(self):
+        resuming = self.append and os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        # the BOM belongs at the start of the file only
+        self._f = open(self.path, "a" if resuming else "w", newline="",
+                       encoding="utf-8" if resuming else "utf-8-sig")
+        self._w = csv.DictWriter(self._f, fieldnames=self.columns, restval="",
+                                 extrasaction="ignore", lineterminator="\n")
+        if not resuming:
+            self._w.writeheader()
+            self._f.flush()
+
+    def _write_batch(self, rows):
+        self._w.writerows(rows)
+        self._f.flush()
+
+    def _close(self):
+        self._f.close()
+
+
+class JsonlSink(RowSink):
+    def _open(self):
+        self._f = open(self.path, "a" if self.append else "w", encoding="utf-8")
+
+    def _write_batch(self, rows):
+        for r in rows:
+            self._f.write(json.dumps({c: r.get(c, "") for c in self.columns}, ensure_ascii=False))
+            self._f.write("\n")
+        self._f.flush()
+
+    def _close(self):
+        self._f.close()
+
+
+def arrow_schema(pa, columns):
+    return pa.schema([(c, pa.int64() if c in INT_COLUMNS else pa.string()) for c in columns])
+
+def arrow_table(pa, schema, rows):
+    arrays = {}
+    for c in schema.names:
+        if c in INT_COLUMNS:
+            arrays[c] = [int(r.get(c) or 0) for r in rows]
+        else:
+            arrays[c] = [str(r.get(c, "") or "") for r in rows]
+    return pa.table(arrays, schema=schema)
+
+
+class ParquetSink(RowSink):
+    """One row group per flushed batch. Needs pyarrow; can't append to an existing file."""
+
+    def _open(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self.append:
+            raise ValueError("Parquet output can't be appended to; write a new file")
+        self._pa = pa
+        self._schema = arrow_schema(pa, self.columns)
+        self._w = pq.ParquetWriter(self.path, self._schema, compression="zstd")
+
+    def _write_batch(self, rows):
+        self._w.write_table(arrow_table(self._pa, self._schema, rows))
+
+    def _close(self):
+        self._w.close()
+
+
+class PartitionedParquetSink(RowSink):
+    """
+    Hive-style dataset directory:
+
+        <path>/scrape_date=2024-05-01/top_section=Footwear/part-<run>.parquet
+
+    One zstd Parquet writer per partition touched by this run (a row group
+    per flush). "Top Section" lives in the directory name, not the files.
+    By default the partitions this run writes are replaced on close, so a
+    same-day rerun doesn't duplicate rows while other dates and sections
+    stay; with `append=True` earlier files in them are kept as well. Rows
+    without a "Scraped At" (memberships) go under this run's date.
+    """
+
+    PARTITION_COLUMN = "Top Section"
+
+    def _open(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa, self._pq = pa, pq
+        self._schema = arrow_schema(pa, [c for c in self.columns if c != self.PARTITION_COLUMN])
+        self._run = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self._date = time.strftime("%Y-%m-%d")
+        self._writers = {}      # partition dir -> ParquetWriter
+        os.makedirs(self.path, exist_ok=True)
+
+    def partition_dir(self, row):
+        date = str(row.get("Scraped At") or "")[:10] or self._date
+        section = str(row.get(self.PARTITION_COLUMN) or "") or "unknown"
+        return os.path.join(self.path, f"scrape_date={date}",
+                            f"top_section={quote(section, safe=' ')}")
+
+    def _write_batch(self, rows):
+        groups = {}
+        for r in rows:
+            groups.setdefault(self.partition_dir(r), []).append(r)
+        for part, group in groups.items():
+            w = self._writers.get(part)
+            if w is None:
+                os.makedirs(part, exist_ok=True)
+                w = self._pq.ParquetWriter(os.path.join(part, f"part-{self._run}.parquet"),
+                                           self._schema, compression="zstd")
+                self._writers[part] = w
+            w.write_table(arrow_table(self._pa, self._schema, group))
+
+    def _close(self):
+        mine = f"part-{self._run}.parquet"
+        for part, w in self._writers.items():
+            w.close()
+            if not self.append:
+                for name in os.listdir(part):
+                    if name.endswith(".parquet") and name != mine:
+                        os.remove(os.path.join(part, name))
+
+
+SINKS = {"csv": CsvSink, "jsonl": JsonlSink, "parquet": ParquetSink,
+         "dataset": PartitionedParquetSink}
+
+def sink_format(path, fmt=None):
+    """`fmt`, else from the extension; a directory (or trailing slash) means "dataset"."""
+    if fmt:
+        return fmt
+    if path.endswith(("/", os.sep)) or os.path.isdir(path):
+        return "dataset"
+    return os.path.splitext(path)[1].lstrip(".").lower() or "csv"
+
+def open_sink(path, fmt=None, **kwargs):
+    """Pick a sink from `fmt` or the path (.csv / .jsonl / .parquet / directory)."""
+    fmt = sink_format(path, fmt)
+    if fmt not in SINKS:
+        raise ValueError(f"Unknown output format: {fmt!r} (use one of {', '.join(SINKS)})")
+    return SINKS[fmt](path, **kwargs)
@@ -3,17 +3,17 @@ import re
 from datetime import datetime
 import pandas as pd
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+
+from browser import make_driver
+from listing_parser import parse_listing_cards
 
 # ===================== CONFIG =====================
 OUTPUT_CSV = "snapdeal_products.csv"
 HEADLESS = False
+LEAN_BROWSER = False    # skip images/media/fonts and third-party hosts (opt-in: bench_lean.py)
 WAIT_TIME = 10
 MAX_PRODUCTS = 10
 
@@ -26,19 +26,7 @@ BASE_SECTIONS = {
 # ==================================================
 
 # ---------- Chrome setup ----------
-chrome_opts = Options()
-if HEADLESS:
-    chrome_opts.add_argument("--headless=new")
-
-chrome_opts.add_argument("--disable-gpu")
-chrome_opts.add_argument("--window-size=1920,1080")
-chrome_opts.add_argument("--no-sandbox")
-chrome_opts.add_argument("--disable-dev-shm-usage")
-
-driver = webdriver.Chrome(
-    service=Service(ChromeDriverManager().install()),
-    options=chrome_opts
-)
+driver = make_driver(HEADLESS, lean=LEAN_BROWSER)
 
 wait = WebDriverWait(driver, WAIT_TIME)
 
@@ -62,44 +50,18 @@ for section, url in BASE_SECTIONS.items():
         EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.product-tuple-listing"))
     )
 
-    cards = driver.find_elements(By.CSS_SELECTOR, "div.product-tuple-listing")
-
-    for card in cards[:MAX_PRODUCTS]:
-        try:
-            name = card.find_element(By.CSS_SELECTOR, "p.product-title").text.strip()
-        except:
-            name = ""
-
-        try:
-            price = card.find_element(By.CSS_SELECTOR, "span.product-price").text.strip()
-        except:
-            price = ""
-
-        try:
-            rating_style = card.find_element(By.CSS_SELECTOR, ".filled-stars").get_attribute("style")
-            rating = clean_rating(rating_style)
-        except:
-            rating = ""
-
-        try:
-            img = card.find_element(By.TAG_NAME, "img").get_attribute("src") or \
-                  card.find_element(By.TAG_NAME, "img").get_attribute("data-src")
-        except:
-            img = ""
-
-        try:
-            product_url = card.find_element(By.TAG_NAME, "a").get_attribute("href")
-        except:
-            product_url = ""
+    cards = parse_listing_cards(driver.page_source, base_url=driver.current_url,
+                                max_take=MAX_PRODUCTS)
 
+    for card in cards:
         all_rows.append({
             "Scraped At": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "Section": section,
-            "Product Name": name,
-            "Price": price,
-            "Rating": rating,
-            "Image URL": img,
-            "Product URL": product_url
+            "Product Name": card["Product Name"],
+            "Price": card["Price"],
+            "Rating": clean_rating(card["Rating Style"]),
+            "Image URL": card["Image URL (listing)"],
+            "Product URL": card["Product URL"]
         })
 
 # ---------- Save CSV ----------
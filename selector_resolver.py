@@ -0,0 +1,133 @@
+"""
+Selector lookups that learn which fallback the current page template uses.
+
+Every field has a list of candidate selectors because Snapdeal serves a
+few page templates. Trying them in declared order means the pages of an
+older template pay for every dead candidate, on every field, every time.
+The resolver remembers the selector that last matched per
+(layout, field) and tries it first; the other candidates are only probed
+again after that selector misses.
+
+Only template-specific candidates are promoted that way. A catch-all
+fallback -- a bare tag like "a", or a selector that matches wherever a
+higher-ranked one does ("img" after "img.product-image", ".pdp-seller-info"
+after ".pdp-seller-info a") -- would never miss once remembered and would
+shadow the real selector on every later card, so those are always tried
+in declared order.
+
+    value = RESOLVER.resolve("Brand", BRAND_SELECTORS, probe, layout=layout_key(url))
+
+`probe(selector)` returns the extracted value, or None when the selector
+matches nothing. Hits are reported to metrics with the selector's declared
+rank, so `report()` shows which fallbacks carry traffic and which never
+match at all.
+"""
+import re
+import threading
+
+from metrics import METRICS, incr, selector_hit, selector_miss
+
+
+BARE_TAG = re.compile(r"^[a-z][a-z0-9]*$", re.IGNORECASE)
+
+
+def is_broader(sel, other):
+    """True when `sel` plainly matches wherever `other` does (same compound, or a prefix of one)."""
+    for part in other.split():
+        if part == sel:
+            return True
+        if part.startswith(sel) and part[len(sel)] in ".#[:":
+            return True
+    return False
+
+def is_fallback(selectors, rank):
+    """A catch-all candidate: a bare tag, or broader than some higher-ranked candidate."""
+    sel = selectors[rank]
+    return bool(BARE_TAG.match(sel)) or any(is_broader(sel, s) for s in selectors[:rank])
+
+
+class SelectorResolver:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._winners = {}      # (layout, field) -> selector that matched last
+        self._known = {}        # field -> candidates as declared, for report()
+        self._fallbacks = {}    # tuple(selectors) -> ranks that are never promoted
+
+    def _fallback_ranks(self, selectors):
+        key = tuple(selectors)
+        ranks = self._fallbacks.get(key)
+        if ranks is None:
+            ranks = self._fallbacks[key] = frozenset(
+                i for i in range(len(key)) if is_fallback(key, i))
+        return ranks
+
+    def order(self, field, selectors, layout=""):
+        """(declared rank, selector) pairs, last winner for this layout first unless it's a fallback."""
+        ranked = list(enumerate(selectors))
+        win = self._winners.get((layout, field))
+        if win is None or win == selectors[0] or win not in selectors:
+            return ranked
+        i = selectors.index(win)
+        if i in self._fallback_ranks(selectors):
+            return ranked
+        return [ranked[i]] + ranked[:i] + ranked[i + 1:]
+
+    def _remember(self, field, selectors, layout, sel, rank, memo, first_try):
+        with self._lock:
+            self._winners[(layout, field)] = sel
+            self._known.setdefault(field, list(selectors))
+        selector_hit(field, sel, rank)
+        if memo is not None:
+            incr("selector_memo_hits" if first_try else "selector_reprobes")
+
+    def resolve(self, field, selectors, probe, layout=""):
+        """First candidate whose probe matches; memoized winner goes first."""
+        memo = self._winners.get((layout, field))
+        for pos, (rank, sel) in enumerate(self.order(field, selectors, layout)):
+            val = probe(sel)
+            if val is None:
+                continue
+            self._remember(field, selectors, layout, sel, rank, memo, pos == 0)
+            return val
+        self._known.setdefault(field, list(selectors))
+        selector_miss(field)
+        return None
+
+    def resolve_longest(self, field, selectors, probe, layout=""):
+        """
+        For fields where several candidates may match and the biggest chunk
+        wins (the product description). Every candidate is probed each time
+        -- which one is biggest varies by product -- so nothing is skipped;
+        the winner is still recorded for report().
+        """
+        memo = self._winners.get((layout, field))
+        best, winner = "", None
+        for rank, sel in enumerate(selectors):
+            val = probe(sel)
+            if val and len(val) > len(best):
+                best, winner = val, (sel, rank)
+        if winner:
+            self._remember(field, selectors, layout, *winner, memo, winner[0] == memo)
+            return best
+        self._known.setdefault(field, list(selectors))
+        selector_miss(field)
+        return ""
+
+    def report(self):
+        """Per-field hit share of every declared candidate; 0% rows are prune candidates."""
+        lines = ["--- selector hit rates ---"]
+        with self._lock:
+            known = sorted(self._known.items())
+        for field, selectors in known:
+            hits = [METRICS.selector_hit_count(field, s) for s in selectors]
+            misses = METRICS.selector_miss_count(field)
+            total = sum(hits) + misses
+            lines.append(f"  {field}: {total} lookups, {misses} misses")
+            for sel, n in zip(selectors, hits):
+                share = 100 * n / total if total else 0.0
+                note = "   (never matched)" if not n else ""
+                lines.append(f"    {share:5.1f}%  {sel}{note}")
+        return "\n".join(lines)
+
+
+RESOLVER = SelectorResolver()
@@ -0,0 +1,245 @@
+"""
+Sharded crawl: one worker process (with its own browsers) per section,
+or per group of a section's subcategories.
+
+Each shard runs snapdeal.main() with its own state DB under a work
+directory, in a fresh process (no module state carries over between
+shards). With --split-subcats the parent finds each section's
+subcategories once, with its own browser, and hands every shard an
+explicit share of that one list, so no subcategory is skipped or crawled
+twice. The parent prints progress as pages are committed and, once
+every shard is done, merges the shards' committed rows into one output
+in BASE_SECTIONS order. A product seen by several shards keeps the row of
+the first shard in that order (as a sequential crawl would); all
+memberships are kept.
+
+    python sharded_crawl.py --procs 4
+    python sharded_crawl.py --procs 8 --split-subcats 2 --output all.parquet
+    python sharded_crawl.py --procs 8 --output products/ --format dataset
+    python sharded_crawl.py --procs 8 --output products/ --append   # keep earlier runs
+    python sharded_crawl.py --procs 8 --split-subcats 2 --resume
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import snapdeal
+from crawl_state import CrawlState
+from row_sink import open_sink, sink_format, SINKS, MEMBERSHIP_COLUMNS
+from urls import product_key
+
+
+class Shard:
+    def __init__(self, index, section, url, group=0, groups=1, subcats=None):
+        self.index = index
+        self.section = section
+        self.url = url
+        self.group = group
+        self.groups = groups
+        self.subcats = subcats      # explicit [{"Subcategory", "URL"}], None = discover
+        slug = re.sub(r"[^a-z0-9]+", "-", section.lower()).strip("-")
+        self.name = f"{index:02d}-{slug}" + (f"-{group}of{groups}" if groups > 1 else "")
+
+    def paths(self, workdir):
+        base = os.path.join(workdir, self.name)
+        return {"state": base + ".sqlite", "output": base + ".jsonl",
+                "memberships": base + "_memberships.jsonl", "log": base + ".log"}
+
+
+def plan_shards(sections, split_subcats=1, subcats=None):
+    """
+    Shards in merge order: sections as listed, then subcategory group.
+    With split_subcats > 1, `subcats` (from discover_all) is dealt out
+    round-robin; a group left empty gets no shard.
+    """
+    shards = []
+    for section, url in sections.items():
+        if split_subcats == 1:
+            shards.append(Shard(len(shards), section, url))
+            continue
+        for g in range(split_subcats):
+            group = subcats[section][g::split_subcats]
+            if group:
+                shards.append(Shard(len(shards), section, url, g, split_subcats, group))
+    return shards
+
+def discover_all(sections, workdir, resume=False):
+    """Every section's subcategory list, found once (and kept in the work dir for --resume)."""
+    state = CrawlState(os.path.join(workdir, "subcats.sqlite"), resume=resume)
+    state.add_sections(sections)
+    found = {}
+    try:
+        for section, url in sections.items():
+            if state.section_status(section) == "pending" and snapdeal.driver is None:
+                snapdeal.driver = snapdeal.make_driver(snapdeal.HEADLESS, lean=snapdeal.LEAN_BROWSER)
+            found[section] = [{"Subcategory": sc["Subcategory"], "URL": sc["URL"]}
+                              for sc in snapdeal.discover_subcats(section, url, state)]
+            print(f"{section}: {len(found[section])} subcategories")
+    finally:
+        if snapdeal.driver is not None:
+            snapdeal.driver.quit()
+            snapdeal.driver = None
+        state.close()
+    return found
+
+
+# ---------- worker side ----------
+_progress = None
+
+def _init_worker(queue):
+    global _progress
+    _progress = queue
+
+def run_shard(shard, workdir, extra_args):
+    """Crawl one shard in this (worker) process; its console output goes to a log file."""
+    paths = shard.paths(workdir)
+    log = open(paths["log"], "a", encoding="utf-8", buffering=1)
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = log
+    snapdeal.BASE_SECTIONS = {shard.section: shard.url}
+    snapdeal.subcat_plan = {shard.section: shard.subcats} if shard.subcats is not None else None
+    snapdeal.on_page = lambda subcat, page, rows: _progress.put(
+        ("page", shard.name, subcat, page, rows))
+    t0 = time.perf_counter()
+    try:
+        snapdeal.main(["--state", paths["state"], "--output", paths["output"],
+                       "--memberships", paths["memberships"], *extra_args])
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+        log.close()
+    return shard.name, time.perf_counter() - t0
+
+
+# ---------- parent side ----------
+def report_progress(queue, n_shards):
+    """Drain worker events and print one line per committed page."""
+    rows, pages, done = 0, 0, 0
+    while True:
+        event = queue.get()
+        if event is None:
+            return
+        kind, name = event[0], event[1]
+        if kind == "page":
+            _, _, subcat, page, n = event
+            pages += 1
+            rows += n
+            print(f"[{done}/{n_shards} shards | {pages} pages | {rows} rows] "
+                  f"{name}: {subcat} p{page} +{n}")
+        elif kind == "done":
+            done += 1
+            print(f"[{done}/{n_shards} shards | {pages} pages | {rows} rows] "
+                  f"{name} finished in {event[2]:.0f}s")
+        else:
+            print(f"[{done}/{n_shards} shards] {name} FAILED: {event[2]}")
+
+def merge(shards, workdir, output, memberships, fmt=None, append=False):
+    """Merge committed shard rows into `output` in shard order; returns (rows, listings)."""
+    seen = set()
+    rows = open_sink(output, fmt=fmt, append=append)
+    members_fmt = snapdeal.memberships_format(sink_format(output, fmt))
+    members = open_sink(memberships, fmt=members_fmt, columns=MEMBERSHIP_COLUMNS,
+                        append=append)
+    try:
+        for shard in shards:
+            path = shard.paths(workdir)["state"]
+            if not os.path.exists(path):
+                continue
+            state = CrawlState(path, resume=True)
+            for row in state.iter_rows():
+                key = product_key(row.get("Product URL", ""))
+                if key:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                rows.write(row)
+            members.write_many(state.iter_memberships())
+            state.close()
+    finally:
+        rows.close()
+        members.close()
+    return rows.rows_written, members.rows_written
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Crawl Snapdeal sections in parallel processes.")
+    ap.add_argument("--procs", type=int, default=os.cpu_count() or 1,
+                    help="worker processes, each with its own browsers (default: CPU count)")
+    ap.add_argument("--split-subcats", type=int, default=1, metavar="N",
+                    help="split each section's subcategories into N shards")
+    ap.add_argument("--workdir", help="per-shard state, output and logs "
+                                      "(default: <output>_shards/)")
+    ap.add_argument("--output", default=snapdeal.OUTPUT_CSV)
+    ap.add_argument("--memberships", help="default: <output>_memberships.<ext>")
+    ap.add_argument("--format", choices=sorted(SINKS))
+    ap.add_argument("--resume", action="store_true",
+                    help="continue the shards recorded in --workdir")
+    ap.add_argument("--append", action="store_true",
+                    help="add the merged rows to an existing output instead of replacing it "
+                         "(merged only once every shard has finished)")
+    cache = ap.add_mutually_exclusive_group()
+    cache.add_argument("--no-cache", action="store_true")
+    cache.add_argument("--delta", action="store_true")
+    args = ap.parse_args(argv)
+    if args.append:
+        snapdeal.check_appendable(ap, args.output, args.format, args.memberships)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = args.workdir or os.path.splitext(args.output.rstrip("/" + os.sep))[0] + "_shards"
+    os.makedirs(workdir, exist_ok=True)
+    split = max(1, args.split_subcats)
+    subcats = discover_all(snapdeal.BASE_SECTIONS, workdir, args.resume) if split > 1 else None
+    shards = plan_shards(snapdeal.BASE_SECTIONS, split, subcats)
+    extra = [flag for flag, on in (("--resume", args.resume), ("--no-cache", args.no_cache),
+                                   ("--delta", args.delta)) if on]
+    procs = max(1, min(args.procs, len(shards)))
+    print(f"{len(shards)} shards on {procs} processes, work dir {workdir}")
+
+    # spawn: Chrome and the background threads in this process don't survive fork
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    printer = threading.Thread(target=report_progress, args=(queue, len(shards)), daemon=True)
+    printer.start()
+    t0 = time.perf_counter()
+    failed = []
+    # one process per shard: snapdeal's module state (selector winners, metrics,
+    # pacers) must not leak from one shard into the next
+    with ProcessPoolExecutor(procs, mp_context=ctx, initializer=_init_worker,
+                             initargs=(queue,), max_tasks_per_child=1) as pool:
+        futures = {pool.submit(run_shard, s, workdir, extra): s for s in shards}
+        for fut in as_completed(futures):
+            shard = futures[fut]
+            try:
+                name, secs = fut.result()
+                queue.put(("done", name, secs))
+            except Exception as e:
+                failed.append(shard.name)
+                queue.put(("failed", shard.name, repr(e)))
+    queue.put(None)
+    printer.join()
+
+    memberships = args.memberships or snapdeal.memberships_path(args.output, args.format)
+    if failed and args.append:
+        # appended rows can't be taken back: merge once, after --resume finishes the rest
+        print(f"\n✘ {len(failed)} shard(s) failed ({', '.join(failed)}); nothing appended to "
+              f"{args.output}. See their logs in {workdir} and rerun with --resume --append")
+        return 1
+    n_rows, n_members = merge(shards, workdir, args.output, memberships, args.format,
+                              append=args.append)
+    print(f"\n✔ Done in {time.perf_counter() - t0:.0f}s. Rows: {n_rows}  →  {args.output}")
+    print(f"  Listings: {n_members}  →  {memberships}")
+    if failed:
+        print(f"  {len(failed)} shard(s) failed ({', '.join(failed)}); "
+              f"see their logs in {workdir} and rerun with --resume")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
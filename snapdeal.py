@@ -1,26 +1,63 @@
-import time
+import argparse
+import os
 import re
 from datetime import datetime
 from urllib.parse import urlparse
-import pandas as pd
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+
+from browser import make_driver
+from deep_pool import DeepScrapePool
+from http_fetcher import HttpDetailFetcher
+from image_pipeline import ImagePipeline
+from price_history import PriceHistory
+from crawl_state import CrawlState
+from readiness import (
+    CARD_SELECTOR, wait_until_settled, scroll_until_stable, wait_for_url_change
+)
+from row_sink import open_sink, sink_format, SINKS, MEMBERSHIP_COLUMNS, ProductRow
+from detail_cache import (
+    DetailCache, content_hash, FINGERPRINT_FIELDS, DELTA_FINGERPRINT_FIELDS
+)
+from metrics import timer, incr, start_reporter
+from rate_control import CONTROLLER, Pacer, classify, BLOCKED
+from selector_resolver import RESOLVER
+from audience import CLASSIFIER as AUDIENCE
+from pagination import NEXT_SELECTORS, infer_pattern, next_page_href
+from urls import layout_key, canonical_product_url, product_key
+from listing_parser import (
+    clean_int, parse_rating_from_style, parse_listing_cards, count_listing_cards, empty_detail
+)
 
 
 # ===================== CONFIG =====================
 OUTPUT_CSV = "snapdeal_products.csv"
+STATE_DB = "snapdeal_crawl.sqlite"   # crawl frontier/checkpoints for --resume
+SINK_BATCH_ROWS = 200        # rows buffered before the output file is written
+SINK_FLUSH_SECS = 30         # ...or at least this often
+DETAIL_CACHE_DB = "snapdeal_detail_cache.sqlite"
+DETAIL_CACHE_TTL = 7 * 24 * 3600      # seconds a cached product detail stays fresh
+DETAIL_CACHE_MAX_ENTRIES = 200_000    # LRU-evicted beyond this
+DETAIL_CACHE_CHECK_LISTING = True     # re-scrape when price/discount on the card changed
+DELTA_DB = "snapdeal_snapshots.sqlite"  # last-seen card + details per product, for --delta
+METRICS_EVERY = 60           # seconds between printed metrics summaries
 HEADLESS = True
-SCROLL_PAUSE = 0.8
+LEAN_BROWSER = False         # block images/media/fonts and non-Snapdeal hosts (opt-in: bench_lean.py)
+SCROLL_PAUSE = 0.8           # max seconds to wait for more cards after each scroll
+SETTLE_QUIET = 0.25          # seconds of DOM/network silence that count as "settled"
 LISTING_WAIT = 10            # seconds for listing to appear
 PRODUCT_WAIT = 10            # seconds for product page
 MAX_PAGES_PER_SUBCAT = 5     # pages per subcategory
 DEEP_SCRAPE = True           # visit each product page for max columns
+DEEP_WORKERS = 4             # parallel headless browsers for deep scrape (1 = serial, in-tab)
+HTTP_FIRST = True            # fetch product pages over plain HTTP, browser only as fallback
+HTTP_CONCURRENCY = 16        # simultaneous HTTP requests per host to start with...
+HTTP_MAX_CONCURRENCY = 64    # ...and the most the rate controller may open up to
+ADAPTIVE_RATE = True         # pace browser page loads per host (AIMD); blocks are detected either way
+BLOCK_RETRIES = 2            # reloads of a blocked or failing listing page before leaving it for --resume
+PARALLEL_PAGES = True        # work out page URLs and fetch them concurrently; click through if that fails
 LEFT_X_THRESHOLD = 420       # px: anchors with x < this are considered in left filter panel
 MAX_PRODUCTS_PER_SUBCAT = None  # None for unlimited; or set e.g. 200
 
@@ -35,53 +72,79 @@ BASE_SECTIONS = {
 
 
 # ---------- Selenium setup ----------
-chrome_opts = Options()
-if HEADLESS:
-    # newer headless is more stable
-    chrome_opts.add_argument("--headless=new")
-chrome_opts.add_argument("--disable-gpu")
-chrome_opts.add_argument("--window-size=1920,1080")
-chrome_opts.add_argument("--no-sandbox")
-chrome_opts.add_argument("--disable-dev-shm-usage")
-
-driver = webdriver.Chrome(
-    service=Service(ChromeDriverManager().install()),
-    options=chrome_opts
-)
-wait = WebDriverWait(driver, LISTING_WAIT)
-
-def human_sleep(sec):
-    time.sleep(sec)
+# created by start_browsers() so importing this module doesn't launch Chrome
+driver = None
+deep_pool = None
+http_fetcher = None
+detail_cache = None   # opened in main() unless --no-cache
+delta_mode = False    # --delta: detail_cache holds last-run snapshots
+seen_products = set()     # product keys that already have a row in this crawl
+membership_sink = None    # (product, section, subcategory, page) rows
+image_sink = None         # ImagePipeline when --images is given
+history_sink = None       # PriceHistory when --history is given
+subcat_plan = None        # {section: [{"Subcategory", "URL"}]}: crawl exactly these (sharded_crawl.py)
+on_page = None            # progress hook: on_page(subcategory, page, rows) after each commit
+pacers = {}               # host -> Pacer for the main browser
+
+def start_browsers():
+    global driver, deep_pool, http_fetcher
+    driver = make_driver(HEADLESS, lean=LEAN_BROWSER)
+
+    # product pages are fetched by a pool of extra browsers when DEEP_WORKERS > 1
+    if DEEP_SCRAPE and DEEP_WORKERS > 1:
+        deep_pool = DeepScrapePool(DEEP_WORKERS, page_timeout=PRODUCT_WAIT,
+                                   headless=HEADLESS, lean=LEAN_BROWSER).start()
+
+    # ...and over plain HTTP first when HTTP_FIRST is on (listing pages too, with PARALLEL_PAGES)
+    if (DEEP_SCRAPE and HTTP_FIRST) or PARALLEL_PAGES:
+        http_fetcher = HttpDetailFetcher(HTTP_CONCURRENCY, timeout=PRODUCT_WAIT,
+                                         max_concurrency=HTTP_MAX_CONCURRENCY)
+
+def stop_browsers():
+    global driver, deep_pool, http_fetcher
+    if http_fetcher is not None:
+        print(f"  HTTP detail fallbacks to browser: {http_fetcher.fallbacks}")
+        http_fetcher.close()
+        http_fetcher = None
+    if deep_pool is not None:
+        if deep_pool.abandoned:
+            print(f"  Deep-scrape jobs abandoned (worker hung, replaced): {deep_pool.abandoned}")
+        deep_pool.close()
+        deep_pool = None
+    if driver is not None:
+        driver.quit()
+        driver = None
 
 def scroll_to_bottom():
-    last = driver.execute_script("return document.body.scrollHeight")
-    while True:
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        human_sleep(SCROLL_PAUSE)
-        new = driver.execute_script("return document.body.scrollHeight")
-        if new == last:
-            break
-        last = new
-
-def clean_int(text: str) -> int:
-    """Extract first integer from text, else 0."""
-    if not text:
-        return 0
-    nums = re.findall(r"\d+", text)
-    return int(nums[0]) if nums else 0
-
-def parse_rating_from_style(style: str) -> str:
-    """
-    Some ratings are shown as stars with style='width: 86%'.
-    Convert % to 0-5 scale: rating ≈ round(percent/20, 1)
-    """
-    if not style:
-        return ""
-    m = re.search(r"(\d+(?:\.\d+)?)\s*%", style)
-    if not m:
-        return ""
-    pct = float(m.group(1))
-    return f"{round(pct/20, 1)}"
+    """Scroll until no more cards load; moves on as soon as each batch has settled."""
+    with timer("scroll"):
+        scroll_until_stable(driver, CARD_SELECTOR, max_wait=SCROLL_PAUSE, quiet=SETTLE_QUIET)
+
+def pacer_for(url):
+    host = urlparse(url).hostname or ""
+    pacer = pacers.get(host)
+    if pacer is None:
+        pacer = pacers[host] = Pacer(CONTROLLER, host, "main")
+    return pacer
+
+def get_page(url):
+    if ADAPTIVE_RATE:
+        with timer("rate_wait"):
+            pacer_for(url).wait()
+    with timer("driver_get"):
+        driver.get(url)
+
+def record_listing(url, cards):
+    """Classify the listing the browser is on (block page, empty, ok) for the rate controller."""
+    html = None
+    if not cards:
+        try:
+            html = driver.page_source
+        except Exception:
+            pass
+    outcome = classify(html=html, cards=cards)
+    pacer_for(url).record(outcome)
+    return outcome
 
 def safe_text(el):
     try:
@@ -89,15 +152,35 @@ def safe_text(el):
     except:
         return ""
 
-def find_first(selector_list, in_el=None, attr=None, by=By.CSS_SELECTOR):
-    """Try multiple selectors; return text or attribute when found."""
-    ctx = in_el if in_el is not None else driver
-    for sel in selector_list:
+def element_probe(ctx, attr=None, by=By.CSS_SELECTOR):
+    """probe(selector) for the resolver: value of the first match, None if nothing matches."""
+    def probe(sel):
+        # find_elements returns [] on a miss instead of raising
+        found = ctx.find_elements(by, sel)
+        if not found:
+            return None
         try:
-            el = ctx.find_element(by, sel)
-            return el.get_attribute(attr).strip() if attr else el.text.strip()
+            val = found[0].get_attribute(attr) if attr else found[0].text
         except:
-            continue
+            return None
+        return val.strip() if val is not None else None
+    return probe
+
+def find_first(selector_list, in_el=None, attr=None, by=By.CSS_SELECTOR, field=None, layout=""):
+    """
+    Try multiple selectors; return text or attribute when found.
+    With `field` set, the selector that matched last time on this `layout`
+    is tried first and the hit (or miss) is recorded in metrics.
+    """
+    ctx = in_el if in_el is not None else driver
+    probe = element_probe(ctx, attr, by)
+    with timer("find_first"):
+        if field:
+            return RESOLVER.resolve(field, selector_list, probe, layout=layout) or ""
+        for sel in selector_list:
+            val = probe(sel)
+            if val is not None:
+                return val
     return ""
 
 def find_all(selector, in_el=None, by=By.CSS_SELECTOR):
@@ -107,56 +190,167 @@ def find_all(selector, in_el=None, by=By.CSS_SELECTOR):
     except:
         return []
 
-def get_left_subcategory_links():
-    """
-    Collect visible subcategory links from the left panel on a search page.
-    We use broad selectors + coordinate filtering (x < LEFT_X_THRESHOLD).
-    """
+# every link on the page in one round-trip: absolute href, rendered text
+# (empty when not displayed, like WebElement.text) and page x coordinate
+ANCHORS_JS = """
+return Array.from(document.querySelectorAll('a[href]'), a => {
+    const r = a.getBoundingClientRect();
+    const shown = a.getClientRects().length > 0;
+    return {href: a.href, text: shown ? a.innerText : '', x: r.left + window.scrollX};
+});
+"""
+
+NON_CATEGORY_WORDS = [
+    "price", "brand", "rating", "size", "color", "discount",
+    "customer", "ship", "cod", "delivery", "availability", "seller",
+    "apply", "clear", "sort", "view", "more", "less", "newest",
+    "4★", "3★", "2★", "1★"
+]
+
+
+def filter_subcategory_links(anchors):
+    """Keep left-panel Snapdeal category/search links from [{href, text, x}] dicts."""
     subcats = []
-    anchors = driver.find_elements(By.XPATH, "//a[@href]")
     seen = set()
-
     for a in anchors:
-        try:
-            href = a.get_attribute("href") or ""
-            text = a.text.strip()
-            if not text or len(text) > 60 or len(text) < 3:
-                continue
+        href = a.get("href") or ""
+        text = (a.get("text") or "").strip()
+        if not text or len(text) > 60 or len(text) < 3:
+            continue
 
-            # Consider only SNAPDEAL links that look like category/search
-            netloc = urlparse(href).netloc or ""
-            if "snapdeal" not in netloc:
-                continue
-            if ("/products/" not in href) and ("/search" not in href):
-                continue
+        # Consider only SNAPDEAL links that look like category/search
+        netloc = urlparse(href).netloc or ""
+        if "snapdeal" not in netloc:
+            continue
+        if ("/products/" not in href) and ("/search" not in href):
+            continue
 
-            # left-panel coordinate heuristic
-            loc = a.location
-            if loc and isinstance(loc.get("x", None), (int, float)) and loc["x"] < LEFT_X_THRESHOLD:
-                key = (text, href)
-                if key in seen:
-                    continue
-                # filter out obvious non-category filters (price ranges, ratings stars text)
-                lower = text.lower()
-                if any(kw in lower for kw in [
-                    "price", "brand", "rating", "size", "color", "discount",
-                    "customer", "ship", "cod", "delivery", "availability", "seller",
-                    "apply", "clear", "sort", "view", "more", "less", "newest",
-                    "4★", "3★", "2★", "1★"
-                ]):
-                    continue
-                # avoid purely numeric/count links
-                if re.fullmatch(r"\d[\d,\. ]*", text):
-                    continue
-
-                subcats.append({"Subcategory": text, "URL": href})
-                seen.add(key)
-        except Exception:
+        # left-panel coordinate heuristic
+        x = a.get("x")
+        if not isinstance(x, (int, float)) or x >= LEFT_X_THRESHOLD:
+            continue
+        key = (text, href)
+        if key in seen:
+            continue
+        # filter out obvious non-category filters (price ranges, ratings stars text)
+        lower = text.lower()
+        if any(kw in lower for kw in NON_CATEGORY_WORDS):
+            continue
+        # avoid purely numeric/count links
+        if re.fullmatch(r"\d[\d,\. ]*", text):
             continue
 
+        subcats.append({"Subcategory": text, "URL": href})
+        seen.add(key)
     return subcats
 
 
+def get_left_subcategory_links():
+    """
+    Collect visible subcategory links from the left panel on a search page.
+    We use broad selectors + coordinate filtering (x < LEFT_X_THRESHOLD);
+    all anchors come back from a single execute_script call.
+    """
+    try:
+        anchors = driver.execute_script(ANCHORS_JS) or []
+    except Exception:
+        return []
+    return filter_subcategory_links(anchors)
+
+
+def next_link_href():
+    """Absolute href of the current page's next-page link, or ""."""
+    for sel in NEXT_SELECTORS:
+        try:
+            for el in driver.find_elements(By.CSS_SELECTOR, sel):
+                href = el.get_attribute("href")
+                if href and not href.startswith("javascript:"):
+                    return href
+        except:
+            continue
+    return ""
+
+
+def plan_pages(page, page_url, seen_cards):
+    """
+    The pages after `page`, fetched concurrently over HTTP, as
+    [(page number, url, (final_url, html) or None)]. None when the URLs
+    can't be worked out from the next link, or when this page's static
+    HTML has fewer cards than the browser saw (cards load by script).
+    """
+    if http_fetcher is None or page >= MAX_PAGES_PER_SUBCAT:
+        return None
+    pattern = infer_pattern(page_url, next_link_href())
+    if pattern is None:
+        return None
+    # relative numbering: the current page is 1 in the pattern
+    urls = pattern.urls(1, MAX_PAGES_PER_SUBCAT - page + 1)
+    with timer("pages_http"):
+        got = http_fetcher.fetch_pages(urls)
+    if got[0] is None:
+        return None
+    # the browser already scraped this page: only count its static cards
+    static_cards = count_listing_cards(got[0][1])
+    if MAX_PRODUCTS_PER_SUBCAT:
+        static_cards = min(static_cards, MAX_PRODUCTS_PER_SUBCAT)
+    if static_cards < seen_cards:
+        return None
+    return [(page + k, url, g) for k, (url, g) in enumerate(zip(urls, got)) if k]
+
+
+def crawl_planned_pages(section_name, sc, pages, state, sink):
+    """
+    Scrape pre-fetched pages in order, committing each. Returns
+    (page, url, rows) where page/url say where the browser has to take
+    over (a request failed); both are None when the subcategory is finished.
+    """
+    rows = 0
+    for i, (page, url, got) in enumerate(pages):
+        if got is None:
+            return page, url, rows
+        final_url, html = got
+        print(f"   • Page {page}")
+        try:
+            items, members = scrape_listing_cards(section_name, sc["Subcategory"], page,
+                                                  max_take=MAX_PRODUCTS_PER_SUBCAT, state=state,
+                                                  html=html, page_url=final_url)
+        except DetailFetchFailed as e:
+            print(f"     – {e}; handing the page to the browser")
+            return page, url, rows
+        incr("pages")
+        incr("pages_direct")
+        if not items and not members:
+            print("     – No products found on this page.")
+            state.commit_page(sc["id"], page, url, [])
+            return None, None, rows
+        has_next = i + 1 < len(pages) and bool(next_page_href(html, final_url))
+        commit_page(state, sink, sc, page, url, items, members,
+                    next_url=pages[i + 1][1] if has_next else None)
+        rows += len(items)
+        if not has_next:
+            print("     – No Next button or reached last page.")
+            break
+    return None, None, rows
+
+
+def commit_page(state, sink, sc, page, url, items, members, next_url=None):
+    """Checkpoint a page (rows + memberships together) and stream it to the outputs."""
+    with timer("state_commit"):
+        state.commit_page(sc["id"], page, url, items, next_url=next_url, memberships=members)
+    with timer("sink_write"):
+        sink.write_many(items)
+        if membership_sink is not None:
+            membership_sink.write_many(members)
+    if image_sink is not None:
+        image_sink.write_many(items)
+    if history_sink is not None:
+        with timer("history_write"):
+            history_sink.write_many(items)
+    incr("rows", len(items))
+    if on_page is not None:
+        on_page(sc["Subcategory"], page, len(items))
+
+
 def click_next_page():
     """Try multiple ways to go to the next page. Return True if navigated."""
     selectors = [
@@ -174,13 +368,9 @@ def click_next_page():
             else:
                 cand = driver.find_element(By.CSS_SELECTOR, sel)
             driver.execute_script("arguments[0].click();", cand)
-            human_sleep(1.2)
-            # wait for URL change or new content
-            try:
-                WebDriverWait(driver, 6).until(EC.url_changes(curr_url))
-            except:
-                pass
-            if driver.current_url != curr_url:
+            # returns the moment the URL changes, then waits for the new cards
+            if wait_for_url_change(driver, curr_url, timeout=6):
+                wait_for_listing()
                 return True
         except:
             continue
@@ -192,16 +382,7 @@ def deep_scrape_product(url):
     Open product in a new tab and extract rich details.
     Returns dict with many optional fields (empty if not found).
     """
-    data = {
-        "Brand": "",
-        "Full Description": "",
-        "Seller": "",
-        "Availability": "",
-        "Rating": "",
-        "Reviews Count": 0,
-        "Breadcrumb": "",
-        "Image URLs (detail)": ""
-    }
+    data = empty_detail()
     if not url:
         return data
 
@@ -215,21 +396,24 @@ def deep_scrape_product(url):
                 driver.switch_to.window(h)
                 break
 
+        layout = layout_key(url)
+
         # brand (multiple fallbacks)
         data["Brand"] = find_first([
             "span[itemprop='brand']",
             "a#brand",
             ".pdp-e-i-brand a",
             ".pdp-e-i-brand",  # sometimes plain text
-        ])
+        ], field="Brand", layout=layout)
 
         # rating (try numeric or from star width)
         rating_val = find_first([
             "span[itemprop='ratingValue']",
             ".pdp-e-i-rating",        # sometimes plain text
-        ])
+        ], field="Rating", layout=layout)
         if not rating_val:
-            style = find_first([".filled-stars"], attr="style")
+            style = find_first([".filled-stars"], attr="style", field="Rating Style",
+                               layout=layout)
             rating_val = parse_rating_from_style(style)
         data["Rating"] = rating_val
 
@@ -239,7 +423,7 @@ def deep_scrape_product(url):
             ".pdp-review-count",
             ".product-review-count",
             ".rating-count"
-        ])
+        ], field="Reviews Count", layout=layout)
         data["Reviews Count"] = clean_int(rc_text)
 
         # availability
@@ -247,7 +431,7 @@ def deep_scrape_product(url):
             ".sold-out-err",
             "#isCODMsg",
             ".availability-msg"
-        ])
+        ], field="Availability", layout=layout)
         data["Availability"] = avail or "In Stock"
 
         # seller
@@ -255,7 +439,7 @@ def deep_scrape_product(url):
             "#sellerName",
             ".pdp-seller-info a",
             ".pdp-seller-info"
-        ])
+        ], field="Seller", layout=layout)
 
         # full description / specs (pick the biggest chunk)
         description_candidates = [
@@ -266,12 +450,9 @@ def deep_scrape_product(url):
             ".spec-body",
             ".details-info",
         ]
-        body = ""
-        for sel in description_candidates:
-            txt = find_first([sel])
-            if txt and len(txt) > len(body):
-                body = txt
-        data["Full Description"] = body
+        with timer("find_first"):
+            data["Full Description"] = RESOLVER.resolve_longest(
+                "Full Description", description_candidates, element_probe(driver), layout=layout)
 
         # breadcrumb
         crumbs = find_all("ul.breadcrumb li")
@@ -304,180 +485,436 @@ def deep_scrape_product(url):
     return data
 
 
-def scrape_listing_cards(category_name, subcat_name, page_num, max_take=None):
-    """Scrape all cards on current listing page; deep-scrape each product if enabled."""
-    items = []
-    cards = find_all("div.product-tuple-listing")
-    if not cards:
-        # fallback older class
-        cards = find_all("div.product-tuple")
+class DetailFetchFailed(Exception):
+    """Some product pages of a listing page timed out or lost their browser."""
 
-    for idx, card in enumerate(cards, start=1):
-        if max_take and len(items) >= max_take:
-            break
 
-        # Listing-level fields
-        name = find_first(["p.product-title"], in_el=card) or ""
-        price = find_first(["span.product-price"], in_el=card) or ""
-        original_price = find_first(
-            ["span.product-desc-price.strike", "span.lfloat.product-desc-price.strike"],
-            in_el=card
-        )
-        discount = find_first(["div.product-discount", "span.product-discount"], in_el=card)
-        rating_list = find_first(["p.prod-rating", ".rating"], in_el=card)
-        rating_style = find_first([".filled-stars"], in_el=card, attr="style")
-        if not rating_list and rating_style:
-            rating_list = parse_rating_from_style(rating_style)
-
-        rev_text = find_first(["p.product-rating-count", ".rating-count"], in_el=card)
-        reviews_count = clean_int(rev_text)
-
-        img = find_first(["img.product-image"], in_el=card, attr="src")
-        if not img:
-            img = find_first(["img"], in_el=card, attr="src")
-
-        # URL: prefer dp-widget-link if present, else first <a>
-        url = find_first(["a.dp-widget-link"], in_el=card, attr="href")
-        if not url:
-            try:
-                url = card.find_element(By.TAG_NAME, "a").get_attribute("href")
-            except:
-                url = ""
-
-        short_desc = find_first(["p.product-desc-rating"], in_el=card) or ""
-
-        # audience classifier
-        text_for_audience = f"{name} {short_desc}".lower()
-        if any(k in text_for_audience for k in ["women", "girl", "ladies", "female"]):
-            audience = "Female"
-        elif any(k in text_for_audience for k in ["men", "boy", "male"]):
-            audience = "Male"
-        elif any(k in text_for_audience for k in ["kid", "child", "children"]):
-            audience = "Children"
-        else:
-            audience = "Unspecified"
-
-        # deep details
-        extra = deep_scrape_product(url) if DEEP_SCRAPE and url else {
-            "Brand": "",
-            "Full Description": "",
-            "Seller": "",
-            "Availability": "",
-            "Rating": "",
-            "Reviews Count": 0,
-            "Breadcrumb": "",
-            "Image URLs (detail)": ""
-        }
+def fetch_details(urls, hashes=None):
+    """
+    Detail dicts for `urls`, in the same order. Cached details are used
+    as-is; for the rest plain HTTP goes first when enabled, and pages it
+    can't fully parse go to the browser pool, or to this browser's tabs
+    when running serially. A None entry is a fetch that failed.
+    """
+    if not DEEP_SCRAPE:
+        return [empty_detail() for _ in urls]
+
+    hashes = hashes or [None] * len(urls)
+    if detail_cache is not None:
+        with timer("cache_lookup"):
+            details = detail_cache.get_many(urls, hashes)
+    else:
+        details = [None] * len(urls)
+    misses = [i for i, d in enumerate(details) if d is None]
+    incr("details_fetched", len(misses))
+    incr("details_reused", len(urls) - len(misses))
+    fetched = fetch_uncached([urls[i] for i in misses])
+    for i, d in zip(misses, fetched):
+        details[i] = d
+    if detail_cache is not None:
+        detail_cache.put_many([urls[i] for i in misses], fetched, [hashes[i] for i in misses])
+    return details
+
+
+def fetch_uncached(urls):
+    if http_fetcher is not None and HTTP_FIRST:
+        with timer("details_http"):
+            details = http_fetcher.fetch(urls)
+    else:
+        details = [None] * len(urls)
+    todo = [i for i, d in enumerate(details) if d is None]
+    todo_urls = [urls[i] for i in todo]
+    incr("details_via_browser", len(todo_urls))
+    if deep_pool is not None:
+        with timer("details_pool"):
+            browser_details = deep_pool.map(todo_urls)
+    else:
+        browser_details = []
+        for u in todo_urls:
+            with timer("detail_tab"):
+                browser_details.append(deep_scrape_product(u) if u else empty_detail())
+    for i, d in zip(todo, browser_details):
+        details[i] = d
+    return details
+
+
+def scrape_listing_cards(category_name, subcat_name, page_num, max_take=None, state=None,
+                         html=None, page_url=None):
+    """
+    Parse all cards on current listing page (or on `html` fetched from
+    `page_url`); deep-scrape each product if enabled.
+
+    Returns (rows, memberships). Every card with a URL gets a membership
+    row; only products not seen earlier in the crawl get a full row (and a
+    deep scrape).
+    """
+    items = []
+    # one page_source grab, then every field of every card is parsed locally
+    if html is None:
+        with timer("page_source"):
+            html = driver.page_source
+        page_url = driver.current_url
+    with timer("parse_listing"):
+        cards = parse_listing_cards(html, base_url=page_url, max_take=max_take)
+
+    members, fresh = [], []
+    for card in cards:
+        card["Product URL"] = canonical_product_url(card["Product URL"])
+        key = product_key(card["Product URL"])
+        if key:
+            members.append({
+                "Product Key": key, "Product URL": card["Product URL"],
+                "Top Section": category_name, "Subcategory": subcat_name, "Page": page_num,
+            })
+            if key in seen_products:
+                continue
+            seen_products.add(key)
+        fresh.append(card)
+    incr("products_deduped", len(cards) - len(fresh))
+    cards = fresh
+
+    urls = [card["Product URL"] for card in cards]
+    if state is not None:
+        state.add_products(urls)
+    hashes = None
+    if DETAIL_CACHE_CHECK_LISTING or delta_mode:
+        fields = DELTA_FINGERPRINT_FIELDS if delta_mode else FINGERPRINT_FIELDS
+        hashes = [content_hash(card, fields) for card in cards]
+    with timer("fetch_details"):
+        details = fetch_details(urls, hashes)
+    failed = sum(d is None for d in details)
+    if failed:
+        # nothing from this page is committed: a retry (or --resume) fetches them all again
+        for card in cards:
+            seen_products.discard(product_key(card["Product URL"]))
+        incr("detail_failures", failed)
+        raise DetailFetchFailed(f"{failed} of {len(details)} product pages failed")
+
+    scraped_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")   # one shared string per page
+    audiences = AUDIENCE.classify_many(
+        f"{card['Product Name']} {card['Short Description']}" for card in cards)
+    for card, extra, audience in zip(cards, details, audiences):
+        name = card["Product Name"]
+        price = card["Price"]
+        original_price = card["Original Price"]
+        discount = card["Discount"]
+        rating_list = card["Rating (listing)"]
+        reviews_count = card["Reviews Count (listing)"]
+        img = card["Image URL (listing)"]
+        url = card["Product URL"]
+        short_desc = card["Short Description"]
 
         # if Brand still empty, try name-leading token as heuristic
         if not extra.get("Brand"):
             extra["Brand"] = name.split()[0] if name else ""
 
-        row = {
-            "Scraped At": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "Top Section": category_name,
-            "Subcategory": subcat_name,
-            "Product Name": name,
-            "Brand (heuristic/listing)": extra.get("Brand", ""),
-            "Price": price,
-            "Original Price": original_price,
-            "Discount": discount,
-            "Rating (listing)": rating_list,
-            "Rating (detail)": extra.get("Rating", ""),
-            "Reviews Count (listing)": reviews_count,
-            "Reviews Count (detail)": extra.get("Reviews Count", 0),
-            "Target Audience": audience,
-            "Availability": extra.get("Availability", ""),
-            "Seller": extra.get("Seller", ""),
-            "Product URL": url,
-            "Image URL (listing)": img,
-            "Image URLs (detail)": extra.get("Image URLs (detail)", ""),
-            "Short Description": short_desc,
-            "Full Description": extra.get("Full Description", ""),
-            "Breadcrumb": extra.get("Breadcrumb", ""),
-            "Page": page_num
-        }
+        row = ProductRow(
+            scraped_at=scraped_at,
+            top_section=category_name,
+            subcategory=subcat_name,
+            product_name=name,
+            brand_heuristic_listing=extra.get("Brand", ""),
+            price=price,
+            original_price=original_price,
+            discount=discount,
+            rating_listing=rating_list,
+            rating_detail=extra.get("Rating", ""),
+            reviews_count_listing=reviews_count,
+            reviews_count_detail=extra.get("Reviews Count", 0),
+            target_audience=audience,
+            availability=extra.get("Availability", ""),
+            seller=extra.get("Seller", ""),
+            product_url=url,
+            image_url_listing=img,
+            image_urls_detail=extra.get("Image URLs (detail)", ""),
+            short_description=short_desc,
+            full_description=extra.get("Full Description", ""),
+            breadcrumb=extra.get("Breadcrumb", ""),
+            page=page_num,
+        )
         items.append(row)
 
-    return items
+    return items, members
 
 
 # ===================== MAIN =====================
-all_rows = []
 
-for section_name, base_url in BASE_SECTIONS.items():
-    print(f"\n=== Section: {section_name} ===")
-    driver.get(base_url)
-    # wait for any product list (ensures page is settled)
+def wait_for_listing():
+    # wait for the product list to appear and the page to go quiet
     try:
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.product-tuple-listing")))
-    except:
-        pass
-
-    # find subcategory links from left panel
-    subcats = get_left_subcategory_links()
-    # de-dup & keep stable order
-    seen_sc = set()
-    cleaned_subcats = []
-    for sc in subcats:
-        key = (sc["Subcategory"], sc["URL"])
-        if key not in seen_sc:
-            cleaned_subcats.append(sc)
-            seen_sc.add(key)
-
-    if not cleaned_subcats:
-        # fallback: at least scrape the base section itself
-        cleaned_subcats = [{"Subcategory": "(All)", "URL": base_url}]
+        with timer("wait_listing"):
+            wait_until_settled(driver, CARD_SELECTOR, timeout=LISTING_WAIT, quiet=SETTLE_QUIET)
+    except Exception:
+        # a dead page shows up as an empty/blocked listing in record_listing()
+        incr("listing_wait_errors")
 
-    print(f"Found {len(cleaned_subcats)} subcategories")
 
-    for sc in cleaned_subcats:
-        sub_name = sc["Subcategory"]
-        sub_url = sc["URL"]
+def discover_subcats(section_name, base_url, state):
+    """
+    Subcategories for a section: from the state DB if known, else from
+    `subcat_plan` when a parent process already found them, else from the
+    left panel.
+    """
+    if state.section_status(section_name) == "pending" and subcat_plan is not None:
+        state.add_subcats(section_name, subcat_plan.get(section_name, []))
+    elif state.section_status(section_name) == "pending":
+        get_page(base_url)
+        wait_for_listing()
+
+        # find subcategory links from left panel
+        with timer("subcat_discovery"):
+            subcats = get_left_subcategory_links()
+        # de-dup & keep stable order
+        seen_sc = set()
+        cleaned_subcats = []
+        for sc in subcats:
+            key = (sc["Subcategory"], sc["URL"])
+            if key not in seen_sc:
+                cleaned_subcats.append(sc)
+                seen_sc.add(key)
+
+        if not cleaned_subcats:
+            # fallback: at least scrape the base section itself
+            cleaned_subcats = [{"Subcategory": "(All)", "URL": base_url}]
+        state.add_subcats(section_name, cleaned_subcats)
+
+    return state.subcats(section_name)
+
+
+def crawl_subcat(section_name, sc, state, sink):
+    """
+    Scrape one subcategory from its checkpointed page onwards, committing
+    each page. False if it was left unfinished because the site kept
+    serving block pages or product pages kept failing.
+    """
+    sub_name = sc["Subcategory"]
+    start_page = sc["next_page"]
+    if start_page > 1:
+        print(f"\n→ Subcategory: {sub_name} (resuming at page {start_page})")
+    else:
         print(f"\n→ Subcategory: {sub_name}")
-        driver.get(sub_url)
-        # small wait for products to appear
+    get_page(sc["next_url"] or sc["URL"])
+    # small wait for products to appear
+    wait_for_listing()
+
+    total_this_sub = 0
+    page = start_page
+    planned = not PARALLEL_PAGES
+    retries = 0
+    while page <= MAX_PAGES_PER_SUBCAT:
+        print(f"   • Page {page}")
+        page_url = driver.current_url
+        scroll_to_bottom()
         try:
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.product-tuple-listing")))
-        except:
-            pass
+            items, members = scrape_listing_cards(section_name, sub_name, page,
+                                                  max_take=MAX_PRODUCTS_PER_SUBCAT, state=state)
+        except DetailFetchFailed as e:
+            problem = str(e)
+        else:
+            incr("pages")
+            problem = "blocked" if record_listing(page_url, len(members)) == BLOCKED else None
+        if problem:
+            if retries >= BLOCK_RETRIES:
+                print(f"     – Still failing ({problem}) after {retries} retries; "
+                      f"leaving '{sub_name}' from page {page} for --resume.")
+                return False
+            retries += 1
+            print(f"     – {problem}; retrying the page")
+            get_page(page_url)      # waits out the host's cooldown first
+            wait_for_listing()
+            continue
+        retries = 0
+        if not items and not members:
+            print("     – No products found on this page.")
+            state.commit_page(sc["id"], page, page_url, [])
+            break
 
-        total_this_sub = 0
-        for page in range(1, MAX_PAGES_PER_SUBCAT + 1):
-            print(f"   • Page {page}")
-            scroll_to_bottom()
-            items = scrape_listing_cards(section_name, sub_name, page,
-                                         max_take=MAX_PRODUCTS_PER_SUBCAT)
-            if not items:
-                print("     – No products found on this page.")
+        # plan the remaining page URLs once; click through if that fails
+        pages = None
+        if not planned:
+            planned = True
+            with timer("pagination_plan"):
+                pages = plan_pages(page, page_url, len(members))
+        if pages:
+            moved, next_url = True, pages[0][1]
+        else:
+            with timer("pagination"):
+                moved = click_next_page()
+            next_url = driver.current_url if moved else None
+
+        # commit rows + checkpoint together
+        commit_page(state, sink, sc, page, page_url, items, members, next_url=next_url)
+        total_this_sub += len(items)
+
+        if pages:
+            page, url, rows = crawl_planned_pages(section_name, sc, pages, state, sink)
+            total_this_sub += rows
+            if page is None:
                 break
+            # HTTP couldn't serve this page: load it here and click on from there
+            get_page(url)
+            wait_for_listing()
+            continue
+        if not moved:
+            print("     – No Next button or reached last page.")
+            break
+        page += 1
 
-            all_rows.extend(items)
-            total_this_sub += len(items)
+    state.finish_subcat(sc["id"])
+    print(f"   Collected {total_this_sub} products from '{sub_name}'")
+    return True
 
-            # pagination
-            moved = click_next_page()
-            if not moved:
-                print("     – No Next button or reached last page.")
-                break
 
-        print(f"   Collected {total_this_sub} products from '{sub_name}'")
-
-# Write CSV (even if empty, with columns)
-columns = [
-    "Scraped At", "Top Section", "Subcategory",
-    "Product Name", "Brand (heuristic/listing)",
-    "Price", "Original Price", "Discount",
-    "Rating (listing)", "Rating (detail)",
-    "Reviews Count (listing)", "Reviews Count (detail)",
-    "Target Audience", "Availability", "Seller",
-    "Product URL", "Image URL (listing)", "Image URLs (detail)",
-    "Short Description", "Full Description", "Breadcrumb",
-    "Page"
-]
-df = pd.DataFrame(all_rows, columns=columns)
-df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8-sig")
+def crawl_section(section_name, base_url, state, sink):
+    print(f"\n=== Section: {section_name} ===")
+    if state.section_status(section_name) == "done":
+        print("Already done, skipping.")
+        return
 
-print(f"\n✔ Done. Rows: {len(df)}  →  {OUTPUT_CSV}")
+    subcats = discover_subcats(section_name, base_url, state)
+    print(f"Found {len(subcats)} subcategories")
 
-driver.quit()
+    complete = True
+    for sc in subcats:
+        if sc["status"] == "done":
+            continue
+        complete = crawl_subcat(section_name, sc, state, sink) and complete
+
+    if complete:
+        state.set_section_status(section_name, "done")
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Crawl Snapdeal search sections into a CSV.")
+    ap.add_argument("--resume", action="store_true",
+                    help="continue the crawl recorded in --state instead of starting over")
+    ap.add_argument("--state", default=STATE_DB,
+                    help=f"SQLite crawl state file (default: {STATE_DB})")
+    ap.add_argument("--output", default=OUTPUT_CSV,
+                    help=f"output path (default: {OUTPUT_CSV})")
+    ap.add_argument("--format", choices=sorted(SINKS),
+                    help="output format (default: from --output extension; a directory "
+                         "means a Parquet dataset partitioned by scrape date and section)")
+    ap.add_argument("--append", action="store_true",
+                    help="add this run to an existing output instead of replacing it "
+                         "(a dataset keeps earlier runs' files; a single .parquet can't append)")
+    ap.add_argument("--memberships", metavar="PATH",
+                    help="where each product was listed, one row per section/subcategory/page "
+                         "(default: <output>_memberships.<ext>, or a "
+                         "<output>_memberships/ dataset next to a dataset output)")
+    cache = ap.add_mutually_exclusive_group()
+    cache.add_argument("--no-cache", action="store_true",
+                       help="don't read or write the product detail cache")
+    cache.add_argument("--delta", action="store_true",
+                       help="deep-scrape only products that are new or whose listing card "
+                            f"changed since the last --delta run (snapshots in {DELTA_DB})")
+    ap.add_argument("--images", metavar="DIR",
+                    help="also download product images (content-addressed, with thumbnails) here")
+    ap.add_argument("--history", metavar="PATH",
+                    help="also append every row to this price-history store (SQLite; "
+                         "only price/rating changes are stored)")
+    ap.add_argument("--metrics-prom", metavar="PATH",
+                    help="keep a Prometheus text-format metrics file updated here")
+    ap.add_argument("--trace", metavar="PATH",
+                    help="write every timed stage as a Chrome trace-event JSON file")
+    args = ap.parse_args(argv)
+    if args.append and args.resume:
+        # a resume rewrites the output from the state DB; appending would duplicate it
+        ap.error("--append can't be combined with --resume")
+    if args.append:
+        check_appendable(ap, args.output, args.format, args.memberships)
+    return args
+
+
+def memberships_path(output, fmt=None):
+    if sink_format(output, fmt) == "dataset":
+        # a dataset of its own, so --append keeps earlier runs' memberships too
+        return output.rstrip("/" + os.sep) + "_memberships" + os.sep
+    stem, ext = os.path.splitext(output)
+    return f"{stem}_memberships{ext}"
+
+def memberships_format(fmt):
+    # a dataset output's memberships path ends in a separator, which picks "dataset"
+    return None if fmt == "dataset" else fmt
+
+def check_appendable(ap, output, fmt, memberships=None):
+    """--append needs an output and a memberships file that can both grow."""
+    memberships = memberships or memberships_path(output, fmt)
+    if sink_format(output, fmt) == "parquet":
+        ap.error("a single .parquet file can't be appended to; use a dataset directory")
+    if sink_format(memberships, memberships_format(sink_format(output, fmt))) == "parquet":
+        ap.error(f"--memberships {memberships} is a single .parquet file and can't be "
+                 f"appended to; use a directory (trailing /) or .csv / .jsonl")
+
+
+def main(argv=None):
+    global detail_cache, delta_mode, seen_products, membership_sink, image_sink, history_sink
+    args = parse_args(argv)
+    state = CrawlState(args.state, resume=args.resume)
+    state.add_sections(BASE_SECTIONS)
+    # rows stream to the output as pages finish (header written even if empty)
+    sink = open_sink(args.output, fmt=args.format, append=args.append,
+                     batch_size=SINK_BATCH_ROWS, flush_every=SINK_FLUSH_SECS)
+    members_out = args.memberships or memberships_path(args.output, args.format)
+    members_fmt = memberships_format(sink_format(args.output, args.format))
+    membership_sink = open_sink(members_out, fmt=members_fmt, columns=MEMBERSHIP_COLUMNS,
+                                append=args.append,
+                                batch_size=SINK_BATCH_ROWS, flush_every=SINK_FLUSH_SECS)
+    image_sink = ImagePipeline(args.images) if args.images else None
+    history_sink = PriceHistory(args.history) if args.history else None
+    seen_products = set()
+    if args.resume:
+        print(f"Resuming from {args.state}: {state.row_count()} rows already committed")
+        sink.write_many(state.iter_rows())
+        membership_sink.write_many(state.iter_memberships())
+        if image_sink is not None:
+            image_sink.write_many(state.iter_rows())    # manifest skips what's already stored
+        if history_sink is not None:
+            history_sink.write_many(state.iter_rows())  # sightings already recorded are skipped
+        seen_products = state.done_product_keys()
+
+    if DEEP_SCRAPE and args.delta:
+        # snapshots never expire: unchanged cards carry their details forward
+        detail_cache = DetailCache(DELTA_DB, ttl=None, max_entries=None)
+        delta_mode = True
+    elif DEEP_SCRAPE and not args.no_cache:
+        detail_cache = DetailCache(DETAIL_CACHE_DB, ttl=DETAIL_CACHE_TTL,
+                                   max_entries=DETAIL_CACHE_MAX_ENTRIES)
+
+    reporter = start_reporter(METRICS_EVERY, prom_path=args.metrics_prom, trace_path=args.trace)
+    start_browsers()
+    try:
+        for section_name, base_url in BASE_SECTIONS.items():
+            crawl_section(section_name, base_url, state, sink)
+    finally:
+        stop_browsers()
+        with timer("sink_close"):
+            sink.close()
+            membership_sink.close()
+        if image_sink is not None:
+            with timer("images_close"):
+                image_sink.close()
+        if history_sink is not None:
+            history_sink.close()
+        state.close()
+        if detail_cache is not None:
+            detail_cache.close()
+        reporter.stop()
+        print(RESOLVER.report())
+        print(CONTROLLER.report())
+
+    print(f"\n✔ Done. Rows: {sink.rows_written}  →  {args.output}")
+    print(f"  Listings: {membership_sink.rows_written}  →  {members_out}")
+    if image_sink is not None:
+        print(f"  Images: {image_sink.summary()}  →  {args.images}")
+    if history_sink is not None:
+        print(f"  History: {history_sink.summary()}  →  {args.history}")
+    if detail_cache is not None and args.delta:
+        print(f"  Delta: {detail_cache.hits} unchanged (detail fetches avoided), "
+              f"{detail_cache.changed} changed, {detail_cache.new} new")
+    elif detail_cache is not None:
+        print(f"  Detail cache: {detail_cache.hits} hits, {detail_cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
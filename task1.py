@@ -1,32 +1,30 @@
-import random
-import math
+import sys
 import matplotlib.pyplot as plt
 
-# Simulate data without numpy
-random.seed(123)
+from analytics import analyze, DATA_PATH
 
-price = [math.exp(random.gauss(5.5, 0.6)) for _ in range(1000)]
-discount = [
-    max(0, min(50, 20 - 0.003 * p + random.gauss(0, 2)))
-    for p in price
-]
+# Scraped data, aggregated in one pass (sample for the scatter, 2D counts for the density)
+agg = analyze(sys.argv[1] if len(sys.argv) > 1 else DATA_PATH)
+sample = agg.sample().dropna(subset=["Price", "Discount"])
+counts, price_edges, discount_edges = agg.price_discount_hist()
 
 fig, axes = plt.subplots(1, 2, figsize=(14, 5))
 
 # Scatter plot
-axes[0].scatter(price, discount, alpha=0.5, s=30)
-axes[0].set_title("Scatter plot (Price vs Discount)")
+axes[0].scatter(sample["Price"], sample["Discount"], alpha=0.5, s=30)
+axes[0].set_xscale("log")
+axes[0].set_title(f"Scatter plot (Price vs Discount, {len(sample)} sampled)")
 axes[0].set_xlabel("Price")
 axes[0].set_ylabel("Discount (%)")
 
 # 2D histogram (heatmap-like)
-axes[1].hist2d(price, discount, bins=40)
-axes[1].set_title("2D Histogram (Density)")
+mesh = axes[1].pcolormesh(price_edges, discount_edges, counts.T)
+axes[1].set_xscale("log")
+axes[1].set_title(f"2D Histogram (Density, {int(counts.sum())} products)")
 axes[1].set_xlabel("Price")
 axes[1].set_ylabel("Discount (%)")
-plt.colorbar(axes[1].collections[0], ax=axes[1])
+plt.colorbar(mesh, ax=axes[1])
 
 plt.tight_layout()
-plt.show()
 plt.savefig("output.png")
-plt.show()
\ No newline at end of file
+plt.show()
@@ -1,38 +1,17 @@
+import sys
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# ---------------- FIXED DATA ----------------
-subcategory = [f"subcat_{i}" for i in range(1, 21)]
+from analytics import analyze, DATA_PATH
 
-avg_price = np.array([
-    240, 255, 260, 270, 275,
-    280, 285, 290, 295, 300,
-    305, 310, 315, 320, 325,
-    330, 335, 340, 345, 350
-])
+MIN_COUNT = 5   # subcategories with fewer products are too noisy to plot
 
-avg_rating = np.array([
-    4.06, 4.05, 3.96, 4.03, 4.04,
-    3.98, 4.07, 3.94, 3.90, 4.12,
-    3.95, 4.01, 3.92, 3.88, 3.99,
-    4.05, 4.02, 3.93, 3.91, 4.10
-])
-
-count = np.array([
-    45, 50, 48, 52, 49,
-    55, 60, 47, 44, 62,
-    51, 53, 46, 45, 58,
-    61, 59, 50, 48, 64
-])
-
-grp = pd.DataFrame({
-    "subcategory": subcategory,
-    "avg_price": avg_price,
-    "avg_rating": avg_rating,
-    "count": count
-})
+# ---------------- SCRAPED DATA ----------------
+# per-subcategory averages from one streaming pass over the scraper output
+grp = analyze(sys.argv[1] if len(sys.argv) > 1 else DATA_PATH).subcategory_table(min_count=MIN_COUNT)
+grp = grp.dropna(subset=["avg_price", "avg_rating"])
+grp = grp[grp["avg_price"] > 0]
 
 # ---------------- SCATTER + REGRESSION ----------------
 plt.figure(figsize=(10, 6))
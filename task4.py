@@ -1,45 +1,27 @@
-import numpy as np
-import pandas as pd
+import math
+import sys
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy.stats import pearsonr
+
+from analytics import analyze, DATA_PATH
 
 # -----------------------------
-# Data simulation
+# Scraped data (one streaming pass)
 # -----------------------------
-np.random.seed(42)
-n = 1000
-
-df = pd.DataFrame({
-    "Discount": np.random.uniform(0, 50, n),
-})
-
-df["Rating"] = np.clip(
-    3 + 0.01 * df["Discount"] + np.random.normal(0, 1, n),
-    1, 5
-)
+agg = analyze(sys.argv[1] if len(sys.argv) > 1 else DATA_PATH)
+df = agg.sample().dropna(subset=["Discount", "Rating"])
 
 # -----------------------------
-# Correlation
+# Correlation (over every row, not just the sample)
 # -----------------------------
-corr, p = pearsonr(df["Discount"], df["Rating"])
-print(f"Correlation: {corr:.3f}, P-value: {p:.3f}")
+corr, p, n = agg.discount_correlation()
+print(f"Correlation: {corr:.3f}, P-value: {p:.3f} (n={n})")
 
 # -----------------------------
 # Discount bins
 # -----------------------------
-df["Discount_Bin"] = pd.cut(
-    df["Discount"],
-    [0, 10, 20, 30, 40, 50],
-    labels=["0–10%", "10–20%", "20–30%", "30–40%", "40–50%"],
-    include_lowest=True
-)
-
-avg_rating = (
-    df.groupby("Discount_Bin", observed=True)["Rating"]
-    .mean()
-    .reset_index()
-)
+avg_rating = agg.discount_bins()
+avg_rating = avg_rating[avg_rating["count"] > 0]
 
 # -----------------------------
 # BOTH PLOTS TOGETHER (FIX 🔥)
@@ -48,7 +30,7 @@ fig, axes = plt.subplots(1, 2, figsize=(14, 5))
 
 # 1️⃣ Scatter plot
 axes[0].scatter(df["Discount"], df["Rating"], alpha=0.4)
-axes[0].set_title("Rating vs Discount")
+axes[0].set_title(f"Rating vs Discount ({len(df)} sampled)")
 axes[0].set_xlabel("Discount (%)")
 axes[0].set_ylabel("Rating")
 axes[0].grid(alpha=0.3)
@@ -73,7 +55,9 @@ plt.show()
 # -----------------------------
 print(
     "\nConclusion:",
-    "Weak relationship between discount and rating"
+    f"Not enough data to measure a correlation (n={n})"
+    if math.isnan(corr)
+    else "Weak relationship between discount and rating"
     if abs(corr) < 0.3
     else "Noticeable correlation exists"
 )
\ No newline at end of file
@@ -1,27 +1,28 @@
-import pandas as pd
-import numpy as np
+import sys
+import math
+import calendar
 
-# Data generate
-np.random.seed(42)
-dates = pd.date_range(start="2025-01-01", periods=90, freq="D")
-discounts = np.random.uniform(10, 30, 90)
+from analytics import analyze, DATA_PATH
 
-df = pd.DataFrame({
-    "date": dates,
-    "discount": discounts
-})
-
-# Monthly average
-df["month"] = df["date"].dt.strftime("%b")
-monthly_avg = df.groupby("month")["discount"].mean()
+path = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+if path.endswith((".sqlite", ".db")):
+    # Monthly average discount across every crawl in a price-history store
+    from price_history import PriceHistory
+    with PriceHistory(path) as history:
+        monthly_avg = history.monthly_discount()
+else:
+    # Monthly average discount, from one streaming pass over the scraped data
+    monthly_avg = analyze(path).monthly_discount()
+if monthly_avg.empty:
+    sys.exit("No rows with a discount and scrape date")
 
 # ASCII graph print
 print("\nDiscount (%) Trend\n")
 
-max_val = 30
-scale = 1  # height scale
+max_val = max(5, math.ceil(monthly_avg.max() / 5) * 5)
+min_val = max(0, math.floor(monthly_avg.min() / 5) * 5 - 5)
 
-for value in range(max_val, 9, -5):
+for value in range(max_val, min_val, -5):
     line = f"{value:>2} | "
     for avg in monthly_avg:
         if avg >= value:
@@ -30,8 +31,8 @@ for value in range(max_val, 9, -5):
             line += "     "
     print(line)
 
-print("   -----------------------------------------")
+print("   " + "-" * (5 * len(monthly_avg) + 4))
 print("      ", end="")
 for m in monthly_avg.index:
-    print(f"{m:^5}", end="")
+    print(f"{calendar.month_abbr[int(m[5:7])]:^5}", end="")
 print()
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""URL helpers shared by the cache, state and dedup code."""
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# query parameters that only say where a click came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "ref", "referrer", "src", "source",
+    "pos", "position", "pageid", "clicksrc", "clickpos", "adslot", "sponsored", "cmpid",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+# /product/<slug>/<numeric id>
+PRODUCT_ID_RE = re.compile(r"/product/([^/?#]+)/(\d+)")
+
+
+def normalize_product_url(url):
+    """
+    Cache key for a product page: host (without www.) + path, lowercased
+    host, no scheme, query string, fragment or trailing slash. Tracking
+    parameters and http/https variants therefore map to the same key.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/") or "/"
+    return f"{host}{path}"
+
+def layout_key(url):
+    """
+    Coarse page-template key: host plus first path segment, e.g.
+    "snapdeal.com/product" or "snapdeal.com/search". Pages sharing a key
+    usually share a template, so selector winners are memoized per key.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    first = parts.path.strip("/").split("/", 1)[0]
+    return f"{host}/{first}"
+
+def strip_tracking(url):
+    """`url` without tracking query parameters or fragment."""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)]
+    return urlunsplit(parts._replace(query=urlencode(query), fragment=""))
+
+def product_id(url):
+    """Snapdeal's numeric product id from a product URL, or ""."""
+    m = PRODUCT_ID_RE.search(url or "")
+    return m.group(2) if m else ""
+
+def canonical_product_url(url):
+    """
+    One URL per product: https://host/product/<slug>/<id> with no query
+    string when the id is in the path, else the URL minus tracking params.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    m = PRODUCT_ID_RE.search(parts.path)
+    if not m:
+        return strip_tracking(url)
+    host = parts.netloc.lower()
+    return urlunsplit((parts.scheme.lower() or "https", host,
+                       f"/product/{m.group(1)}/{m.group(2)}", "", ""))
+
+def product_key(url):
+    """
+    Identity of a product across sections, subcategories and URL variants:
+    "pid:<id>" when the URL carries a product id, else the normalized URL.
+    """
+    pid = product_id(url)
+    return f"pid:{pid}" if pid else normalize_product_url(strip_tracking(url))